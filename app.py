@@ -290,13 +290,14 @@ def process_file():
                     else:
                         logger.warning(f"Web应用验证失败: {code} 未找到")
 
-            # 创建匹配器并传入正确的股票数据
-            matcher = stock_name_matcher.StockNameMatcher(api_source=api_source)
-
-            # 确保匹配器使用正确的股票数据
+            # 创建匹配器并传入正确的股票数据：名称取自本地数据，
+            # 按需行情模式只向API源查询文件中出现的股票，不再下载全市场（未指定时按数据源默认）
+            demand_quotes = data.get('demand_quotes')
+            matcher = stock_name_matcher.StockNameMatcher(api_source=api_source, stock_list=stock_list,
+                                                          demand_quotes=demand_quotes)
             if stock_list is not None:
-                matcher.stock_list = stock_list
-                logger.info(f"Web应用匹配器股票数据已更新: {len(matcher.stock_list)} 只股票")
+                logger.info(f"Web应用匹配器股票数据已更新: {len(matcher.stock_list)} 只股票, "
+                            f"按需行情: {'是' if matcher.demand_quotes else '否'}")
 
             # 生成输出文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -8,17 +8,24 @@
 import os
 import json
 import logging
-from typing import Dict, Any, Optional
+import threading
+import functools
+from typing import Dict, Any, Callable, Optional, TypeVar
 from datetime import datetime
 from cryptography.fernet import Fernet
 import base64
 
 logger = logging.getLogger(__name__)
 
+# 默认的配置文件
+CONFIG_FILE = "config.json"
+
+T = TypeVar('T')
+
 class ConfigManager:
     """配置管理器类"""
     
-    def __init__(self, config_file: str = "config.json"):
+    def __init__(self, config_file: str = CONFIG_FILE):
         self.config_file = config_file
         self.config_data = {}
         self.encryption_key = self._get_or_create_encryption_key()
@@ -40,11 +47,39 @@ class ConfigManager:
             "data_sources": {
                 "primary": "local",
                 "fallback": ["akshare", "sina", "tencent"],
+                "hedge_delay": 3,  # 主数据源超过这段时间（秒）未返回时并行启动下一个备用数据源
                 "timeout": 30,
                 "retry_count": 3,
+                "http": {  # 数据源HTTP连接池：每个主机的最大连接数、重试退避系数（秒）和分批获取的并发数
+                    "pool_maxsize": 10,
+                    "backoff_factor": 0.5,
+                    "concurrency": {
+                        "sina": 4,
+                        "tencent": 8,
+                        "netease": 4,
+                        "xueqiu": 4
+                    }
+                },
                 "cache_duration": 3600,
+                "snapshot_cache": {  # 股票列表磁盘快照：目录和按数据源的有效期（秒，未列出的使用 cache_duration）
+                    "enabled": True,
+                    "directory": "cache",
+                    "ttl": {}
+                },
+                "cross_validation_deadline": 15,  # 交叉验证并发加载各数据源的总时限（秒）
                 "failure_threshold": 3,  # 失败阈值
-                "suggestion_cooldown": 3600  # 建议冷却时间（秒）
+                "suggestion_cooldown": 3600,  # 建议冷却时间（秒）
+                "throttle": {  # 各数据源网络请求的最小间隔（秒），本地数据源不限流
+                    "akshare": 0.0,
+                    "sina": 0.1,
+                    "tencent": 0.1,
+                    "eastmoney": 0.0,
+                    "netease": 0.2,
+                    "xueqiu": 0.5
+                },
+                "token_bucket": {  # 并发逐个请求的数据源：每秒请求数和允许的突发请求数
+                    "xueqiu": {"rate": 2.0, "capacity": 4}
+                }
             },
             "data_source_monitoring": {
                 "failure_counts": {},
@@ -58,7 +93,22 @@ class ConfigManager:
                 "allowed_file_types": [".csv", ".xlsx", ".xls"],
                 "auto_backup": True,
                 "log_level": "INFO",
-                "performance_optimization": True
+                "performance_optimization": True,
+                "match_cache": {  # 匹配结果缓存上限
+                    "max_entries": 100000,
+                    "max_memory_mb": 64,
+                    "ttl": 3600
+                },
+                "optimizer": {  # 代码补全的批大小和并发数，按每轮的吞吐量和错误率在上下限内自动调整
+                    "batch_size": 2000,
+                    "min_batch_size": 500,
+                    "max_batch_size": 50000,
+                    "workers": 2,
+                    "min_workers": 1,
+                    "max_workers": 8,
+                    "target_batch_seconds": 1.0,
+                    "max_error_rate": 0.1
+                }
             },
             "user_preferences": {
                 "default_api_source": "local",
@@ -436,6 +486,9 @@ class ConfigManager:
         """获取数据源统计信息"""
         try:
             monitoring = self.config_data.get("data_source_monitoring", {})
+            # 对冲加载记录的胜出次数和耗时（进程内统计）
+            from hedged_loader import get_hedged_loader
+            hedger = get_hedged_loader()
 
             stats = {}
             for source in ["local", "akshare", "sina", "tencent", "eastmoney", "netease", "xueqiu"]:
@@ -452,7 +505,8 @@ class ConfigManager:
                     "last_failure": monitoring.get("last_failures", {}).get(source),
                     "should_suggest_api": suggestion_info["should_suggest"],
                     "suggestion_reason": suggestion_info["suggestion_reason"],
-                    "has_api_key": bool(self.get_api_key(source))
+                    "has_api_key": bool(self.get_api_key(source)),
+                    "hedge": hedger.source_stats(source)
                 }
 
             return stats
@@ -481,5 +535,68 @@ class ConfigManager:
             "data_source_stats": self.get_data_source_stats()
         }
 
-# 全局配置管理器实例
-config_manager = ConfigManager()
+
+def shared_instance(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    装饰器：进程内共享的对象，第一次调用时才创建（多线程同时调用也只创建一次）
+
+    被装饰的函数的 peek() 返回已创建的对象，尚未创建时返回None（不触发创建）
+    """
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def getter() -> T:
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    getter.peek = lambda: instance[0] if instance else None
+    return getter
+
+
+@shared_instance
+def get_config_manager() -> ConfigManager:
+    """获取全局配置管理器（第一次调用时加载配置，没有配置文件时创建）"""
+    return ConfigManager()
+
+
+def get_section(name: str, key: str = None) -> Dict[str, Any]:
+    """
+    读取配置中的一节，不创建配置文件和加密密钥
+
+    全局配置管理器已创建时（例如Web应用）读取其中的配置，否则直接读取配置文件；
+    没有配置文件或读取失败时返回空配置，由调用方使用各自的默认值。
+
+    Args:
+        name: 配置节，例如 data_sources、system_settings
+        key: 节中的子项，例如 throttle；None表示整节
+
+    Returns:
+        Dict: 配置内容
+    """
+    try:
+        manager = get_config_manager.peek()
+        if manager is not None:
+            config = manager.config_data
+        elif os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        else:
+            return {}
+        section = config.get(name) or {}
+        if key is not None:
+            section = section.get(key) or {}
+        return section
+    except Exception as e:
+        logger.warning(f"读取配置 {name}{'.' + key if key else ''} 失败，使用默认值: {e}")
+        return {}
+
+
+def __getattr__(name: str):
+    """兼容 from config_manager import config_manager：第一次访问时才创建全局配置管理器"""
+    if name == 'config_manager':
+        return get_config_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
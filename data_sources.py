@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据源注册表
+每个数据源注册一个加载函数和它依赖的第三方包。依赖包在第一次使用该数据源时才导入，
+例如只使用本地数据源时不会导入 akshare，命令行启动和 Web 应用重新加载模块都不必等待。
+
+注册新的数据源：
+    @register_data_source('mysource', requires=('some_package',), description='我的数据源')
+    def load_from_mysource(api):
+        import some_package
+        return ...  # 返回包含 代码、名称 等列的 DataFrame
+
+加载函数的参数为 StockDataAPI 实例，可以使用其中的限流策略和HTTP会话池。
+"""
+
+import logging
+import importlib
+import importlib.util
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DataSource:
+    """一个已注册的数据源"""
+
+    def __init__(self, name: str, loader: Callable, requires: Tuple[str, ...] = (), description: str = '',
+                 snapshot: bool = True):
+        """
+        Args:
+            name: 数据源名称（即 --api 的取值）
+            loader: 加载股票列表的函数，参数为 StockDataAPI 实例
+            requires: 依赖的第三方包，第一次加载前导入
+            description: 数据源说明（用于命令行帮助）
+            snapshot: 加载结果是否保存为磁盘快照（本地数据源本身就在磁盘上，不需要）
+        """
+        self.name = name
+        self.loader = loader
+        self.requires = tuple(requires)
+        self.description = description or name
+        self.snapshot = snapshot
+        self._imported = False
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """依赖包是否已安装（只查找，不导入）"""
+        return all(importlib.util.find_spec(module) is not None for module in self.requires)
+
+    def import_requirements(self):
+        """导入依赖包，每个数据源只在第一次使用时导入"""
+        if self._imported:
+            return
+        with self._lock:
+            if self._imported:
+                return
+            for module in self.requires:
+                try:
+                    importlib.import_module(module)
+                except ImportError as e:
+                    raise ImportError(f"{self.name} 数据源缺少依赖包 {module}，请运行: pip install {module}") from e
+            if self.requires:
+                logger.info(f"📦 {self.name} 数据源已导入依赖包: {', '.join(self.requires)}")
+            self._imported = True
+
+    def load(self, api):
+        """导入依赖包后调用加载函数"""
+        self.import_requirements()
+        return self.loader(api)
+
+
+class DataSourceRegistry:
+    """数据源名称到加载函数的注册表"""
+
+    def __init__(self):
+        self._sources: Dict[str, DataSource] = {}
+
+    def register(self, name: str, requires: Tuple[str, ...] = (), description: str = '', snapshot: bool = True):
+        """
+        注册数据源的装饰器，被装饰的函数原样返回
+
+        同名数据源重复注册时以最后一次为准（例如重新加载模块）
+        """
+        def decorator(loader: Callable) -> Callable:
+            self._sources[name] = DataSource(name, loader, requires, description, snapshot)
+            return loader
+        return decorator
+
+    def unregister(self, name: str):
+        """删除已注册的数据源"""
+        self._sources.pop(name, None)
+
+    def get(self, name: str) -> Optional[DataSource]:
+        """按名称查找数据源，未注册时返回None"""
+        return self._sources.get(name)
+
+    def names(self) -> List[str]:
+        """已注册的数据源名称（按注册顺序）"""
+        return list(self._sources)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sources
+
+    def describe(self) -> str:
+        """数据源说明，用于命令行帮助"""
+        return ', '.join(f"{name}({source.description})" for name, source in self._sources.items())
+
+
+# 进程内共享的注册表
+registry = DataSourceRegistry()
+register_data_source = registry.register
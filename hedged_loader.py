@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据源对冲加载
+先加载主数据源，超过对冲延迟仍未返回时并行启动备用链（data_sources.fallback）中的下一个数据源，
+某个数据源失败时立即启动下一个；使用最先成功返回的结果，并通知其余仍在进行的加载取消
+（分批获取的数据源不再发送剩余批次的请求）。
+
+每次加载的胜出数据源和各数据源的耗时记录在统计信息中，合并到 ConfigManager 的数据源统计。
+
+对冲延迟和备用链读取 ConfigManager 的 data_sources 配置，例如：
+    "fallback": ["akshare", "sina", "tencent"],
+    "hedge_delay": 3
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config_manager import get_section, shared_instance
+
+logger = logging.getLogger(__name__)
+
+# 主数据源超过这段时间未返回时启动下一个备用数据源（秒）
+DEFAULT_HEDGE_DELAY = 3.0
+
+# 默认的备用链，与 data_sources.fallback 的默认值一致
+DEFAULT_FALLBACK = ('akshare', 'sina', 'tencent')
+
+
+class HedgeResult:
+    """一次对冲加载的结果"""
+
+    def __init__(self, source: Optional[str], value: Any = None, latencies: Dict[str, float] = None,
+                 errors: Dict[str, str] = None):
+        """
+        Args:
+            source: 胜出的数据源，全部失败时为None
+            value: 胜出数据源的加载结果
+            latencies: 已返回的数据源 -> 耗时（秒，从该数据源启动时算起）
+            errors: 失败的数据源 -> 失败原因
+        """
+        self.source = source
+        self.value = value
+        self.latencies = latencies or {}
+        self.errors = errors or {}
+
+    @property
+    def ok(self) -> bool:
+        """是否有数据源成功返回"""
+        return self.source is not None
+
+
+class HedgedLoader:
+    """按备用链对冲加载股票列表，记录各数据源的胜出次数和耗时"""
+
+    def __init__(self, fallback: Iterable[str] = DEFAULT_FALLBACK, hedge_delay: float = DEFAULT_HEDGE_DELAY,
+                 config_loader: Optional[Callable[[], Dict[str, Any]]] = None):
+        """
+        Args:
+            fallback: 备用数据源（按顺序），主数据源之后依次启动
+            hedge_delay: 对冲延迟（秒），0表示同时启动整条链
+            config_loader: 返回数据源配置的函数，在第一次加载时才调用
+        """
+        self.fallback = list(fallback)
+        self.hedge_delay = max(0.0, float(hedge_delay))
+        self._config_loader = config_loader
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hedges = 0
+        self.failures = 0
+        self._sources: Dict[str, Dict[str, Any]] = {}
+
+    def _load_config(self):
+        """第一次加载时读取备用链和对冲延迟"""
+        if self._config_loader is None:
+            return
+        with self._lock:
+            loader, self._config_loader = self._config_loader, None
+        if loader is not None:
+            settings = loader()
+            if 'fallback' in settings:
+                self.fallback = list(settings['fallback'] or [])
+            if 'hedge_delay' in settings:
+                self.hedge_delay = max(0.0, float(settings['hedge_delay']))
+
+    def chain(self, primary: str, available: Callable[[str], bool] = None) -> List[str]:
+        """
+        主数据源和备用数据源组成的加载顺序（去掉重复和本地数据源，本地数据源由调用方最后兜底）
+
+        Args:
+            primary: 主数据源
+            available: 判断备用数据源是否可用的函数（例如是否已注册），None表示都可用
+        """
+        self._load_config()
+        chain = [primary]
+        for source in self.fallback:
+            if source in chain or source == 'local':
+                continue
+            if available is None or available(source):
+                chain.append(source)
+        return chain
+
+    def load(self, chain: List[str], loader: Callable[[str, threading.Event], Any]) -> HedgeResult:
+        """
+        按顺序对冲加载，返回最先成功的结果
+
+        Args:
+            chain: 加载顺序，第一个为主数据源
+            loader: 加载函数，参数为 (数据源, 取消事件)，失败时抛出异常；
+                    取消事件被设置后应尽快结束，返回值会被丢弃
+
+        Returns:
+            HedgeResult: 胜出的数据源和各数据源的耗时，全部失败时 ok 为False
+        """
+        self._load_config()
+        results = queue.Queue()
+        cancel = threading.Event()
+        started: Dict[str, float] = {}
+
+        def run(source):
+            start = time.perf_counter()
+            try:
+                value, error = loader(source, cancel), None
+            except Exception as e:
+                value, error = None, str(e) or type(e).__name__
+            results.put((source, value, error, time.perf_counter() - start))
+
+        def launch(source):
+            started[source] = time.monotonic()
+            # 守护线程：被取消的数据源不会阻塞进程退出
+            threading.Thread(target=run, args=(source,), name=f'{source}-hedge', daemon=True).start()
+
+        latencies, errors = {}, {}
+        winner, value = None, None
+        next_source = 0
+        pending = 0
+        while winner is None and (pending or next_source < len(chain)):
+            if pending == 0:
+                launch(chain[next_source])
+                next_source += 1
+                pending += 1
+                continue
+            timeout = None
+            if next_source < len(chain):
+                timeout = max(0.0, started[chain[next_source - 1]] + self.hedge_delay - time.monotonic())
+            try:
+                source, result, error, latency = results.get(timeout=timeout)
+            except queue.Empty:
+                logger.info(f"⏱️ {chain[next_source - 1]} 在 {self.hedge_delay:.1f} 秒内未返回，"
+                            f"并行启动备用数据源 {chain[next_source]}")
+                with self._lock:
+                    self.hedges += 1
+                launch(chain[next_source])
+                next_source += 1
+                pending += 1
+                continue
+            pending -= 1
+            latencies[source] = latency
+            if error is None:
+                winner, value = source, result
+            else:
+                errors[source] = error
+                logger.warning(f"{source} 加载失败（{latency:.2f} 秒）: {error}")
+                # 失败后立即启动下一个，不再等待对冲延迟
+                if next_source < len(chain):
+                    launch(chain[next_source])
+                    next_source += 1
+                    pending += 1
+
+        if pending:
+            cancel.set()
+            cancelled = [source for source in started if source not in latencies]
+            logger.info(f"已取消仍在加载的数据源: {', '.join(cancelled)}")
+
+        self._record(winner, latencies, errors)
+        if winner is not None:
+            logger.info(f"🏁 {winner} 最先返回（{latencies[winner]:.2f} 秒），已启动: {', '.join(started)}")
+        return HedgeResult(winner, value, latencies, errors)
+
+    def _record(self, winner: Optional[str], latencies: Dict[str, float], errors: Dict[str, str]):
+        """记录胜出的数据源和耗时"""
+        with self._lock:
+            self.loads += 1
+            if winner is None:
+                self.failures += 1
+            for source, latency in latencies.items():
+                stats = self._sources.setdefault(source, {'wins': 0, 'failures': 0, 'count': 0,
+                                                          'total_latency': 0.0, 'last_latency': None})
+                stats['count'] += 1
+                stats['total_latency'] += latency
+                stats['last_latency'] = round(latency, 3)
+                if source == winner:
+                    stats['wins'] += 1
+                elif source in errors:
+                    stats['failures'] += 1
+
+    def source_stats(self, source: str) -> Dict[str, Any]:
+        """某个数据源的对冲统计：胜出次数、失败次数、最近一次和平均耗时（秒）"""
+        with self._lock:
+            stats = self._sources.get(source)
+            if stats is None:
+                return {'wins': 0, 'failures': 0, 'last_latency': None, 'avg_latency': None}
+            return {
+                'wins': stats['wins'],
+                'failures': stats['failures'],
+                'last_latency': stats['last_latency'],
+                'avg_latency': round(stats['total_latency'] / stats['count'], 3),
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """对冲加载统计信息"""
+        with self._lock:
+            sources = list(self._sources)
+            summary = {
+                'loads': self.loads,
+                'hedges': self.hedges,
+                'failures': self.failures,
+                'hedge_delay': self.hedge_delay,
+                'fallback': list(self.fallback),
+            }
+        summary['sources'] = {source: self.source_stats(source) for source in sources}
+        return summary
+
+
+@shared_instance
+def get_hedged_loader() -> HedgedLoader:
+    """获取进程内共享的对冲加载器（第一次加载时读取 data_sources 配置）"""
+    return HedgedLoader(config_loader=lambda: get_section('data_sources'))
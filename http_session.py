@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据源HTTP会话池
+每个数据源使用一个长期复用的 requests.Session：
+1. 保持连接（keep-alive），同一主机的连续请求复用TCP连接
+2. 每个主机的连接数不超过 pool_maxsize，超出时等待空闲连接
+3. 连接失败、超时和 429/5xx 响应按指数退避重试，重试次数读取 data_sources.retry_count
+
+requests 在第一次创建会话时才导入，只使用本地数据源时不会导入。
+
+超时、重试、连接数和分批获取的并发数可通过 ConfigManager 的 data_sources 配置，例如：
+    "timeout": 30,
+    "retry_count": 3,
+    "http": {"pool_maxsize": 10, "backoff_factor": 0.5, "concurrency": {"tencent": 8}}
+"""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from config_manager import get_section, shared_instance
+
+if TYPE_CHECKING:
+    import requests
+    from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，与 ConfigManager 的默认值一致
+DEFAULT_SETTINGS = {
+    'timeout': 30,  # 单次请求的最长超时（秒），各数据源传入的超时不超过该值
+    'retry_count': 3,
+    'pool_maxsize': 10,  # 每个主机的最大连接数
+    'backoff_factor': 0.5,  # 第n次重试前等待 backoff_factor * 2^(n-1) 秒
+}
+
+# 分批获取行情时各数据源同时进行的请求数，未列出的数据源为1
+DEFAULT_CONCURRENCY = {
+    'sina': 4,
+    'tencent': 8,
+    'netease': 4,
+    'xueqiu': 4,
+}
+
+# 需要重试的响应状态码
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class HttpSessionPool:
+    """按数据源管理可复用的HTTP会话，并统计连接复用情况"""
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None,
+                 config_loader: Optional[Callable[[], Dict[str, Any]]] = None):
+        """
+        Args:
+            settings: 超时、重试和连接数配置，未指定的使用默认值
+            config_loader: 返回配置的函数，在第一次创建会话时才调用
+        """
+        self.settings = dict(DEFAULT_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self._config_loader = config_loader
+        self._sessions: Dict[str, 'requests.Session'] = {}
+        self._adapters: Dict[str, 'HTTPAdapter'] = {}
+        self._retries: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _load_config(self):
+        """第一次创建会话时读取配置（调用方持有锁）"""
+        if self._config_loader is not None:
+            self.settings.update(self._config_loader())
+            self._config_loader = None
+
+    def session(self, source: str) -> 'requests.Session':
+        """获取数据源的会话，第一次使用时创建"""
+        session = self._sessions.get(source)
+        if session is not None:
+            return session
+        with self._lock:
+            if source not in self._sessions:
+                self._load_config()
+                # 延迟导入：只有访问网络的数据源才需要 requests
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=int(self.settings['retry_count']),
+                    backoff_factor=float(self.settings['backoff_factor']),
+                    status_forcelist=RETRY_STATUS,
+                    allowed_methods=frozenset(['GET']),
+                    raise_on_status=False,
+                )
+                pool_maxsize = max(1, int(self.settings['pool_maxsize']))
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize,
+                                      max_retries=retry, pool_block=True)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[source] = session
+                self._adapters[source] = adapter
+                self._retries[source] = 0
+            return self._sessions[source]
+
+    def get(self, source: str, url: str, timeout: float = None, **kwargs) -> 'requests.Response':
+        """
+        通过数据源的会话发送GET请求
+
+        Args:
+            source: 数据源名称
+            url: 请求地址
+            timeout: 超时（秒），不超过配置的 timeout，None表示使用配置值
+            **kwargs: 传给 requests.Session.get 的其他参数（params、headers等）
+
+        Returns:
+            requests.Response: 响应（重试用尽后返回最后一次响应，连接失败时抛出异常）
+        """
+        session = self.session(source)
+        limit = float(self.settings['timeout'])
+        timeout = limit if timeout is None else min(float(timeout), limit)
+        response = session.get(url, timeout=timeout, **kwargs)
+        retries = getattr(response.raw, 'retries', None)
+        if retries is not None and retries.history:
+            with self._lock:
+                self._retries[source] += len(retries.history)
+        return response
+
+    def concurrency(self, source: str) -> int:
+        """数据源分批获取时的并发上限"""
+        with self._lock:
+            self._load_config()
+        limits = dict(DEFAULT_CONCURRENCY, **self.settings.get('concurrency', {}))
+        return max(1, int(limits.get(source, 1)))
+
+    def stats(self, source: str = None) -> Dict[str, Any]:
+        """
+        连接复用统计
+
+        Args:
+            source: 数据源名称，None表示返回全部数据源
+
+        Returns:
+            Dict: 请求数、新建连接数、复用次数、复用率和重试次数
+        """
+        if source is None:
+            return {name: self.stats(name) for name in list(self._sessions)}
+        adapter = self._adapters.get(source)
+        requests_count = connections = 0
+        if adapter is not None:
+            manager = adapter.poolmanager
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is not None:
+                    requests_count += pool.num_requests
+                    connections += pool.num_connections
+        reused = max(0, requests_count - connections)
+        return {
+            'requests': requests_count,
+            'connections': connections,
+            'reused': reused,
+            'reuse_rate': reused / requests_count if requests_count else 0.0,
+            'retries': self._retries.get(source, 0),
+        }
+
+    def log_stats(self, source: str):
+        """记录数据源的连接复用情况"""
+        stats = self.stats(source)
+        if stats['requests']:
+            logger.info(f"🔌 {source} 连接复用: 请求 {stats['requests']} 次, 新建连接 {stats['connections']} 次, "
+                        f"复用率 {stats['reuse_rate']:.1%}, 重试 {stats['retries']} 次")
+
+    def close(self):
+        """关闭全部会话"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._adapters.clear()
+
+
+def load_http_settings(config: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    读取 data_sources 中的超时、重试和连接数配置，未配置的项使用默认值
+
+    Args:
+        config: data_sources 配置，None表示从配置文件读取
+    """
+    if config is None:
+        config = get_section('data_sources')
+    settings = {name: config[name] for name in ('timeout', 'retry_count') if name in config}
+    settings.update(config.get('http', {}))
+    return settings
+
+
+@shared_instance
+def get_http_pool() -> HttpSessionPool:
+    """获取进程内共享的HTTP会话池（第一次网络请求时读取配置）"""
+    return HttpSessionPool(config_loader=load_http_settings)
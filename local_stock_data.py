@@ -9,6 +9,8 @@ import logging
 import os
 from typing import Optional
 
+from name_normalizer import clean_stock_name, clean_name_series
+
 logger = logging.getLogger(__name__)
 
 class LocalStockData:
@@ -154,7 +156,7 @@ class LocalStockData:
             if stock_list:
                 df = pd.DataFrame(stock_list)
                 # 添加清理名称列
-                df['清理名称'] = df['名称'].apply(self._clean_stock_name)
+                df['清理名称'] = clean_name_series(df['名称'])
 
                 logger.info(f"TXT格式股票数据解析完成，共加载 {len(df)} 只股票")
                 return df
@@ -329,7 +331,7 @@ class LocalStockData:
 
             # 添加清理名称列
             if '名称' in standard_data.columns:
-                standard_data['清理名称'] = standard_data['名称'].apply(self._clean_stock_name)
+                standard_data['清理名称'] = clean_name_series(standard_data['名称'])
 
             # 填充缺失的数值列
             numeric_columns = ['最新价', '涨跌幅', '涨跌额', '成交量', '成交额', '市盈率-动态', '市净率', '总市值', '流通市值']
@@ -409,25 +411,14 @@ class LocalStockData:
         df = pd.DataFrame(sample_stocks)
         
         # 添加清理名称列
-        df['清理名称'] = df['名称'].apply(self._clean_stock_name)
+        df['清理名称'] = clean_name_series(df['名称'])
         
         logger.info(f"本地股票数据加载完成，共 {len(df)} 只股票")
         return df
     
     def _clean_stock_name(self, name):
-        """清理股票名称"""
-        if pd.isna(name):
-            return ""
-        
-        # 移除常见的后缀
-        suffixes = ['股份有限公司', '有限公司', '集团', '控股', '股份', 'A', 'B', 'H']
-        cleaned = str(name).strip()
-        
-        for suffix in suffixes:
-            if cleaned.endswith(suffix):
-                cleaned = cleaned[:-len(suffix)]
-        
-        return cleaned.strip()
+        """清理股票名称，与股票名称匹配器使用相同的规则（见 name_normalizer）"""
+        return clean_stock_name(name)
     
     def get_stock_list(self):
         """获取股票列表"""
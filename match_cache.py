@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+匹配结果缓存
+进程内共享、线程安全的 LRU/TTL 缓存，match_stock_code / match_stock_name 的结果按
+(标准化输入, 价格档位, 股票列表版本) 缓存。股票列表每次替换都会分配新的版本号，
+旧版本的缓存项随之失效。
+
+缓存上限可通过 ConfigManager 的 system_settings.match_cache 配置，例如：
+    "match_cache": {"max_entries": 100000, "max_memory_mb": 64, "ttl": 3600}
+"""
+
+import sys
+import time
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import pandas as pd
+
+from config_manager import get_section, shared_instance
+
+logger = logging.getLogger(__name__)
+
+# 默认缓存上限
+DEFAULT_SETTINGS = {
+    'max_entries': 100000,
+    'max_memory_mb': 64,
+    'ttl': 3600,  # 秒，0表示不过期
+}
+
+# A股最小价格变动单位为0.01元，参考价格按分归档
+PRICE_PRECISION = 2
+
+_universe_versions = itertools.count(1)
+
+
+def next_universe_version() -> int:
+    """为新加载的股票列表分配进程内唯一的版本号"""
+    return next(_universe_versions)
+
+
+def price_bucket(price) -> Optional[Any]:
+    """
+    参考价格所在的档位
+
+    Returns:
+        空值和0返回None（不使用价格），NaN返回'nan'，其余按分取整
+    """
+    if price is None:
+        return None
+    try:
+        if pd.isna(price):
+            return 'nan'
+        value = float(price)
+    except (TypeError, ValueError):
+        return str(price)
+    return round(value, PRICE_PRECISION) if value else None
+
+
+def estimate_size(value) -> int:
+    """粗略估算缓存值占用的字节数（容器及其中的键和值）"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class MatchCache:
+    """线程安全的 LRU/TTL 缓存，按条目数和估算内存限制大小"""
+
+    def __init__(self, max_entries: int = DEFAULT_SETTINGS['max_entries'],
+                 max_memory_mb: float = DEFAULT_SETTINGS['max_memory_mb'],
+                 ttl: float = DEFAULT_SETTINGS['ttl'],
+                 config_loader: Optional[Callable[[], Dict[str, Any]]] = None):
+        """
+        Args:
+            max_entries: 最大条目数
+            max_memory_mb: 缓存值估算内存上限（MB）
+            ttl: 缓存项有效期（秒），0表示不过期
+            config_loader: 返回缓存配置的函数，在第一次使用缓存时才调用
+        """
+        self._entries = OrderedDict()  # key -> (过期时间, 估算大小, 值)
+        self._lock = threading.Lock()
+        self._config_loader = config_loader
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.configure(max_entries=max_entries, max_memory_mb=max_memory_mb, ttl=ttl)
+
+    def configure(self, max_entries: int = None, max_memory_mb: float = None, ttl: float = None):
+        """修改缓存上限，超出新上限的条目立即淘汰"""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max(0, int(max_entries))
+            if max_memory_mb is not None:
+                self.max_bytes = max(0, int(float(max_memory_mb) * 1024 * 1024))
+            if ttl is not None:
+                self.ttl = max(0.0, float(ttl))
+            self._evict()
+
+    def _load_config(self):
+        """第一次使用缓存时读取配置"""
+        if self._config_loader is None:
+            return
+        with self._lock:
+            loader, self._config_loader = self._config_loader, None
+        if loader is not None:
+            settings = loader()
+            self.configure(**{name: settings[name] for name in DEFAULT_SETTINGS if name in settings})
+
+    def get(self, key: Hashable, default=None):
+        """读取缓存，命中时移到最近使用的位置"""
+        self._load_config()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] is not None and entry[0] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, value):
+        """写入缓存，超出上限时淘汰最久未使用的条目"""
+        self._load_config()
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_entries == 0 or size > self.max_bytes:
+                return
+            expires = time.monotonic() + self.ttl if self.ttl > 0 else None
+            self._entries[key] = (expires, size, value)
+            self.memory_bytes += size
+            self._evict()
+
+    def _remove(self, key: Hashable):
+        """删除条目（调用方持有锁）"""
+        self.memory_bytes -= self._entries.pop(key)[1]
+
+    def _evict(self):
+        """淘汰最久未使用的条目直到满足上限（调用方持有锁）"""
+        while self._entries and (len(self._entries) > self.max_entries or self.memory_bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate_version(self, version: int) -> int:
+        """
+        删除某个股票列表版本的全部缓存项（键的最后一项为版本号）
+
+        Returns:
+            int: 删除的条目数
+        """
+        with self._lock:
+            stale = [key for key in self._entries if isinstance(key, tuple) and key and key[-1] == version]
+            for key in stale:
+                self._remove(key)
+        if stale:
+            logger.debug(f"股票列表版本 {version} 已替换，清除 {len(stale)} 个缓存项")
+        return len(stale)
+
+    def clear(self):
+        """清空缓存（统计计数保留）"""
+        with self._lock:
+            self._entries.clear()
+            self.memory_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'memory_bytes': self.memory_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'max_entries': self.max_entries,
+                'max_memory_mb': self.max_bytes / 1024 / 1024,
+                'ttl': self.ttl,
+            }
+
+
+@shared_instance
+def get_match_cache() -> MatchCache:
+    """获取进程内共享的匹配结果缓存（第一次使用时读取 system_settings.match_cache 配置）"""
+    return MatchCache(config_loader=lambda: get_section('system_settings', 'match_cache'))
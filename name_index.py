@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+股票名称匹配索引
+按名称、清理名称建立哈希表用于精确匹配，并提供批量模糊评分和包含匹配，
+评分规则与 fuzzywuzzy 的 process.extract(scorer=fuzz.ratio) 一致（fuzzywuzzy 在使用时才导入）
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from rapidfuzz.distance import Indel
+    from rapidfuzz.process import cdist
+except ImportError:
+    # 没有 rapidfuzz 时逐个名称调用 fuzzywuzzy
+    Indel = None
+    cdist = None
+
+logger = logging.getLogger(__name__)
+
+# 模糊匹配取前10个候选，匹配度不低于60
+FUZZY_LIMIT = 10
+FUZZY_THRESHOLD = 60
+
+# 候选剪枝阈值：匹配度 = round(100 * 2*LCS/(len1+len2))，不低于60要求相似度不低于0.595，
+# 留出浮点误差余量后按0.59剪枝
+MIN_SIMILARITY = 0.59
+
+# 批量评分时每块评分矩阵的单元数上限（float64，约32MB）
+SCORE_BLOCK_CELLS = 4_000_000
+
+# 大于任何名称字符的哨兵，前缀 q 的所有后缀都落在 [q, q + 哨兵) 区间内
+PREFIX_SENTINEL = '\U0010ffff'
+
+
+def price_band_bounds(reference_prices, band) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    每个参考价格对应的价格区间 [参考价格 × (1 - band), 参考价格 × (1 + band)]
+
+    Args:
+        reference_prices: 参考价格序列，无效或不大于0的参考价格不限制价格
+        band: 区间比例，None或0表示不使用价格区间
+
+    Returns:
+        Optional[Tuple[np.ndarray, np.ndarray]]: (下限, 上限)，不限制价格的位置为 (-inf, inf)；
+                                                 不使用价格区间时返回None
+    """
+    if not band:
+        return None
+    reference = pd.to_numeric(pd.Series(reference_prices, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+    valid = np.isfinite(reference) & (reference > 0)
+    lower = np.where(valid, reference * (1 - band), -np.inf)
+    upper = np.where(valid, reference * (1 + band), np.inf)
+    return lower, upper
+
+
+def _group_rows(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """值 -> 按行顺序排列的行位置数组"""
+    groups = {}
+    for row, value in enumerate(values):
+        groups.setdefault(value, []).append(row)
+    return {key: np.array(rows, dtype=np.int64) for key, rows in groups.items()}
+
+
+class NameIndex:
+    """股票名称索引：名称/清理名称 -> 行位置，以及模糊匹配和包含匹配"""
+
+    def __init__(self, stock_list: pd.DataFrame):
+        """
+        构建索引
+
+        Args:
+            stock_list: 标准格式的股票列表（包含'代码'、'名称'和'清理名称'列）
+        """
+        self.size = len(stock_list)
+        self.codes = stock_list['代码'].to_numpy(dtype=object)
+        self.names = stock_list['名称'].to_numpy(dtype=object)
+        if '最新价' in stock_list.columns:
+            self.prices = stock_list['最新价'].to_numpy(dtype=object)
+            self.price_values = pd.to_numeric(stock_list['最新价'], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            self.prices = np.full(self.size, np.nan, dtype=object)
+            self.price_values = np.full(self.size, np.nan)
+        # 价格排序索引（NaN排在最后），用于按价格区间筛选候选
+        self.price_order = np.argsort(self.price_values, kind='stable')
+        self.sorted_prices = self.price_values[self.price_order]
+        self.clean_names = stock_list['清理名称'].to_numpy(dtype=object)
+        self.clean_texts = [str(name) for name in self.clean_names]
+
+        # 包含匹配：所有清理名称的全部后缀排序后组成后缀数组，
+        # 包含查询串的名称就是以查询串为前缀的后缀所在的行
+        suffixes = sorted((text[start:], row) for row, text in enumerate(self.clean_texts)
+                          for start in range(len(text)))
+        self._suffixes = np.array([suffix for suffix, _ in suffixes], dtype=str) if suffixes else np.array([], dtype='U1')
+        self._suffix_rows = np.array([row for _, row in suffixes], dtype=np.int64)
+
+        # 精确匹配哈希表
+        self._by_name = _group_rows(self.names)
+        self._by_clean = _group_rows(self.clean_names)
+
+        # 模糊匹配的候选项（与 process.extract 相同的预处理）
+        from fuzzywuzzy import utils
+        self.choices = [utils.full_process(name) for name in self.clean_names]
+        self.choice_lengths = np.array([len(choice) for choice in self.choices], dtype=np.int64)
+
+        # 单字倒排索引：字符 -> (候选位置数组, 该字符在候选中出现的次数)
+        postings = {}
+        for pos, choice in enumerate(self.choices):
+            for char, count in Counter(choice).items():
+                postings.setdefault(char, ([], []))
+                postings[char][0].append(pos)
+                postings[char][1].append(count)
+        self._char_postings = {
+            char: (np.array(positions, dtype=np.int64), np.array(counts, dtype=np.int64))
+            for char, (positions, counts) in postings.items()
+        }
+
+        logger.debug(f"名称索引构建完成: {self.size} 行, {len(self._by_clean)} 个清理名称")
+
+    def exact_rows(self, name, cleaned: str) -> np.ndarray:
+        """名称或清理名称完全相同的行位置（按行顺序）"""
+        by_name = self._by_name.get(name) if isinstance(name, str) else None
+        by_clean = self._by_clean.get(cleaned)
+        if by_name is None:
+            return by_clean if by_clean is not None else np.empty(0, dtype=np.int64)
+        if by_clean is None:
+            return by_name
+        return np.union1d(by_name, by_clean)
+
+    def rows_with_clean_name(self, cleaned: str) -> np.ndarray:
+        """清理名称等于指定值的行位置"""
+        rows = self._by_clean.get(cleaned)
+        return rows if rows is not None else np.empty(0, dtype=np.int64)
+
+    def price_band_mask(self, reference_price, band) -> Optional[np.ndarray]:
+        """
+        最新价在参考价格 ±band 区间内的行
+
+        Args:
+            reference_price: 参考价格
+            band: 区间比例，例如0.1表示±10%
+
+        Returns:
+            Optional[np.ndarray]: 每行是否在区间内的布尔数组，不限制价格时返回None
+        """
+        bounds = price_band_bounds([reference_price], band)
+        if bounds is None or np.isinf(bounds[0][0]):
+            return None
+        start = np.searchsorted(self.sorted_prices, bounds[0][0], side='left')
+        end = np.searchsorted(self.sorted_prices, bounds[1][0], side='right')
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.price_order[start:end]] = True
+        return mask
+
+    def price_differences(self, rows: np.ndarray, reference_price: float) -> np.ndarray:
+        """指定行的最新价与参考价格之差的绝对值（价格无效时为NaN）"""
+        return np.abs(self.price_values[rows] - reference_price)
+
+    def _score(self, processed_query: str, choice: str) -> int:
+        """与 fuzz.ratio 相同的匹配度"""
+        if Indel is None:
+            from fuzzywuzzy import fuzz
+            return fuzz.ratio(processed_query, choice)
+        return int(round(100 * Indel.normalized_similarity(processed_query, choice)))
+
+    def fuzzy_search(self, query: str, allowed: Optional[np.ndarray] = None) -> List[Tuple[str, int]]:
+        """
+        单个名称的模糊匹配，结果与 process.extract(query, 清理名称, limit=10, scorer=fuzz.ratio)
+        中匹配度不低于60的部分一致
+
+        通过单字倒排索引统计每个候选与查询共有的字符数，它是最长公共子序列长度的上界，
+        上界达不到阈值的候选不可能达到60分，只对其余候选计算匹配度
+
+        Args:
+            query: 清理后的名称
+            allowed: 可选的候选范围（布尔数组，例如 price_band_mask 的结果），范围外的候选不评分
+
+        Returns:
+            List[Tuple[str, int]]: 匹配度最高的前10个 (清理名称, 匹配度)
+        """
+        from fuzzywuzzy import utils
+        processed = utils.full_process(query)
+        if not processed:
+            # 预处理后为空时，只有同样为空的候选得100分
+            empty = self.choice_lengths == 0
+            if allowed is not None:
+                empty &= allowed
+            empty = np.flatnonzero(empty)[:FUZZY_LIMIT]
+            return [(self.clean_names[pos], 100) for pos in empty]
+
+        positions, shared = [], []
+        for char, count in Counter(processed).items():
+            posting = self._char_postings.get(char)
+            if posting is not None:
+                positions.append(posting[0])
+                shared.append(np.minimum(posting[1], count))
+        if not positions:
+            return []
+
+        # 共有字符数（按出现次数取较小值）
+        shared_total = np.bincount(np.concatenate(positions), weights=np.concatenate(shared), minlength=self.size)
+        possible = 2 * shared_total >= MIN_SIMILARITY * (len(processed) + self.choice_lengths)
+        if allowed is not None:
+            possible &= allowed
+        candidates = np.flatnonzero(possible)
+
+        scored = []
+        for pos in candidates:
+            score = self._score(processed, self.choices[pos])
+            if score >= FUZZY_THRESHOLD:
+                scored.append((-score, pos))
+        # 匹配度相同时保持候选顺序，与 heapq.nlargest 一致
+        scored.sort()
+        return [(self.clean_names[pos], -neg_score) for neg_score, pos in scored[:FUZZY_LIMIT]]
+
+    def fuzzy_top(self, queries: List[str], workers: int = -1,
+                  bounds: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> List[List[Tuple[str, int]]]:
+        """
+        批量模糊匹配
+
+        Args:
+            queries: 清理后的名称列表
+            workers: 评分使用的线程数，-1表示使用全部CPU核心
+            bounds: 可选的每个名称的价格区间 (下限, 上限)（price_band_bounds 的结果），
+                    最新价不在区间内的候选不参与前10名的选取
+
+        Returns:
+            List[List[Tuple[str, int]]]: 每个名称匹配度最高的前10个 (清理名称, 匹配度)，
+                                        只保留匹配度不低于60的候选
+        """
+        if not queries or self.size == 0:
+            return [[] for _ in queries]
+        from fuzzywuzzy import fuzz, process, utils
+        if cdist is None:
+            results = []
+            for pos, query in enumerate(queries):
+                choices = self.clean_names
+                if bounds is not None and not np.isinf(bounds[0][pos]):
+                    choices = choices[(self.price_values >= bounds[0][pos]) & (self.price_values <= bounds[1][pos])]
+                results.append([(name, score) for name, score in
+                                process.extract(query, choices.tolist(), limit=FUZZY_LIMIT, scorer=fuzz.ratio)
+                                if score >= FUZZY_THRESHOLD])
+            return results
+
+        processed = [utils.full_process(query) for query in queries]
+        results = [[] for _ in queries]
+        block = max(1, SCORE_BLOCK_CELLS // self.size)
+        for start in range(0, len(processed), block):
+            # fuzz.ratio = round(100 * Indel 归一化相似度)；低于阈值的评分置0，不影响前10名的选取
+            similarity = cdist(processed[start:start + block], self.choices,
+                               scorer=Indel.normalized_similarity, dtype=np.float64,
+                               score_cutoff=(FUZZY_THRESHOLD - 1) / 100, workers=workers)
+            scores = np.rint(similarity * 100).astype(np.int64)
+            if bounds is not None:
+                # 价格区间外的候选置0
+                lower = bounds[0][start:start + block, None]
+                upper = bounds[1][start:start + block, None]
+                allowed = ((self.price_values >= lower) & (self.price_values <= upper)) | np.isinf(lower)
+                scores[~allowed] = 0
+
+            # 按 (查询, 匹配度降序, 候选顺序) 排序，与 process.extract 中 heapq.nlargest 的并列规则一致
+            query_pos, choice_pos = np.nonzero(scores >= FUZZY_THRESHOLD)
+            matched = scores[query_pos, choice_pos]
+            order = np.lexsort((choice_pos, -matched, query_pos))
+            query_pos, choice_pos, matched = query_pos[order], choice_pos[order], matched[order]
+            rank = np.arange(len(query_pos)) - np.searchsorted(query_pos, query_pos)
+            keep = rank < FUZZY_LIMIT
+
+            for query, choice, score in zip(query_pos[keep], choice_pos[keep], matched[keep]):
+                results[start + query].append((self.clean_names[choice], int(score)))
+        return results
+
+    def contains_rows(self, cleaned: str) -> np.ndarray:
+        """清理名称包含指定名称（按字面子串，不作为正则表达式）的行位置，按行顺序排列"""
+        return self.contains_rows_batch([cleaned])[0]
+
+    def contains_rows_batch(self, queries: List[str]) -> List[np.ndarray]:
+        """
+        批量包含匹配：在后缀数组上二分查找每个查询串的前缀区间
+
+        Args:
+            queries: 清理后的名称列表
+
+        Returns:
+            List[np.ndarray]: 每个名称对应的行位置数组（按行顺序排列）
+        """
+        if not queries:
+            return []
+        if len(self._suffixes) == 0:
+            return [np.empty(0, dtype=np.int64) for _ in queries]
+
+        lower = np.array(queries, dtype=str)
+        upper = np.char.add(lower, PREFIX_SENTINEL)
+        starts = np.searchsorted(self._suffixes, lower, side='left')
+        ends = np.searchsorted(self._suffixes, upper, side='left')
+
+        # 空查询与 str.contains 一样匹配所有名称
+        return [np.unique(self._suffix_rows[start:end]) if query else np.arange(self.size)
+                for query, start, end in zip(queries, starts, ends)]
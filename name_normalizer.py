@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+股票名称标准化
+股票列表、上传文件和本地数据源共用同一套清理规则：
+1. NFKC 归一化，全角字母数字转为半角（'万科Ａ' -> '万科A'）
+2. 去除所有空白字符，交易所名称中用于补齐宽度的空格不影响匹配（'万  科Ａ' -> '万科A'）
+3. 去除开头的 ST、*ST 标记和结尾的 A、B 股后缀
+
+clean_name_series 对整列一次性清理，结果应作为'清理名称'列保存下来，不要在每次查询时重复计算
+"""
+
+import re
+import unicodedata
+
+import pandas as pd
+
+# 预编译的清理规则，逐个名称和整列清理使用同一组正则
+WHITESPACE_PATTERN = re.compile(r'\s+')
+ST_PREFIX_PATTERN = re.compile(r'^\*?ST')
+SHARE_CLASS_SUFFIX_PATTERN = re.compile(r'[AB]$')
+
+
+def clean_stock_name(name) -> str:
+    """
+    清理单个股票名称
+
+    Args:
+        name: 股票名称，空值返回空字符串
+
+    Returns:
+        str: 清理后的名称
+    """
+    if pd.isna(name):
+        return ""
+    cleaned = unicodedata.normalize('NFKC', str(name))
+    cleaned = WHITESPACE_PATTERN.sub('', cleaned)
+    cleaned = ST_PREFIX_PATTERN.sub('', cleaned)
+    return SHARE_CLASS_SUFFIX_PATTERN.sub('', cleaned)
+
+
+def clean_name_series(names: pd.Series) -> pd.Series:
+    """
+    整列清理股票名称，结果与逐个调用 clean_stock_name 一致
+
+    Args:
+        names: 股票名称列，空值清理为空字符串
+
+    Returns:
+        pd.Series: 清理后的名称（索引与输入相同）
+    """
+    cleaned = names.astype(object).where(names.notna(), '').astype(str)
+    return (cleaned.str.normalize('NFKC')
+            .str.replace(WHITESPACE_PATTERN, '', regex=True)
+            .str.replace(ST_PREFIX_PATTERN, '', regex=True)
+            .str.replace(SHARE_CLASS_SUFFIX_PATTERN, '', regex=True))
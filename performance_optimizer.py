@@ -2,288 +2,388 @@
 # -*- coding: utf-8 -*-
 """
 股票匹配性能优化器
-提供批量处理、缓存、并行处理等优化功能
+代码补全按批调用 match_stock_codes_bulk 并在线程池中并发处理；名称匹配去重后按块分发到进程池
 """
 
 import os
-import sys
 import time
 import logging
 import pandas as pd
 import numpy as np
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import Dict, Tuple
 import threading
-from functools import lru_cache
+import multiprocessing
+
+from match_cache import get_match_cache
+from config_manager import get_section
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 名称匹配时每个工作进程单元的行数
+DEFAULT_CHUNK_SIZE = 2000
+
+# 代码补全的批大小（每次批量关联的行数）和并发数（同时处理的批次数）的默认值及调整范围，
+# 可通过 ConfigManager 的 system_settings.optimizer 配置
+DEFAULT_SETTINGS = {
+    'batch_size': 2000,
+    'min_batch_size': 500,
+    'max_batch_size': 50000,
+    'workers': 2,
+    'min_workers': 1,
+    'max_workers': 8,
+    'target_batch_seconds': 1.0,  # 每轮的目标耗时，用于调整批大小
+    'max_error_rate': 0.1,  # 每轮失败比例超过该值时并发减半
+}
+
+
+def load_optimizer_settings() -> Dict:
+    """读取 system_settings.optimizer 配置，未配置的项使用默认值"""
+    return dict(DEFAULT_SETTINGS, **get_section('system_settings', 'optimizer'))
+
+
+class BatchTuner:
+    """
+    根据每轮（同时处理并发数个批次）的吞吐量和错误率调整批大小和并发数
+
+    - 并发数：没有错误时每轮加1；吞吐量比加并发前下降10%以上时撤销，并暂停增加3轮；
+      错误率超过阈值时减半
+    - 批大小：每轮耗时低于目标的一半时翻倍，超过目标的两倍时减半
+    """
+
+    HOLD_ROUNDS = 3
+
+    def __init__(self, settings: Dict = None):
+        settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.min_batch_size = max(1, int(settings['min_batch_size']))
+        self.max_batch_size = max(self.min_batch_size, int(settings['max_batch_size']))
+        self.min_workers = max(1, int(settings['min_workers']))
+        self.max_workers = max(self.min_workers, int(settings['max_workers']))
+        self.batch_size = min(max(int(settings['batch_size']), self.min_batch_size), self.max_batch_size)
+        self.workers = min(max(int(settings['workers']), self.min_workers), self.max_workers)
+        self.target_batch_seconds = float(settings['target_batch_seconds'])
+        self.max_error_rate = float(settings['max_error_rate'])
+        self.history = []
+        self._baseline = None  # 上次增加并发前的吞吐量
+        self._hold = 0
+
+    def record(self, rows: int, seconds: float, errors: int = 0) -> Dict:
+        """
+        记录一轮的结果并调整下一轮的参数
+
+        Returns:
+            Dict: 本次调整（吞吐量、错误率、调整前后的参数和原因）
+        """
+        throughput = rows / seconds if seconds > 0 else float('inf')
+        error_rate = errors / rows if rows else 0.0
+        workers, batch_size = self.workers, self.batch_size
+        reasons = []
+
+        if error_rate > self.max_error_rate:
+            workers = max(self.min_workers, self.workers // 2)
+            reasons.append(f"错误率 {error_rate:.0%} 超过 {self.max_error_rate:.0%}，并发减半")
+            self._baseline = None
+        elif self._baseline is not None and throughput < self._baseline * 0.9:
+            workers = max(self.min_workers, self.workers - 1)
+            reasons.append(f"吞吐量 {throughput:.1f} 行/秒 低于增加并发前的 {self._baseline:.1f}，撤销增加")
+            self._baseline = None
+            self._hold = self.HOLD_ROUNDS
+        elif self._hold > 0:
+            self._hold -= 1
+            self._baseline = None
+        elif self.workers < self.max_workers:
+            workers = self.workers + 1
+            reasons.append(f"吞吐量 {throughput:.1f} 行/秒，错误率 {error_rate:.0%}，增加并发")
+            self._baseline = throughput
+
+        # 只有批次完整的一轮才能说明批大小是否合适
+        if rows >= self.batch_size and seconds < self.target_batch_seconds / 2 and self.batch_size < self.max_batch_size:
+            batch_size = min(self.max_batch_size, self.batch_size * 2)
+            reasons.append(f"每轮耗时 {seconds:.2f} 秒低于目标 {self.target_batch_seconds:.1f} 秒，增大批大小")
+        elif seconds > self.target_batch_seconds * 2 and self.batch_size > self.min_batch_size:
+            batch_size = max(self.min_batch_size, self.batch_size // 2)
+            reasons.append(f"每轮耗时 {seconds:.2f} 秒超过目标 {self.target_batch_seconds:.1f} 秒，减小批大小")
+
+        decision = {
+            'rows': rows, 'seconds': seconds, 'throughput': throughput, 'error_rate': error_rate,
+            'workers': (self.workers, workers), 'batch_size': (self.batch_size, batch_size),
+            'reason': '；'.join(reasons),
+        }
+        self.history.append(decision)
+        if workers != self.workers or batch_size != self.batch_size:
+            logger.info(f"🎛️ 调整参数: 并发 {self.workers} -> {workers}, 批大小 {self.batch_size} -> {batch_size}"
+                        f"（{decision['reason']}）")
+        self.workers, self.batch_size = workers, batch_size
+        return decision
+
+
+
+# 工作进程中的匹配器，由进程池的初始化函数在每个工作进程中设置
+_worker_matcher = None
+
+
+def _init_worker(matcher, stock_list=None, api_source=None, price_band=None):
+    """
+    工作进程初始化
+
+    Args:
+        matcher: fork 时传入父进程的匹配器（股票列表和索引写时复制共享，不经过序列化），
+                 不支持 fork 的平台为None，由传入的股票列表重建
+    """
+    global _worker_matcher
+    if matcher is None:
+        from stock_name_matcher import StockNameMatcher
+        matcher = StockNameMatcher(api_source=api_source, price_band=price_band, stock_list=stock_list)
+    # 每个进程只用一个评分线程，避免进程数 × 线程数超过CPU核心数
+    matcher.fuzzy_workers = 1
+    _worker_matcher = matcher
+
+
+def _match_name_chunk(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    """工作进程：批量匹配一块股票名称"""
+    return _worker_matcher.match_stock_names_batch(chunk_df)
+
+
 class PerformanceOptimizer:
     """性能优化器"""
     
-    def __init__(self, stock_matcher):
+    def __init__(self, stock_matcher, max_workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 settings: Dict = None):
+        """
+        Args:
+            stock_matcher: 股票匹配器
+            max_workers: 名称匹配的进程数，默认为CPU核心数；1表示在当前进程内批量匹配
+            chunk_size: 名称匹配时每个工作单元的行数
+            settings: 代码补全的批大小和并发数配置，默认读取 system_settings.optimizer
+        """
         self.matcher = stock_matcher
-        self.cache = {}
-        self.cache_lock = threading.Lock()
-        self.batch_size = 100
-        self.max_workers = 4
-        
-    def optimize_stock_matching(self, input_df: pd.DataFrame, enable_cross_validation: bool = False) -> List[Dict]:
+        # 使用进程内共享的匹配结果缓存，处理不同文件时同样可以命中
+        self.cache = getattr(stock_matcher, 'match_cache', None) or get_match_cache()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.tuner = BatchTuner(load_optimizer_settings() if settings is None else settings)
+        # 线程池在优化器的整个生命周期内复用，实际并发数由 tuner 控制
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def optimize_stock_matching(self, input_df: pd.DataFrame, enable_cross_validation: bool = False) -> pd.DataFrame:
         """
-        优化的股票匹配处理
-        
+        代码补全：相同的 (代码, 参考价格) 只匹配一次，按批调用 match_stock_codes_bulk，
+        多个批次在线程池中并发处理，结果按原始行顺序展开
+
         Args:
-            input_df: 输入数据框
+            input_df: 包含'股票代码'和'参考价格'列的数据框（read_excel_file 的输出）
             enable_cross_validation: 是否启用交叉验证
-            
+
         Returns:
-            List[Dict]: 匹配结果列表
+            pd.DataFrame: 代码补全结果，与 match_stock_codes_bulk 一致
         """
         logger.info(f"🚀 开始优化处理 {len(input_df)} 条记录...")
         start_time = time.time()
-        
-        # 1. 预处理和去重
-        processed_data = self._preprocess_data(input_df)
-        
-        # 2. 批量处理
-        if len(processed_data) > self.batch_size:
-            results = self._batch_process(processed_data, enable_cross_validation)
-        else:
-            results = self._parallel_process(processed_data, enable_cross_validation)
-        
-        # 3. 后处理
-        final_results = self._postprocess_results(results, input_df)
-        
-        end_time = time.time()
-        logger.info(f"✅ 优化处理完成，耗时: {end_time - start_time:.2f}秒")
-        logger.info(f"📊 平均每条记录耗时: {(end_time - start_time) / len(input_df):.3f}秒")
-        
-        return final_results
-    
-    def _preprocess_data(self, input_df: pd.DataFrame) -> List[Tuple[int, str, float]]:
-        """预处理数据，去重和标准化"""
-        logger.info("📋 预处理数据...")
-        
-        processed_data = []
-        seen_codes = set()
-        
-        for idx, row in input_df.iterrows():
-            code = str(row['股票代码']).strip()
-            price = row.get('参考价格', None)
-            
-            # 标准化代码
-            normalized_code = self.matcher._normalize_stock_code(code)
-            
-            # 去重处理
-            cache_key = (normalized_code, price)
-            if cache_key not in seen_codes:
-                seen_codes.add(cache_key)
-                processed_data.append((idx, normalized_code, price))
-            else:
-                # 如果是重复的，直接从缓存获取
-                processed_data.append((idx, normalized_code, price))
-        
-        logger.info(f"📊 预处理完成，去重后: {len(set(seen_codes))} 个唯一代码")
-        return processed_data
-    
-    def _parallel_process(self, data: List[Tuple[int, str, float]], enable_cross_validation: bool) -> List[Dict]:
-        """并行处理小批量数据"""
-        logger.info(f"⚡ 并行处理 {len(data)} 条记录...")
-        
-        results = [None] * len(data)
-        
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交任务
-            future_to_index = {}
-            for i, (idx, code, price) in enumerate(data):
-                future = executor.submit(self._process_single_with_cache, code, price, enable_cross_validation)
-                future_to_index[future] = (i, idx)
-            
-            # 收集结果
-            completed = 0
-            for future in as_completed(future_to_index):
-                result_idx, original_idx = future_to_index[future]
-                try:
-                    result = future.result()
-                    result['原始索引'] = original_idx
-                    results[result_idx] = result
-                    completed += 1
-                    
-                    if completed % 50 == 0:
-                        logger.info(f"📈 已完成: {completed}/{len(data)}")
-                        
-                except Exception as e:
-                    logger.error(f"处理失败: {e}")
-                    results[result_idx] = self._create_error_result(data[result_idx][1], data[result_idx][2], str(e))
-        
-        return [r for r in results if r is not None]
-    
-    def _batch_process(self, data: List[Tuple[int, str, float]], enable_cross_validation: bool) -> List[Dict]:
-        """批量处理大量数据"""
-        logger.info(f"📦 批量处理 {len(data)} 条记录...")
-        
-        all_results = []
-        total_batches = (len(data) + self.batch_size - 1) // self.batch_size
-        
-        for batch_idx in range(0, len(data), self.batch_size):
-            batch_data = data[batch_idx:batch_idx + self.batch_size]
-            batch_num = batch_idx // self.batch_size + 1
-            
-            logger.info(f"🔄 处理批次 {batch_num}/{total_batches} ({len(batch_data)} 条记录)")
-            
-            # 并行处理当前批次
-            batch_results = self._parallel_process(batch_data, enable_cross_validation)
-            all_results.extend(batch_results)
-            
-            # 批次间短暂休息，避免API限制
-            if batch_num < total_batches:
-                time.sleep(0.5)
-        
-        return all_results
-    
-    def _process_single_with_cache(self, code: str, price: float, enable_cross_validation: bool) -> Dict:
-        """带缓存的单个股票处理"""
-        cache_key = (code, price, enable_cross_validation)
-        
-        # 检查缓存
-        with self.cache_lock:
-            if cache_key in self.cache:
-                return self.cache[cache_key].copy()
-        
-        # 处理股票
+        if len(input_df) == 0:
+            return self.matcher.match_stock_codes_bulk(input_df, enable_cross_validation)
+
+        # 1. 去重：相同的 (代码, 参考价格) 只匹配一次
+        distinct, inverse = self._distinct_rows(input_df, '股票代码')
+        duplicates = len(input_df) - len(distinct)
+        logger.info(f"📊 去重后: {len(distinct)} 个唯一代码"
+                    f"（{duplicates} 行重复，{duplicates / len(input_df) * 100:.1f}%）")
+
+        # 2. 分批处理（只处理去重后的唯一键）
+        self._progress_total = len(distinct)
+        self._progress_done = 0
+        self._progress_start = time.time()
+        result_df = self._batch_process(distinct, enable_cross_validation)
+
+        # 3. 按原始行顺序展开结果
+        result_df = result_df.iloc[inverse].reset_index(drop=True)
+        logger.info(f"✅ 优化处理完成，耗时: {time.time() - start_time:.2f}秒")
+        return result_df
+
+    @staticmethod
+    def _distinct_rows(input_df: pd.DataFrame, column: str) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        按 (column, 参考价格) 去重
+
+        非字符串的值按类型区分，空值和空价格各自归为同一个键
+
+        Returns:
+            Tuple[pd.DataFrame, np.ndarray]: 每个键第一次出现的行，以及每个原始行对应的键编号
+        """
+        values = input_df[column].tolist()
+        prices = input_df['参考价格'].tolist() if '参考价格' in input_df.columns else [None] * len(input_df)
+        keys = pd.Series([
+            (None if pd.isna(value) else value if isinstance(value, str) else (type(value), value),
+             None if price is None or pd.isna(price) else price)
+            for value, price in zip(values, prices)
+        ], dtype=object)
+        inverse, _ = pd.factorize(keys)
+        first = np.full(inverse.max() + 1, -1, dtype=np.int64)
+        first[inverse[::-1]] = np.arange(len(inverse))[::-1]
+        return input_df.iloc[first], inverse
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """优化器持有的线程池（第一次使用时创建）"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.tuner.max_workers,
+                                                        thread_name_prefix='stock-matcher')
+        return self._executor
+
+    def shutdown(self):
+        """关闭线程池"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def _batch_process(self, data: pd.DataFrame, enable_cross_validation: bool) -> pd.DataFrame:
+        """分批处理：每轮同时处理当前并发数个批次，每轮结束后根据吞吐量和错误率调整下一轮的批大小和并发数"""
+        results = []
+        position = 0
+        round_num = 0
+        while position < len(data):
+            workers, batch_size = self.tuner.workers, self.tuner.batch_size
+            end = min(len(data), position + workers * batch_size)
+            batches = [data.iloc[i:min(end, i + batch_size)] for i in range(position, end, batch_size)]
+            position = end
+            round_num += 1
+            rows = sum(len(batch) for batch in batches)
+            logger.info(f"🔄 处理第 {round_num} 轮 ({rows} 条记录, {len(batches)} 个批次, 并发 {workers})")
+
+            round_start = time.time()
+            round_results = list(self.executor.map(
+                lambda batch: self._match_code_batch(batch, enable_cross_validation), batches))
+            errors = sum(int((result['匹配状态'] == '处理失败').sum()) for result in round_results)
+            self.tuner.record(rows, time.time() - round_start, errors)
+            results.extend(round_results)
+            self._report_progress(rows)
+        return self._concat_results(results)
+
+    def _match_code_batch(self, batch: pd.DataFrame, enable_cross_validation: bool) -> pd.DataFrame:
+        """批量关联一批代码，失败时整批记为处理失败"""
         try:
-            result = self.matcher.match_stock_code(code, price, enable_cross_validation)
-            
-            # 缓存结果
-            with self.cache_lock:
-                self.cache[cache_key] = result.copy()
-            
-            return result
-            
+            return self.matcher.match_stock_codes_bulk(batch, enable_cross_validation)
         except Exception as e:
-            logger.error(f"处理股票 {code} 失败: {e}")
-            return self._create_error_result(code, price, str(e))
-    
-    def _create_error_result(self, code: str, price: float, error_msg: str) -> Dict:
+            logger.error(f"处理 {len(batch)} 条记录失败: {e}")
+            return self._create_error_result(batch, str(e))
+
+    def _create_error_result(self, batch: pd.DataFrame, error_msg: str) -> pd.DataFrame:
         """创建错误结果"""
-        return {
-            '原始代码': code,
-            '参考价格': price,
+        codes = batch['股票代码'].to_numpy(dtype=object)
+        prices = batch['参考价格'].to_numpy(dtype=object) if '参考价格' in batch.columns else [None] * len(batch)
+        return pd.DataFrame({
+            '原始代码': codes,
+            '参考价格': prices,
             '匹配状态': '处理失败',
-            '标准化代码': code,
+            '标准化代码': batch['股票代码'].astype(str).str.strip().to_numpy(dtype=object),
             '股票名称': '',
             '当前价格': '',
             '价格差异': '',
-            '匹配类型': f'错误: {error_msg}'
-        }
-    
-    def _postprocess_results(self, results: List[Dict], original_df: pd.DataFrame) -> List[Dict]:
-        """后处理结果，确保顺序正确"""
-        logger.info("🔧 后处理结果...")
-        
-        # 创建结果映射
-        result_map = {}
-        for result in results:
-            if '原始索引' in result:
-                result_map[result['原始索引']] = result
-                del result['原始索引']  # 移除临时字段
-        
-        # 按原始顺序重新排列
-        final_results = []
-        for idx in range(len(original_df)):
-            if idx in result_map:
-                final_results.append(result_map[idx])
-            else:
-                # 如果没有结果，创建默认结果
-                row = original_df.iloc[idx]
-                final_results.append(self._create_error_result(
-                    str(row['股票代码']), 
-                    row.get('参考价格', None), 
-                    '未处理'
-                ))
-        
-        return final_results
-    
-    def get_cache_stats(self) -> Dict:
-        """获取缓存统计信息"""
-        with self.cache_lock:
-            return {
-                'cache_size': len(self.cache),
-                'cache_hit_potential': len(self.cache) > 0
-            }
-    
-    def clear_cache(self):
-        """清空缓存"""
-        with self.cache_lock:
-            self.cache.clear()
-            logger.info("🗑️ 缓存已清空")
+            '匹配类型': f'错误: {error_msg}',
+        })
 
+    def _concat_results(self, results: list) -> pd.DataFrame:
+        """合并各批次的结果，列顺序与列最全的批次一致（没有匹配成功的批次缺少行情列）"""
+        columns = list(max((result.columns for result in results), key=len))
+        result_df = pd.concat(results, ignore_index=True)
+        return result_df[columns + [col for col in result_df.columns if col not in columns]]
 
-def apply_performance_optimization():
-    """应用性能优化到现有的股票匹配器"""
-    logger.info("🔧 应用性能优化...")
-    
-    # 这个函数将被用来修改现有的 stock_name_matcher.py
-    optimization_code = '''
-    # 性能优化代码将被注入到 StockNameMatcher 类中
-    def process_stock_codes_optimized(self, file_path: str, output_path: str = None,
-                                    code_column: str = None, price_column: str = None,
-                                    enable_cross_validation: bool = False) -> str:
+    def _report_progress(self, completed: int):
+        """按唯一键汇报进度和预计剩余时间"""
+        self._progress_done += completed
+        done, total = self._progress_done, self._progress_total
+        if done == total or done // 50 != (done - completed) // 50:
+            elapsed = time.time() - self._progress_start
+            eta = elapsed / done * (total - done) if done else 0.0
+            logger.info(f"📈 已完成: {done}/{total} 个唯一键，预计剩余 {eta:.1f}秒")
+
+    def _create_process_pool(self) -> ProcessPoolExecutor:
+        """创建进程池，匹配器通过初始化函数传给每个工作进程"""
+        if 'fork' in multiprocessing.get_all_start_methods():
+            # fork 的工作进程直接继承父进程内存中的股票列表和索引
+            context = multiprocessing.get_context('fork')
+            initargs = (self.matcher,)
+        else:
+            context = multiprocessing.get_context('spawn')
+            initargs = (None, self.matcher.stock_list, self.matcher.api_source,
+                        getattr(self.matcher, 'price_band', None))
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                   initializer=_init_worker, initargs=initargs)
+
+    def _run_chunks(self, function, chunks: list, *args) -> list:
+        """在进程池中按块执行，结果按块的顺序返回"""
+        results = [None] * len(chunks)
+        executor = self._create_process_pool()
+        try:
+            future_to_index = {executor.submit(function, chunk, *args): i for i, chunk in enumerate(chunks)}
+            for future in as_completed(future_to_index):
+                i = future_to_index[future]
+                results[i] = future.result()
+                self._report_progress(len(chunks[i]))
+        finally:
+            executor.shutdown()
+        return results
+
+    def optimize_name_matching(self, input_df: pd.DataFrame) -> pd.DataFrame:
         """
-        优化版本的股票代码处理
+        股票名称匹配：相同的 (名称, 参考价格) 只匹配一次，多进程时按块分发到工作进程
+        批量匹配，结果与 match_stock_names_batch 一致
+
+        Args:
+            input_df: 包含'原始名称'和'参考价格'列的数据框（read_excel_file 的输出）
+
+        Returns:
+            pd.DataFrame: 名称匹配结果
         """
-        from performance_optimizer import PerformanceOptimizer
-        
-        # 读取文件
-        input_df = self.read_excel_file(file_path, code_column=code_column, price_column=price_column)
-        
-        # 检查是否有股票代码列
-        if '股票代码' not in input_df.columns or input_df['股票代码'].isna().all():
-            raise ValueError("未找到有效的股票代码列，请检查文件格式或指定正确的列名")
-        
-        # 使用性能优化器
-        optimizer = PerformanceOptimizer(self)
-        results = optimizer.optimize_stock_matching(input_df, enable_cross_validation)
-        
-        # 保存结果
-        result_df = pd.DataFrame(results)
-        
-        # 确保股票代码相关列保持字符串格式，保留前导零
-        code_columns = ['标准化代码', '股票代码']
-        for col in code_columns:
-            if col in result_df.columns:
-                result_df[col] = result_df[col].astype(str)
-        
-        if output_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = f"stock_code_completion_{timestamp}.csv"
-        
-        # 保存CSV时指定数据类型，确保股票代码列保持字符串格式
-        result_df.to_csv(output_path, index=False, encoding='utf-8-sig')
-        
-        # 打印统计信息
-        total_count = len(result_df)
-        success_count = len(result_df[result_df['匹配状态'].str.contains('匹配成功', na=False)])
-        
-        logger.info(f"优化处理统计:")
-        logger.info(f"  总数: {total_count}")
-        logger.info(f"  成功补全: {success_count} ({success_count/total_count*100:.1f}%)")
-        logger.info(f"  缓存统计: {optimizer.get_cache_stats()}")
-        
-        return output_path
-    '''
+        if self.max_workers <= 1 or len(input_df) <= self.chunk_size:
+            return self.matcher.match_stock_names_batch(input_df)
+
+        logger.info(f"🚀 开始多进程名称匹配 {len(input_df)} 条记录...")
+        start_time = time.time()
+
+        distinct, inverse = self._distinct_rows(input_df, '原始名称')
+        distinct = distinct.reset_index(drop=True)
+
+        # 在创建进程前构建名称索引，fork 的工作进程直接共享
+        self.matcher.build_name_index()
+        chunks = [distinct.iloc[i:i + self.chunk_size] for i in range(0, len(distinct), self.chunk_size)]
+        self._progress_total = len(distinct)
+        self._progress_done = 0
+        self._progress_start = time.time()
+        logger.info(f"🧩 去重后 {len(distinct)} 个唯一名称: {self.max_workers} 个进程, {len(chunks)} 个工作单元")
+
+        results = self._run_chunks(_match_name_chunk, chunks)
+        result_df = pd.concat(results, ignore_index=True).iloc[inverse].reset_index(drop=True).infer_objects()
+        logger.info(f"✅ 多进程名称匹配完成，耗时: {time.time() - start_time:.2f}秒")
+        return result_df
+
+    def get_cache_stats(self) -> Dict:
+        """获取缓存统计信息（条目数、估算内存、命中/未命中/淘汰次数）"""
+        stats = self.cache.stats()
+        stats['cache_size'] = stats['entries']
+        return stats
     
-    return optimization_code
+    def clear_cache(self):
+        """清空缓存"""
+        self.cache.clear()
+        logger.info("🗑️ 缓存已清空")
 
 
 if __name__ == '__main__':
     print("🚀 股票匹配性能优化器")
     print("📋 主要优化功能:")
-    print("  - 并行处理")
-    print("  - 智能缓存")
-    print("  - 批量处理")
-    print("  - 去重优化")
-    print("  - 减少API调用延迟")
+    print("  - 代码补全分批并发")
+    print("  - 名称去重")
+    print("  - 多进程并行")
+    print("  - 共享匹配缓存")
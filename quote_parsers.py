@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+行情响应的列式解析
+新浪、腾讯、网易的分批行情响应一次扫描整个响应文本，每只股票的字段文本直接追加到对应的列，
+每列再一次性转换为数值数组；各批次的列按顺序拼接后只生成一次 DataFrame，不为每只股票创建字典。
+
+解析规则与逐行解析（StockDataAPI._parse_sina_data 等）一致：
+1. 代码去掉 sh/sz（网易为 0/1）前缀
+2. 新浪、腾讯的空字段记为0，字段数不足或数值无法解析的股票跳过
+3. 新浪、腾讯的涨跌额和涨跌幅由最新价和昨收计算，昨收不大于0时为0
+"""
+
+import re
+import json
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# 行情字段（代码和名称之外），各数据源不提供的字段为0
+QUOTE_COLUMNS = ['最新价', '涨跌幅', '涨跌额', '成交量', '成交额', '市盈率-动态', '市净率', '总市值', '流通市值']
+
+# 解析结果的列顺序
+QUOTE_FIELDS = ['代码', '名称'] + QUOTE_COLUMNS
+
+# 新浪: var hq_str_sh600000="浦发银行,10.00,9.99,10.01,...";
+_SINA_QUOTE = re.compile(r'hq_str_(?:sh|sz)?([^=\n]*)="([^"\n]*)"')
+
+# 腾讯: v_sh600000="1~浦发银行~600000~10.00~10.01~...";
+_TENCENT_QUOTE = re.compile(r'v_(?:sh|sz)?([^=\n]*)="([^"\n]*)"')
+
+# 网易: _ntes_quote_callback({...});
+_NETEASE_PREFIX = '_ntes_quote_callback('
+_NETEASE_SUFFIX = ');'
+
+
+def _to_float(values: List, empty: Optional[float] = 0.0) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    将一列字段转换为浮点数组
+
+    Args:
+        values: 字段值（文本或JSON数值）
+        empty: 空字段的取值，None表示空字段也视为无法解析
+
+    Returns:
+        Tuple: (浮点数组, 无法解析的位置)，全部可以解析时第二项为None
+    """
+    try:
+        # 绝大多数批次没有空字段和异常值，整列一次转换
+        return np.fromiter(map(float, values), dtype=float, count=len(values)), None
+    except (TypeError, ValueError):
+        pass
+    result = np.zeros(len(values))
+    bad = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        if empty is not None and value == '':
+            result[i] = empty
+            continue
+        try:
+            result[i] = float(value)
+        except (TypeError, ValueError):
+            bad[i] = True
+    return result, bad
+
+
+def _build_columns(codes: List[str], names: List[str], fields: dict, empty: Optional[float] = 0.0) -> Dict[str, list]:
+    """
+    将字段文本列转换为一个批次的解析结果
+
+    Args:
+        codes: 代码列
+        names: 名称列
+        fields: 行情字段名 -> 字段值列，未提供的行情字段为0；
+                包含 '昨收' 时由最新价和昨收计算涨跌额和涨跌幅（%），昨收不大于0时均为0
+        empty: 空字段的取值，None表示含空字段的股票跳过
+
+    Returns:
+        Dict: QUOTE_FIELDS 中各列的值（代码和名称为列表，行情字段为浮点数组），任一字段无法解析的股票已跳过
+    """
+    columns = {}
+    keep = None
+    for col, values in fields.items():
+        columns[col], bad = _to_float(values, empty)
+        if bad is not None:
+            keep = ~bad if keep is None else keep & ~bad
+    if keep is not None and not keep.all():
+        codes = [code for code, ok in zip(codes, keep) if ok]
+        names = [name for name, ok in zip(names, keep) if ok]
+        columns = {col: values[keep] for col, values in columns.items()}
+
+    prev_close = columns.pop('昨收', None)
+    if prev_close is not None:
+        valid = prev_close > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = np.where(valid, columns['最新价'] - prev_close, 0.0)
+            columns['涨跌额'] = change
+            columns['涨跌幅'] = np.where(valid, change / prev_close * 100, 0.0)
+
+    data = {'代码': codes, '名称': names}
+    for col in QUOTE_COLUMNS:
+        data[col] = columns.get(col, np.zeros(len(codes)))
+    return data
+
+
+def parse_sina_columns(text: str) -> Dict[str, list]:
+    """
+    解析新浪财经一个批次的响应
+
+    字段: 0 名称, 2 昨收, 3 最新价, 8 成交量, 9 成交额
+
+    Returns:
+        Dict: 各列的值，顺序与响应中的顺序一致
+    """
+    codes, names, prev_close, price, volume, amount = [], [], [], [], [], []
+    for code, payload in _SINA_QUOTE.findall(text):
+        fields = payload.split(',')
+        count = len(fields)
+        if count < 6:
+            continue
+        codes.append(code)
+        names.append(fields[0])
+        prev_close.append(fields[2])
+        price.append(fields[3])
+        volume.append(fields[8] if count > 8 else '')
+        amount.append(fields[9] if count > 9 else '')
+
+    return _build_columns(codes, names, {'最新价': price, '昨收': prev_close, '成交量': volume, '成交额': amount})
+
+
+def parse_tencent_columns(text: str) -> Dict[str, list]:
+    """
+    解析腾讯财经一个批次的响应
+
+    字段: 1 名称, 3 最新价, 4 昨收, 6 成交量；成交额按 成交量 × 最新价 估算
+
+    Returns:
+        Dict: 各列的值，顺序与响应中的顺序一致
+    """
+    codes, names, price, prev_close, volume = [], [], [], [], []
+    for code, payload in _TENCENT_QUOTE.findall(text):
+        fields = payload.split('~')
+        if len(fields) < 10:
+            continue
+        codes.append(code)
+        names.append(fields[1])
+        price.append(fields[3])
+        prev_close.append(fields[4])
+        volume.append(fields[6])
+
+    columns = _build_columns(codes, names, {'最新价': price, '昨收': prev_close, '成交量': volume})
+    price, volume = columns['最新价'], columns['成交量']
+    columns['成交额'] = np.where((volume > 0) & (price > 0), volume * price, 0.0)
+    return columns
+
+
+def parse_netease_columns(text: str) -> Dict[str, list]:
+    """
+    解析网易财经一个批次的响应（JSONP格式）
+
+    字段: name, price, percent, updown, volume, turnover；代码去掉 0/1 前缀，缺少的字段为0
+
+    Returns:
+        Dict: 各列的值，不是JSONP格式时为空列
+    """
+    if not (text.startswith(_NETEASE_PREFIX) and text.endswith(_NETEASE_SUFFIX)):
+        return _build_columns([], [], {})
+    data = json.loads(text[len(_NETEASE_PREFIX):-len(_NETEASE_SUFFIX)])
+
+    codes, names, price, percent, change, volume, turnover = [], [], [], [], [], [], []
+    for code_key, info in data.items():
+        if not info or not isinstance(info, dict):
+            continue
+        codes.append(code_key[1:] if code_key[:1] in ('0', '1') else code_key)
+        names.append(info.get('name', ''))
+        price.append(info.get('price', 0))
+        percent.append(info.get('percent', 0))
+        change.append(info.get('updown', 0))
+        volume.append(info.get('volume', 0))
+        turnover.append(info.get('turnover', 0))
+
+    # 网易的数值为JSON数值，空字段与逐只解析一致视为无法解析
+    return _build_columns(codes, names, {'最新价': price, '涨跌幅': percent, '涨跌额': change,
+                                         '成交量': volume, '成交额': turnover}, empty=None)
+
+
+def concat_quotes(batches: Iterable[Union[Dict[str, list], List[dict]]]) -> pd.DataFrame:
+    """
+    按顺序合并各批次的解析结果，只生成一次 DataFrame
+
+    Args:
+        batches: 各批次的列（parse_*_columns 的结果）或逐只解析的股票数据列表
+
+    Returns:
+        pd.DataFrame: 列为 QUOTE_FIELDS，没有数据时为只有列名的空表
+    """
+    merged = {col: [] for col in QUOTE_FIELDS}
+    for batch in batches:
+        if isinstance(batch, list):
+            batch = {col: [row[col] for row in batch] for col in QUOTE_FIELDS}
+        for col in QUOTE_FIELDS:
+            merged[col].append(batch[col])
+    data = {}
+    for col, parts in merged.items():
+        if col in QUOTE_COLUMNS:
+            data[col] = np.concatenate(parts).astype(float, copy=False) if parts else np.zeros(0)
+        else:
+            data[col] = list(chain.from_iterable(parts))
+    return pd.DataFrame(data, columns=QUOTE_FIELDS)
+
+
+def parse_sina_quotes(text: str) -> pd.DataFrame:
+    """解析新浪财经的响应，返回列为 QUOTE_FIELDS 的 DataFrame"""
+    return concat_quotes([parse_sina_columns(text)])
+
+
+def parse_tencent_quotes(text: str) -> pd.DataFrame:
+    """解析腾讯财经的响应，返回列为 QUOTE_FIELDS 的 DataFrame"""
+    return concat_quotes([parse_tencent_columns(text)])
+
+
+def parse_netease_quotes(text: str) -> pd.DataFrame:
+    """解析网易财经的响应（JSONP格式），返回列为 QUOTE_FIELDS 的 DataFrame"""
+    return concat_quotes([parse_netease_columns(text)])
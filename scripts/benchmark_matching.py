@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+股票匹配性能基准测试
+使用离线股票列表生成模拟券商导出数据，对比优化前后的处理速度（行/秒）
+
+用法（在项目根目录运行）:
+    python scripts/benchmark_matching.py
+    python scripts/benchmark_matching.py --rows 50000 --data data/all_stocks_20250620.csv
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from local_stock_data import LocalStockData
+from stock_name_matcher import StockNameMatcher
+from stock_codes import code_to_int
+
+DEFAULT_DATA_FILE = os.path.join('data', 'all_stocks_20250620.csv')
+
+
+def load_universe(data_file: str) -> pd.DataFrame:
+    """读取离线股票列表并转换为标准格式"""
+    data = pd.read_csv(data_file, encoding='utf-8-sig', dtype={'股票代码': str, 'code': str, '代码': str})
+    return LocalStockData(use_offline_data=False)._convert_to_standard_format(data)
+
+
+def build_matcher(universe: pd.DataFrame) -> StockNameMatcher:
+    """创建使用指定股票列表的匹配器"""
+    matcher = StockNameMatcher(api_source='local')
+    matcher.stock_list = universe
+    return matcher
+
+
+def make_input_codes(universe: pd.DataFrame, rows: int, seed: int = 42) -> list:
+    """生成模拟输入代码（包含重复代码和少量不存在的代码）"""
+    rng = np.random.default_rng(seed)
+    codes = universe['代码'].astype(str).to_numpy()
+    sample = rng.choice(codes, size=rows).tolist()
+    # 约5%的行替换为不存在的代码
+    for pos in rng.choice(rows, size=max(1, rows // 20), replace=False):
+        sample[pos] = '609999'
+    return sample
+
+
+def report(label: str, rows: int, seconds: float):
+    """打印单项结果"""
+    rate = rows / seconds if seconds > 0 else float('inf')
+    print(f"  {label:<28} {rows:>8} 行  {seconds:>8.3f} 秒  {rate:>12,.0f} 行/秒")
+    return rate
+
+
+def bench_code_lookup(matcher: StockNameMatcher, codes: list):
+    """代码查找：全表布尔扫描 vs 索引查找"""
+    print("\n📊 代码查找 (match_stock_code 中的存在性检查)")
+    stock_list = matcher.stock_list
+
+    start = time.perf_counter()
+    for code in codes:
+        matched = stock_list[stock_list['代码'] == code]
+        if len(matched) > 0:
+            matched.iloc[0]
+    before = report('全表扫描 (优化前)', len(codes), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for code in codes:
+        matcher._index.lookup_code(code)
+    after = report('索引查找 (优化后)', len(codes), time.perf_counter() - start)
+    print(f"  加速比: {after / before:,.0f}x")
+
+    values = np.array([code_to_int(code) for code in codes])
+    start = time.perf_counter()
+    matcher._index.lookup_codes(values)
+    report('代码表批量查找 (向量化)', len(codes), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for code in codes:
+        matcher.match_stock_code(code)
+    report('match_stock_code 全流程', len(codes), time.perf_counter() - start)
+
+
+def bench_bulk_completion(matcher: StockNameMatcher, codes: list):
+    """代码补全：逐行匹配 vs 批量关联"""
+    print("\n📊 代码补全 (process_stock_codes 不启用交叉验证)")
+    input_df = pd.DataFrame({'股票代码': codes, '参考价格': 10.0})
+
+    start = time.perf_counter()
+    rows = [matcher.match_stock_code(code, reference_price=price)
+            for code, price in zip(input_df['股票代码'], input_df['参考价格'])]
+    pd.DataFrame(rows)
+    before = report('逐行匹配 (优化前)', len(codes), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    matcher.match_stock_codes_bulk(input_df)
+    after = report('批量关联 (优化后)', len(codes), time.perf_counter() - start)
+    print(f"  加速比: {after / before:,.0f}x")
+
+
+def bench_name_matching(matcher: StockNameMatcher, codes: list):
+    """名称匹配：逐行匹配 vs 批量匹配（输入为代码对应的名称，约30%带有错别字）"""
+    print("\n📊 名称匹配 (process_excel_file 名称模式)")
+    rng = np.random.default_rng(7)
+    name_by_code = dict(zip(matcher.stock_list['代码'].astype(str), matcher.stock_list['名称']))
+    names = []
+    for code in codes:
+        name = name_by_code.get(code, '未知股份')
+        if rng.random() < 0.3:
+            name = name[:-1] + '股'
+        names.append(name)
+    input_df = pd.DataFrame({'原始名称': names, '参考价格': None})
+
+    # 逐行匹配较慢，只取前200行估算速度
+    sample = input_df.head(200)
+    start = time.perf_counter()
+    for name in sample['原始名称']:
+        try:
+            matcher.match_stock_name(name, use_price=False)
+        except Exception:
+            pass
+    before = report('逐行 match_stock_name (200行)', len(sample), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    matcher.match_stock_names_batch(input_df)
+    after = report('批量匹配 (优化后)', len(input_df), time.perf_counter() - start)
+    print(f"  加速比: {after / before:,.0f}x")
+
+
+def bench_name_query(matcher: StockNameMatcher, codes: list):
+    """单个名称模糊查询：全量 process.extract vs 倒排索引（报告p50/p99延迟）"""
+    print("\n📊 单个名称模糊查询 (match_stock_name 模糊匹配阶段)")
+    from fuzzywuzzy import fuzz, process
+
+    index = matcher.name_index
+    choices = index.clean_names.tolist()
+    name_by_code = dict(zip(matcher.stock_list['代码'].astype(str), matcher.stock_list['名称']))
+    queries = [matcher._clean_stock_name(name_by_code.get(code, '未知股份')[:-1] + '股') for code in codes[:1000]]
+
+    def latencies(func, sample):
+        result = []
+        for query in sample:
+            start = time.perf_counter()
+            func(query)
+            result.append(time.perf_counter() - start)
+        return np.array(result) * 1000
+
+    before = latencies(lambda q: process.extract(q, choices, limit=10, scorer=fuzz.ratio), queries[:50])
+    after = latencies(index.fuzzy_search, queries)
+    print(f"  {'全量评分 (优化前)':<28} p50 {np.percentile(before, 50):8.3f} 毫秒  p99 {np.percentile(before, 99):8.3f} 毫秒")
+    print(f"  {'倒排索引 (优化后)':<28} p50 {np.percentile(after, 50):8.3f} 毫秒  p99 {np.percentile(after, 99):8.3f} 毫秒")
+
+
+def bench_process_pool(matcher: StockNameMatcher, codes: list):
+    """名称匹配：单进程批量匹配 vs 进程池按块分发（约30%带有错别字）"""
+    from performance_optimizer import PerformanceOptimizer
+
+    print(f"\n📊 多进程名称匹配 (CPU核心数: {os.cpu_count()})")
+    rng = np.random.default_rng(11)
+    name_by_code = dict(zip(matcher.stock_list['代码'].astype(str), matcher.stock_list['名称']))
+    names = [name_by_code.get(code, '未知股份') for code in codes]
+    names = [name[:-1] + '股' if rng.random() < 0.3 else name for name in names]
+    input_df = pd.DataFrame({'原始名称': names, '参考价格': rng.uniform(1, 50, len(names)).round(2)})
+
+    start = time.perf_counter()
+    matcher.match_stock_names_batch(input_df)
+    before = report('单进程批量匹配', len(input_df), time.perf_counter() - start)
+
+    for workers in sorted({2, os.cpu_count() or 1}):
+        optimizer = PerformanceOptimizer(matcher, max_workers=workers, chunk_size=2000)
+        start = time.perf_counter()
+        optimizer.optimize_name_matching(input_df)
+        after = report(f'进程池 ({workers} 个进程)', len(input_df), time.perf_counter() - start)
+        print(f"  加速比: {after / before:.2f}x")
+
+
+def render_quote_batches(universe: pd.DataFrame) -> dict:
+    """按新浪、腾讯、网易的响应格式和每批数量生成全市场行情响应"""
+    from stock_name_matcher import exchange_prefix
+
+    rng = np.random.default_rng(5)
+    rows = []
+    for code, name in zip(universe['代码'].astype(str), universe['名称']):
+        prev, price = rng.uniform(2, 200, 2).round(2)
+        rows.append((exchange_prefix(code), code, name, prev, price, int(rng.integers(1, 10**8))))
+
+    def batches(size, render):
+        return [render(rows[i:i + size]) for i in range(0, len(rows), size)]
+
+    return {
+        'sina': batches(800, lambda batch: '\n'.join(
+            f'var hq_str_{ex}{code}="{name},{prev},{prev},{price},{price},{prev},{price},{price},{vol},'
+            f'{vol * price:.2f},100,{price},200,{price},2025-06-20,15:00:00,00";'
+            for ex, code, name, prev, price, vol in batch)),
+        'tencent': batches(100, lambda batch: '\n'.join(
+            f'v_{ex}{code}="1~{name}~{code}~{price}~{prev}~{prev}~{vol}~500~500~{price}~10~{price}~20~";'
+            for ex, code, name, prev, price, vol in batch)),
+        'netease': batches(200, lambda batch: '_ntes_quote_callback({});'.format(json.dumps({
+            f"{'0' if ex == 'sh' else '1'}{code}": {'name': name, 'price': price, 'percent': 0.01,
+                                                    'updown': price - prev, 'volume': vol,
+                                                    'turnover': vol * price}
+            for ex, code, name, prev, price, vol in batch}, ensure_ascii=False))),
+    }
+
+
+def bench_quote_parsing(matcher: StockNameMatcher, codes: list):
+    """行情解析：逐行解析为字典再生成 DataFrame vs 列式解析"""
+    from stock_name_matcher import StockDataAPI
+    from quote_parsers import concat_quotes
+
+    print("\n📊 全市场行情解析 (新浪/腾讯/网易各批次响应)")
+    api = StockDataAPI('local')
+
+    def row_parse(source, text):
+        if source == 'netease':
+            data = json.loads(text[21:-2])
+            return [api._parse_netease_data(key, info) for key, info in data.items()]
+        parse_line = api._parse_sina_data if source == 'sina' else api._parse_tencent_data
+        return [parse_line(line) for line in text.split('\n')]
+
+    parsers = {'sina': api._parse_sina_response, 'tencent': api._parse_tencent_response,
+               'netease': api._parse_netease_response}
+    for source, texts in render_quote_batches(matcher.stock_list).items():
+        start = time.perf_counter()
+        pd.DataFrame([row for text in texts for row in row_parse(source, text) if row])
+        before = report(f'{source} 逐行解析 (优化前)', len(matcher.stock_list), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        concat_quotes(parsers[source](text) for text in texts)
+        after = report(f'{source} 列式解析 (优化后)', len(matcher.stock_list), time.perf_counter() - start)
+        print(f"  加速比: {after / before:.2f}x")
+
+
+BENCHMARKS = {
+    'code_lookup': bench_code_lookup,
+    'bulk_completion': bench_bulk_completion,
+    'name_matching': bench_name_matching,
+    'name_query': bench_name_query,
+    'process_pool': bench_process_pool,
+    'quote_parsing': bench_quote_parsing,
+}
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='股票匹配性能基准测试')
+    parser.add_argument('--data', default=DEFAULT_DATA_FILE, help='离线股票列表文件')
+    parser.add_argument('--rows', type=int, default=50000, help='模拟输入行数')
+    parser.add_argument('--only', choices=sorted(BENCHMARKS), action='append', help='只运行指定的基准测试')
+    args = parser.parse_args()
+
+    # 基准测试只关心耗时，屏蔽逐行日志
+    logging.disable(logging.WARNING)
+
+    universe = load_universe(args.data)
+    matcher = build_matcher(universe)
+    codes = make_input_codes(universe, args.rows)
+
+    print(f"🚀 股票列表: {args.data} ({len(universe)} 只股票), 模拟输入: {args.rows} 行")
+    for name in args.only or list(BENCHMARKS):
+        BENCHMARKS[name](matcher, codes)
+
+
+if __name__ == '__main__':
+    main()
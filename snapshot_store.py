@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据源股票列表磁盘快照
+网络数据源加载的全市场股票列表保存到磁盘（安装了可选依赖 pyarrow 时为 Feather 列式文件，否则为 pickle），
+文件修改时间即快照时间。之后创建的匹配器（包括Web应用每次请求新建的匹配器）在有效期内
+直接从磁盘读取，不再重新下载；超过有效期但仍存在的快照立即返回，同时在后台重新下载并更新快照。
+
+加载失败后回退到本地数据得到的列表、只包含部分股票的列表不保存为该数据源的快照。
+
+有效期读取 ConfigManager 的 data_sources 配置（秒），cache_duration 为默认有效期，
+snapshot_cache.ttl 可按数据源单独设置（0表示不过期），例如：
+    "cache_duration": 3600,
+    "snapshot_cache": {"enabled": true, "directory": "cache", "ttl": {"xueqiu": 600}}
+"""
+
+import os
+import time
+import logging
+import threading
+import importlib.util
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from config_manager import get_section, shared_instance
+
+logger = logging.getLogger(__name__)
+
+# 默认有效期（秒），与 data_sources.cache_duration 的默认值一致
+DEFAULT_TTL = 3600
+
+# 项目目录，配置中的相对目录以此为准
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 默认的快照目录（项目目录下的 cache）
+DEFAULT_DIRECTORY = os.path.join(PROJECT_DIR, 'cache')
+
+# 安装了 pyarrow 时使用 Feather（只查找，不在导入本模块时导入 pyarrow）
+DEFAULT_FORMAT = 'feather' if importlib.util.find_spec('pyarrow') is not None else 'pickle'
+
+FILE_SUFFIXES = {'feather': '.feather', 'pickle': '.pkl'}
+
+
+class SnapshotStore:
+    """按数据源在磁盘上保存股票列表快照，过期的快照先返回再在后台刷新"""
+
+    def __init__(self, directory: str = None, ttl: float = DEFAULT_TTL, ttls: Optional[Dict[str, float]] = None,
+                 file_format: str = None, config_loader: Optional[Callable[[], Dict[str, Any]]] = None):
+        """
+        Args:
+            directory: 快照目录，None表示项目目录下的 cache
+            ttl: 默认有效期（秒），0表示不过期
+            ttls: 各数据源的有效期（秒），未列出的使用 ttl
+            file_format: 'feather' 或 'pickle'，None表示按是否安装 pyarrow 选择
+            config_loader: 返回数据源配置的函数，在第一次使用时才调用
+        """
+        self.directory = directory or DEFAULT_DIRECTORY
+        self.ttl = max(0.0, float(ttl))
+        self.ttls = {source: max(0.0, float(value)) for source, value in (ttls or {}).items()}
+        self.file_format = file_format or DEFAULT_FORMAT
+        if self.file_format not in FILE_SUFFIXES:
+            raise ValueError(f"不支持的快照格式: {self.file_format}")
+        if file_format is None and self.file_format == 'pickle':
+            logger.info("未安装 pyarrow，股票列表快照使用 pickle 格式保存（pip install pyarrow 后使用 Feather 格式）")
+        self.enabled = True
+        self._config_loader = config_loader
+        self._refreshing: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _load_config(self):
+        """第一次使用时读取有效期和目录配置"""
+        if self._config_loader is None:
+            return
+        with self._lock:
+            loader, self._config_loader = self._config_loader, None
+        if loader is None:
+            return
+        settings = loader()
+        if 'cache_duration' in settings:
+            self.ttl = max(0.0, float(settings['cache_duration']))
+        snapshot_settings = settings.get('snapshot_cache', {})
+        self.enabled = bool(snapshot_settings.get('enabled', True))
+        if snapshot_settings.get('directory'):
+            self.directory = os.path.join(PROJECT_DIR, snapshot_settings['directory'])
+        for source, value in snapshot_settings.get('ttl', {}).items():
+            self.ttls[source] = max(0.0, float(value))
+
+    def ttl_for(self, source: str) -> float:
+        """数据源快照的有效期（秒）"""
+        return self.ttls.get(source, self.ttl)
+
+    def path(self, source: str) -> str:
+        """数据源快照文件的路径"""
+        return os.path.join(self.directory, f"universe_{source}{FILE_SUFFIXES[self.file_format]}")
+
+    def read(self, source: str) -> Optional[Tuple[pd.DataFrame, float]]:
+        """
+        读取数据源的快照
+
+        Returns:
+            Tuple: (股票列表, 快照已存在的秒数)，没有快照或读取失败时返回None
+        """
+        path = self.path(source)
+        try:
+            saved_at = os.path.getmtime(path)
+        except OSError:
+            return None
+        try:
+            if self.file_format == 'feather':
+                stock_list = pd.read_feather(path)
+            else:
+                stock_list = pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"读取 {source} 股票列表快照失败: {e}")
+            return None
+        return stock_list, max(0.0, time.time() - saved_at)
+
+    def write(self, source: str, stock_list: pd.DataFrame) -> bool:
+        """保存数据源的快照（先写临时文件再替换，读取方不会读到写了一半的文件）"""
+        path = self.path(source)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stock_list = stock_list.reset_index(drop=True)
+            if self.file_format == 'feather':
+                stock_list.to_feather(temp_path)
+            else:
+                stock_list.to_pickle(temp_path)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"保存 {source} 股票列表快照失败: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+        with self._lock:
+            self.writes += 1
+        logger.info(f"💾 {source} 股票列表快照已保存: {len(stock_list)} 只股票")
+        return True
+
+    def get(self, source: str, loader: Callable[[], Tuple[Optional[pd.DataFrame], bool]]) -> Optional[pd.DataFrame]:
+        """
+        获取数据源的股票列表：有效期内读取快照，过期时返回快照并在后台刷新，没有快照时调用 loader
+
+        Args:
+            source: 数据源名称
+            loader: 从数据源加载的函数，返回 (股票列表, 是否保存为快照)
+
+        Returns:
+            pd.DataFrame: 股票列表
+        """
+        self._load_config()
+        if not self.enabled:
+            return loader()[0]
+
+        start = time.perf_counter()
+        cached = self.read(source)
+        if cached is not None:
+            stock_list, age = cached
+            ttl = self.ttl_for(source)
+            if ttl == 0 or age < ttl:
+                with self._lock:
+                    self.hits += 1
+                logger.info(f"💾 {source} 使用磁盘快照: {len(stock_list)} 只股票, 快照时间 {age:.0f} 秒前, "
+                            f"读取耗时 {(time.perf_counter() - start) * 1000:.1f} 毫秒")
+                return stock_list
+            with self._lock:
+                self.stale += 1
+            logger.info(f"💾 {source} 磁盘快照已过期（{age:.0f} 秒前），先使用快照并在后台刷新")
+            self.refresh_in_background(source, loader)
+            return stock_list
+
+        with self._lock:
+            self.misses += 1
+        return self._load_and_save(source, loader)
+
+    def _load_and_save(self, source: str, loader: Callable[[], Tuple[Optional[pd.DataFrame], bool]]):
+        """从数据源加载，成功时保存快照"""
+        stock_list, cacheable = loader()
+        if cacheable and stock_list is not None and len(stock_list) > 0:
+            self.write(source, stock_list)
+        return stock_list
+
+    def refresh_in_background(self, source: str, loader: Callable[[], Tuple[Optional[pd.DataFrame], bool]]):
+        """在后台线程中重新加载并保存快照，同一数据源同时只有一个刷新"""
+        def refresh():
+            try:
+                self._load_and_save(source, loader)
+            except Exception as e:
+                logger.warning(f"后台刷新 {source} 股票列表失败: {e}")
+
+        with self._lock:
+            thread = self._refreshing.get(source)
+            if thread is not None and thread.is_alive():
+                return thread
+            thread = threading.Thread(target=refresh, name=f'{source}-snapshot-refresh', daemon=True)
+            self._refreshing[source] = thread
+        thread.start()
+        return thread
+
+    def wait(self, timeout: float = None):
+        """等待后台刷新完成"""
+        with self._lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def invalidate(self, source: str = None):
+        """删除某个数据源的快照文件，source 为None时全部删除"""
+        if not os.path.isdir(self.directory):
+            return
+        suffix = FILE_SUFFIXES[self.file_format]
+        for name in os.listdir(self.directory):
+            if name.startswith('universe_') and name.endswith(suffix):
+                if source is None or name == os.path.basename(self.path(source)):
+                    os.remove(os.path.join(self.directory, name))
+
+    def stats(self) -> Dict[str, Any]:
+        """快照统计信息"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'stale': self.stale,
+                'misses': self.misses,
+                'writes': self.writes,
+                'format': self.file_format,
+                'directory': self.directory,
+            }
+
+
+@shared_instance
+def get_snapshot_store() -> SnapshotStore:
+    """获取进程内共享的磁盘快照（第一次使用时读取 data_sources 配置）"""
+    return SnapshotStore(config_loader=lambda: get_section('data_sources'))
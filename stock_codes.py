@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A股股票代码工具
+股票代码标准化（自动补全前导零）和格式验证。A股代码是6位整数，
+因此格式验证和存在性检查都可以通过按整数值直接寻址的数组完成。
+"""
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# 6位代码的整数取值范围
+CODE_SPACE = 1_000_000
+
+# 有效的A股代码前缀
+# 沪市：600xxx, 601xxx, 603xxx, 605xxx
+# 科创板：688xxx
+# 深市：000xxx, 001xxx, 002xxx, 003xxx
+# 创业板：300xxx, 301xxx
+VALID_PREFIXES = [
+    '600', '601', '603', '605',  # 沪市
+    '688',                        # 科创板
+    '000', '001', '002', '003',   # 深市
+    '300', '301'                  # 创业板（包括新的301xxx）
+]
+
+# 前缀有效性表：下标为代码的前3位（即 int(code) // 1000）
+VALID_PREFIX_TABLE = np.zeros(1000, dtype=bool)
+VALID_PREFIX_TABLE[[int(prefix) for prefix in VALID_PREFIXES]] = True
+
+
+def _is_ascii_digits(code: str) -> bool:
+    """判断字符串是否只包含ASCII数字"""
+    return code.isascii() and code.isdigit()
+
+
+def normalize_stock_code(code) -> str:
+    """标准化股票代码格式，自动补全前导零"""
+    if not code or pd.isna(code):
+        return ""
+
+    code = str(code).strip()
+
+    # 处理被单引号包裹的数字（如 '000037' -> 000037）
+    if code.startswith("'"):
+        code = code[1:].strip()
+
+    # 处理被双引号包裹的数字（如 "000037" -> 000037）
+    if code.startswith('"'):
+        code = code[1:].strip()
+
+    # 只保留数字，但不移除前导零（常见的纯数字输入无需逐字符过滤）
+    # 全角等Unicode数字统一转换为ASCII数字
+    if not _is_ascii_digits(code):
+        code = ''.join(str(int(ch)) for ch in code if ch.isdecimal())
+
+    if not code:
+        return ""
+
+    # 根据长度和规则补全前导零
+    length = len(code)
+    if length == 6:
+        # 已经是6位，直接返回
+        return code
+    elif length == 3:
+        # 3位数字，首位为6是沪市，补全为600xxx；其他情况补全前导零
+        if code[0] == '6':
+            return '600' + code
+        return code.zfill(6)
+    elif length == 4:
+        # 4位数字，30开头为创业板（300xxx），68开头为科创板（688xxx）
+        first_two = code[:2]
+        if first_two == '30':
+            return '30' + code[2:].zfill(4)
+        elif first_two == '68':
+            return '68' + code[2:].zfill(4)
+        return code.zfill(6)
+    elif length == 5:
+        # 5位数字，补全一个前导零
+        return '0' + code
+    else:
+        # 其他长度，尝试补全到6位
+        return code.zfill(6)
+
+
+def code_to_int(code: str) -> int:
+    """将6位ASCII数字代码转换为整数，不是6位代码时返回-1"""
+    if len(code) == 6 and _is_ascii_digits(code):
+        return int(code)
+    return -1
+
+
+def is_valid_stock_code(code) -> bool:
+    """验证股票代码格式（先标准化，再通过前缀表判断）"""
+    if not code or pd.isna(code):
+        return False
+
+    value = code_to_int(normalize_stock_code(code))
+    return value >= 0 and bool(VALID_PREFIX_TABLE[value // 1000])
+
+
+def build_code_table(codes) -> np.ndarray:
+    """
+    构建直接寻址代码表
+
+    Args:
+        codes: 股票列表中的代码序列（按行顺序）
+
+    Returns:
+        np.ndarray: 长度为1,000,000的int32数组，下标为代码整数值，
+                    值为该代码在股票列表中的行位置，不存在时为-1
+    """
+    table = np.full(CODE_SPACE, -1, dtype=np.int32)
+    values = np.array([code_to_int(str(code)) for code in codes], dtype=np.int64)
+    rows = np.flatnonzero(values >= 0)
+    if len(rows) > 0:
+        # 重复代码保留第一次出现的行
+        unique_values, first = np.unique(values[rows], return_index=True)
+        table[unique_values] = rows[first]
+    return table
+
+
+def codes_to_int(codes: pd.Series) -> np.ndarray:
+    """将标准化代码序列转换为整数数组，不是6位代码的位置为-1"""
+    codes = pd.Series(codes, dtype=object)
+    six_digits = codes.str.fullmatch(r'[0-9]{6}').fillna(False).to_numpy(dtype=bool)
+    values = np.full(len(codes), -1, dtype=np.int64)
+    if six_digits.any():
+        values[six_digits] = codes[six_digits].astype(np.int64).to_numpy()
+    return values
+
+
+def normalize_code_series(codes: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+    """
+    批量标准化股票代码（结果与 normalize_stock_code 逐个处理一致）
+
+    Args:
+        codes: 原始股票代码序列
+
+    Returns:
+        Tuple[pd.Series, np.ndarray]: 标准化后的代码序列（与输入索引相同）和格式有效性掩码
+    """
+    codes = pd.Series(codes)
+    if codes.dtype == object and pd.api.types.infer_dtype(codes, skipna=True) not in ('string', 'empty'):
+        # 混合类型（如同时包含852和852.0）去重时会被视为同一个值，先逐个转换为文本
+        codes = codes.map(lambda code: '' if not code or pd.isna(code) else str(code))
+
+    # 相同的输入只处理一次，缺失值的位置为-1
+    positions, uniques = pd.factorize(codes.astype(object))
+    raw = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+
+    # 0、空字符串等假值与缺失值一样标准化为空字符串
+    falsy = raw.isin([0, '']).to_numpy(dtype=bool)
+
+    text = raw.astype(str).str.strip()
+    # 去除包裹代码的单引号、双引号
+    for quote in ("'", '"'):
+        quoted = text.str.startswith(quote)
+        text = text.where(~quoted, text.str[1:].str.strip())
+
+    # 只保留数字，全角等Unicode数字转换为ASCII数字
+    digits = text.str.replace(r'\D', '', regex=True)
+    non_ascii = digits.str.contains(r'[^0-9]')
+    if non_ascii.any():
+        digits[non_ascii] = digits[non_ascii].map(normalize_stock_code)
+
+    # 根据长度和规则补全前导零
+    length = digits.str.len()
+    first_two = digits.str[:2]
+    tail = digits.str[2:].str.zfill(4)
+    normalized = pd.Series(
+        np.select(
+            [
+                length == 6,
+                (length == 3) & (digits.str[:1] == '6'),
+                (length == 4) & (first_two == '30'),
+                (length == 4) & (first_two == '68'),
+                length == 5,
+            ],
+            [
+                digits,
+                '600' + digits,
+                '30' + tail,
+                '68' + tail,
+                '0' + digits,
+            ],
+            default=digits.str.zfill(6),
+        ),
+        dtype=object,
+    )
+    normalized[falsy | (length == 0).to_numpy()] = ''
+
+    # 格式验证：6位数字且前缀有效
+    values = codes_to_int(normalized)
+    valid_uniques = values >= 0
+    valid_uniques[valid_uniques] = VALID_PREFIX_TABLE[values[valid_uniques] // 1000]
+
+    # 映射回原始行（缺失值对应末尾追加的空代码）
+    normalized_all = np.append(normalized.to_numpy(dtype=object), '')[positions]
+    valid_all = np.append(valid_uniques, False)[positions]
+    return pd.Series(normalized_all, index=codes.index, dtype=object), valid_all
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+股票列表查找索引
+在加载股票列表时一次性构建，使按代码查找股票从全表扫描变为O(1)
+"""
+
+import logging
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from stock_codes import CODE_SPACE, build_code_table, code_to_int
+
+logger = logging.getLogger(__name__)
+
+# 代码补全结果中需要从股票列表读取的列
+INDEXED_COLUMNS = ['代码', '名称', '最新价', '涨跌幅', '涨跌额', '成交量', '成交额', '市盈率-动态', '市净率']
+
+
+class StockIndex:
+    """股票列表索引：代码 -> 行位置，并以数组形式保存名称、价格等列"""
+
+    def __init__(self, stock_list: pd.DataFrame):
+        """
+        构建索引
+
+        Args:
+            stock_list: 标准格式的股票列表（至少包含'代码'和'名称'列）
+        """
+        self.size = len(stock_list)
+
+        # 列数组，按行位置访问
+        self.columns: Dict[str, np.ndarray] = {}
+        for col in INDEXED_COLUMNS:
+            if col in stock_list.columns:
+                self.columns[col] = stock_list[col].to_numpy()
+
+        self.codes = stock_list['代码'].astype(str).to_numpy(dtype=object)
+        self.names = self.columns.get('名称', np.full(self.size, '', dtype=object))
+        if '最新价' in stock_list.columns:
+            self.prices = pd.to_numeric(stock_list['最新价'], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            self.prices = np.full(self.size, np.nan)
+
+        # 直接寻址代码表：代码整数值 -> 行位置（重复代码保留第一次出现的行，与 iloc[0] 的行为一致）
+        self.code_table = build_code_table(self.codes)
+
+        logger.debug(f"股票索引构建完成: {self.size} 行, {int((self.code_table >= 0).sum())} 个唯一代码")
+
+    def __len__(self) -> int:
+        return self.size
+
+    def lookup_code(self, code: str) -> int:
+        """根据标准化代码查找行位置，不存在时返回-1"""
+        value = code_to_int(code)
+        if value < 0:
+            return -1
+        return int(self.code_table[value])
+
+    def lookup_codes(self, values: np.ndarray) -> np.ndarray:
+        """
+        批量查找行位置
+
+        Args:
+            values: 代码整数值数组，无效代码用-1表示
+
+        Returns:
+            np.ndarray: 行位置数组，不存在的代码为-1
+        """
+        values = np.asarray(values, dtype=np.int64)
+        in_range = (values >= 0) & (values < CODE_SPACE)
+        rows = np.full(len(values), -1, dtype=np.int32)
+        rows[in_range] = self.code_table[values[in_range]]
+        return rows
+
+    def get_value(self, row: int, column: str, default=''):
+        """读取指定行的列值，列不存在时返回默认值"""
+        values = self.columns.get(column)
+        if values is None:
+            return default
+        return values[row]
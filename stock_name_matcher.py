@@ -8,26 +8,39 @@
 
 import os
 import sys
+import json
 import argparse
+import importlib.util
 import pandas as pd
 import numpy as np
 import logging
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 import time
-import re
-
-try:
-    import akshare as ak
-    from fuzzywuzzy import fuzz, process
-    import requests
-    import json
-    from local_stock_data import LocalStockData
-except ImportError as e:
-    print(f"缺少必要的依赖包: {e}")
-    print("请运行: pip install akshare fuzzywuzzy python-Levenshtein requests")
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 名称模糊匹配依赖 fuzzywuzzy（在第一次建立名称索引时才导入，这里只检查是否已安装）
+if importlib.util.find_spec('fuzzywuzzy') is None:
+    print("缺少必要的依赖包: fuzzywuzzy")
+    print("请运行: pip install fuzzywuzzy python-Levenshtein")
     sys.exit(1)
 
+from data_sources import registry as data_source_registry, register_data_source
+from local_stock_data import LocalStockData
+from stock_index import StockIndex
+from name_index import NameIndex, price_band_bounds
+from name_normalizer import clean_stock_name, clean_name_series
+from throttle_policy import get_throttle_policy, get_token_bucket
+from http_session import get_http_pool
+from quote_parsers import (QUOTE_COLUMNS, parse_sina_columns, parse_tencent_columns,
+                           parse_netease_columns, concat_quotes)
+from match_cache import get_match_cache, next_universe_version, price_bucket
+from universe_cache import get_universe_cache
+from snapshot_store import get_snapshot_store
+from hedged_loader import get_hedged_loader
+from stock_codes import (normalize_stock_code, is_valid_stock_code, code_to_int, codes_to_int,
+                         normalize_code_series, VALID_PREFIX_TABLE)
+
 # 配置日志
 # 确保日志目录存在
 log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
@@ -43,43 +56,107 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 沪市A股代码前缀（包括科创板），其余为深市
+SH_PREFIXES = ('600', '601', '603', '605', '688')
+
+
+def exchange_prefix(code: str) -> str:
+    """新浪、腾讯等行情接口使用的交易所前缀"""
+    return 'sh' if code.startswith(SH_PREFIXES) else 'sz'
+
+
+# 各数据源每次请求最多查询的股票数
+QUOTE_BATCH_SIZES = {
+    'sina': 800,
+    'tencent': 100,
+    'netease': 200,
+    'xueqiu': 100,
+}
+
+# 支持只查询指定股票行情的数据源（其余数据源只能加载全市场）
+DEMAND_QUOTE_SOURCES = tuple(QUOTE_BATCH_SIZES)
+
+# 默认使用按需行情的数据源（全市场加载过慢或受限）
+DEFAULT_DEMAND_SOURCES = ('xueqiu',)
+
+# 雪球批量行情接口每次查询的股票数
+XUEQIU_BATCH_SIZE = QUOTE_BATCH_SIZES['xueqiu']
+
+# 雪球批量接口不可用、逐只查询全市场时最多查询的股票数
+XUEQIU_SINGLE_LIMIT = 100
+
+XUEQIU_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Referer': 'https://xueqiu.com/',
+    'Accept': 'application/json, text/plain, */*'
+}
+
+# 交叉验证使用的数据源
+CROSS_VALIDATION_SOURCES = ['akshare', 'sina', 'tencent', 'eastmoney']
+
+
 class StockDataAPI:
     """股票数据API管理类，支持多个数据源"""
 
-    def __init__(self, api_source='akshare'):
+    def __init__(self, api_source='akshare', symbols: List[str] = None):
         """
         初始化API管理器
 
         Args:
-            api_source: API数据源 ('akshare', 'sina', 'tencent', 'eastmoney', 'local')
+            api_source: API数据源，取值见数据源注册表（akshare、sina、tencent、eastmoney、netease、xueqiu、local）
+            symbols: 只查询这些股票代码（按需模式，见 DEMAND_QUOTE_SOURCES），None表示查询全市场
         """
         self.api_source = api_source
+        self.symbols = list(symbols) if symbols is not None else None
         self.stock_list = None
+        # 按数据源限流，只作用于网络请求
+        self.throttle = get_throttle_policy()
+        # 按数据源复用HTTP连接，失败时按配置重试
+        self.http = get_http_pool()
+        # 全市场股票列表的磁盘快照，None表示每次都从数据源加载
+        self.snapshots = get_snapshot_store()
+        # 最近一次加载是否回退到了本地数据（回退得到的列表不保存为快照）
+        self.fallback_used = False
+        # 最近一次加载是否有批次失败或因取消没有请求（不完整的列表不保存为快照）
+        self.incomplete = False
+        # 对冲加载时由其他数据源胜出后设置，分批获取不再发送剩余的请求
+        self.cancel_event = None
 
     def load_stock_list(self):
-        """根据选择的API源加载股票列表"""
-        if self.api_source == 'akshare':
-            return self._load_from_akshare()
-        elif self.api_source == 'sina':
-            return self._load_from_sina()
-        elif self.api_source == 'tencent':
-            return self._load_from_tencent()
-        elif self.api_source == 'eastmoney':
-            return self._load_from_eastmoney()
-        elif self.api_source == 'netease':
-            return self._load_from_netease()
-        elif self.api_source == 'xueqiu':
-            return self._load_from_xueqiu()
-        elif self.api_source == 'local':
-            return self._load_from_local()
-        else:
-            logger.warning(f"不支持的API源: {self.api_source}，使用默认的akshare")
-            return self._load_from_akshare()
+        """
+        根据选择的API源加载股票列表（数据源的依赖包在第一次使用时导入）
 
+        全市场加载优先使用有效期内的磁盘快照，按需模式（指定 symbols）和本地数据源直接加载
+        """
+        source = data_source_registry.get(self.api_source)
+        if source is None:
+            logger.warning(f"不支持的API源: {self.api_source}，使用默认的akshare")
+            source = data_source_registry.get('akshare')
+        on_demand = self.symbols is not None and source.name in DEMAND_QUOTE_SOURCES
+        if self.snapshots is None or not source.snapshot or on_demand:
+            return source.load(self)
+        return self.snapshots.get(source.name, lambda: self._load_from_source(source))
+
+    def _load_from_source(self, source):
+        """不经过快照直接从数据源加载，返回 (股票列表, 是否可以保存为快照)"""
+        self.fallback_used = False
+        self.incomplete = False
+        stock_list = source.load(self)
+        return stock_list, not self.fallback_used and not self.incomplete
+
+    def _quote_codes(self) -> List[str]:
+        """要查询行情的股票代码：按需模式为指定的代码，否则为本地股票列表中的全部代码"""
+        if self.symbols is not None:
+            return self.symbols
+        return LocalStockData().get_stock_list()['代码'].tolist()
+
+    @register_data_source('akshare', requires=('akshare',), description='默认')
     def _load_from_akshare(self):
         """从AKShare加载股票数据"""
         try:
             logger.info("正在从AKShare加载A股股票列表...")
+            import akshare as ak
+            self.throttle.wait('akshare')
             stock_list = ak.stock_zh_a_spot_em()
             logger.info(f"AKShare成功加载 {len(stock_list)} 只股票信息")
             return stock_list
@@ -87,71 +164,27 @@ class StockDataAPI:
             logger.error(f"AKShare加载失败: {e}")
             raise
 
+    @register_data_source('sina', requires=('requests',), description='新浪')
     def _load_from_sina(self):
         """从新浪财经加载股票数据"""
         try:
             logger.info("正在从新浪财经加载A股股票列表...")
-            import requests
-            import time
-
-            # 新浪财经股票列表API
-            # 获取沪深A股列表
-            all_stocks = []
 
-            # 沪市A股代码范围
-            sh_prefixes = ['600', '601', '603', '605', '688']  # 包括科创板
-            # 深市A股代码范围
-            sz_prefixes = ['000', '001', '002', '003', '300', '301']  # 包括创业板
-
-            logger.info("正在获取股票代码列表...")
-
-            # 从本地数据获取股票代码列表作为基础
-            local_data = LocalStockData()
-            local_stock_list = local_data.get_stock_list()
-            stock_codes = local_stock_list['代码'].tolist()
+            # 从本地数据获取股票代码列表作为基础（按需模式只查询指定的股票）
+            stock_codes = self._quote_codes()
 
             logger.info(f"获取到 {len(stock_codes)} 个股票代码，开始从新浪获取实时数据...")
 
-            # 分批获取股票数据（新浪API一次最多获取约800只股票）
-            batch_size = 800
+            # 分批获取股票数据（新浪API一次最多获取约800只股票），各批次并发请求
+            batch_size = QUOTE_BATCH_SIZES['sina']
+            urls = []
             for i in range(0, len(stock_codes), batch_size):
-                batch_codes = stock_codes[i:i+batch_size]
+                sina_codes = [f"{exchange_prefix(code)}{code}" for code in stock_codes[i:i+batch_size]]
+                urls.append(f"http://hq.sinajs.cn/list={','.join(sina_codes)}")
 
-                # 构建新浪API请求URL
-                sina_codes = []
-                for code in batch_codes:
-                    if code.startswith(('600', '601', '603', '605', '688')):
-                        sina_codes.append(f"sh{code}")
-                    else:
-                        sina_codes.append(f"sz{code}")
-
-                url = f"http://hq.sinajs.cn/list={','.join(sina_codes)}"
+            df = self._fetch_batches('sina', urls, self._parse_sina_response, encoding='gbk')
 
-                try:
-                    response = requests.get(url, timeout=10)
-                    response.encoding = 'gbk'
-
-                    if response.status_code == 200:
-                        lines = response.text.strip().split('\n')
-                        for line in lines:
-                            if 'hq_str_' in line and '=""' not in line:
-                                # 解析新浪数据格式
-                                stock_data = self._parse_sina_data(line)
-                                if stock_data:
-                                    all_stocks.append(stock_data)
-
-                    # 避免请求过快
-                    time.sleep(0.1)
-
-                except Exception as e:
-                    logger.warning(f"获取批次 {i//batch_size + 1} 数据失败: {e}")
-                    continue
-
-                if (i // batch_size + 1) % 10 == 0:
-                    logger.info(f"已处理 {i + len(batch_codes)} / {len(stock_codes)} 只股票")
-
-            if all_stocks:
-                df = pd.DataFrame(all_stocks)
+            if len(df):
                 logger.info(f"新浪财经成功加载 {len(df)} 只股票信息")
                 return df
             else:
@@ -163,64 +196,27 @@ class StockDataAPI:
             logger.info("回退到本地数据源")
             return self._load_from_local()
 
+    @register_data_source('tencent', requires=('requests',), description='腾讯')
     def _load_from_tencent(self):
         """从腾讯财经加载股票数据"""
         try:
             logger.info("正在从腾讯财经加载A股股票列表...")
-            import requests
-            import json
-            import time
 
-            # 从本地数据获取股票代码列表作为基础
-            local_data = LocalStockData()
-            local_stock_list = local_data.get_stock_list()
-            stock_codes = local_stock_list['代码'].tolist()
+            # 从本地数据获取股票代码列表作为基础（按需模式只查询指定的股票）
+            stock_codes = self._quote_codes()
 
             logger.info(f"获取到 {len(stock_codes)} 个股票代码，开始从腾讯获取实时数据...")
 
-            all_stocks = []
-
-            # 分批获取股票数据（腾讯API一次最多获取约100只股票）
-            batch_size = 100
+            # 分批获取股票数据（腾讯API一次最多获取约100只股票），各批次并发请求
+            batch_size = QUOTE_BATCH_SIZES['tencent']
+            urls = []
             for i in range(0, len(stock_codes), batch_size):
-                batch_codes = stock_codes[i:i+batch_size]
-
-                # 构建腾讯API请求URL
-                tencent_codes = []
-                for code in batch_codes:
-                    if code.startswith(('600', '601', '603', '605', '688')):
-                        tencent_codes.append(f"sh{code}")
-                    else:
-                        tencent_codes.append(f"sz{code}")
-
-                # 腾讯财经API
-                url = f"http://qt.gtimg.cn/q={','.join(tencent_codes)}"
-
-                try:
-                    response = requests.get(url, timeout=10)
-                    response.encoding = 'gbk'
+                tencent_codes = [f"{exchange_prefix(code)}{code}" for code in stock_codes[i:i+batch_size]]
+                urls.append(f"http://qt.gtimg.cn/q={','.join(tencent_codes)}")
 
-                    if response.status_code == 200:
-                        lines = response.text.strip().split('\n')
-                        for line in lines:
-                            if 'v_' in line and '=""' not in line:
-                                # 解析腾讯数据格式
-                                stock_data = self._parse_tencent_data(line)
-                                if stock_data:
-                                    all_stocks.append(stock_data)
+            df = self._fetch_batches('tencent', urls, self._parse_tencent_response, encoding='gbk')
 
-                    # 避免请求过快
-                    time.sleep(0.1)
-
-                except Exception as e:
-                    logger.warning(f"获取批次 {i//batch_size + 1} 数据失败: {e}")
-                    continue
-
-                if (i // batch_size + 1) % 10 == 0:
-                    logger.info(f"已处理 {i + len(batch_codes)} / {len(stock_codes)} 只股票")
-
-            if all_stocks:
-                df = pd.DataFrame(all_stocks)
+            if len(df):
                 logger.info(f"腾讯财经成功加载 {len(df)} 只股票信息")
                 return df
             else:
@@ -232,12 +228,11 @@ class StockDataAPI:
             logger.info("回退到本地数据源")
             return self._load_from_local()
 
+    @register_data_source('eastmoney', requires=('requests',), description='东方财富')
     def _load_from_eastmoney(self):
         """从东方财富加载股票数据"""
         try:
             logger.info("正在从东方财富加载A股股票列表...")
-            import requests
-            import json
 
             # 东方财富API - 获取沪深A股数据
             # 这个API可以直接获取所有A股的基本信息
@@ -256,7 +251,8 @@ class StockDataAPI:
             }
 
             try:
-                response = requests.get(url, params=params, timeout=15)
+                self.throttle.wait('eastmoney')
+                response = self.http.get('eastmoney', url, params=params, timeout=15)
                 if response.status_code == 200:
                     data = response.json()
 
@@ -307,6 +303,8 @@ class StockDataAPI:
 
             except Exception as e:
                 logger.error(f"东方财富API请求异常: {e}")
+            finally:
+                self.http.log_stats('eastmoney')
 
             # 如果API失败，回退到本地数据源
             logger.info("回退到本地数据源")
@@ -317,8 +315,11 @@ class StockDataAPI:
             logger.info("回退到本地数据源")
             return self._load_from_local()
 
+    @register_data_source('local', description='本地', snapshot=False)
     def _load_from_local(self):
         """从本地数据源加载股票数据"""
+        if self.api_source != 'local':
+            self.fallback_used = True
         try:
             logger.info("正在从本地数据源加载A股股票列表...")
             local_data = LocalStockData()
@@ -329,67 +330,29 @@ class StockDataAPI:
             logger.error(f"本地数据源加载失败: {e}")
             raise
 
+    @register_data_source('netease', requires=('requests',), description='网易')
     def _load_from_netease(self):
         """从网易财经加载股票数据"""
         try:
             logger.info("正在从网易财经加载A股股票列表...")
-            import requests
-            import json
-            import time
 
-            # 从本地数据获取股票代码列表作为基础
-            local_data = LocalStockData()
-            local_stock_list = local_data.get_stock_list()
-            stock_codes = local_stock_list['代码'].tolist()
+            # 从本地数据获取股票代码列表作为基础（按需模式只查询指定的股票）
+            stock_codes = self._quote_codes()
 
             logger.info(f"获取到 {len(stock_codes)} 个股票代码，开始从网易获取实时数据...")
 
-            all_stocks = []
-
-            # 分批获取股票数据（网易API一次最多获取约200只股票）
-            batch_size = 200
+            # 分批获取股票数据（网易API一次最多获取约200只股票），各批次并发请求
+            batch_size = QUOTE_BATCH_SIZES['netease']
+            urls = []
             for i in range(0, len(stock_codes), batch_size):
-                batch_codes = stock_codes[i:i+batch_size]
-
-                # 构建网易API请求URL
-                netease_codes = []
-                for code in batch_codes:
-                    if code.startswith(('600', '601', '603', '605', '688')):
-                        netease_codes.append(f"0{code}")  # 沪市前缀0
-                    else:
-                        netease_codes.append(f"1{code}")  # 深市前缀1
-
-                url = f"http://api.money.126.net/data/feed/{','.join(netease_codes)}"
-
-                try:
-                    response = requests.get(url, timeout=10)
-                    response.encoding = 'utf-8'
-
-                    if response.status_code == 200:
-                        # 网易API返回JSONP格式，需要处理
-                        text = response.text
-                        if text.startswith('_ntes_quote_callback(') and text.endswith(');'):
-                            json_str = text[21:-2]  # 去掉JSONP包装
-                            data = json.loads(json_str)
+                # 网易代码前缀：沪市0，深市1
+                netease_codes = [f"{'0' if exchange_prefix(code) == 'sh' else '1'}{code}"
+                                 for code in stock_codes[i:i+batch_size]]
+                urls.append(f"http://api.money.126.net/data/feed/{','.join(netease_codes)}")
 
-                            for code_key, stock_info in data.items():
-                                if stock_info and isinstance(stock_info, dict):
-                                    stock_data = self._parse_netease_data(code_key, stock_info)
-                                    if stock_data:
-                                        all_stocks.append(stock_data)
+            df = self._fetch_batches('netease', urls, self._parse_netease_response, encoding='utf-8')
 
-                    # 避免请求过快
-                    time.sleep(0.2)
-
-                except Exception as e:
-                    logger.warning(f"获取批次 {i//batch_size + 1} 数据失败: {e}")
-                    continue
-
-                if (i // batch_size + 1) % 5 == 0:
-                    logger.info(f"已处理 {i + len(batch_codes)} / {len(stock_codes)} 只股票")
-
-            if all_stocks:
-                df = pd.DataFrame(all_stocks)
+            if len(df):
                 logger.info(f"网易财经成功加载 {len(df)} 只股票信息")
                 return df
             else:
@@ -401,8 +364,77 @@ class StockDataAPI:
             logger.info("回退到本地数据源")
             return self._load_from_local()
 
+    def _fetch_batches(self, source: str, urls: List[str], parse, encoding: str, timeout: float = 10,
+                       wait=None, **kwargs) -> pd.DataFrame:
+        """
+        并发获取各批次行情，按批次顺序合并结果
+
+        同时进行的请求数不超过数据源的并发上限（data_sources.http.concurrency），
+        默认按限流策略的令牌桶限流（各连接的第一个请求同时开始，之后每个连接按限流间隔请求）；
+        单个批次失败只记录警告，不影响其他批次；有批次失败或因取消跳过时设置 incomplete（结果不保存为快照）
+
+        Args:
+            source: 数据源名称
+            urls: 各批次的请求地址
+            parse: 解析响应文本的函数，返回各列的值（列式解析）或股票数据列表
+            encoding: 响应编码
+            timeout: 单次请求超时（秒）
+            wait: 每次请求前调用的限流函数，默认使用数据源限流间隔对应的令牌桶
+            **kwargs: 传给会话池 get 的其他参数（如 headers）
+
+        Returns:
+            pd.DataFrame: 按批次顺序合并的股票数据，列为 QUOTE_FIELDS
+        """
+        if not urls:
+            return concat_quotes([])
+        concurrency = max(1, min(self.http.concurrency(source), len(urls)))
+        if wait is None:
+            bucket = self.throttle.bucket(source, concurrency)
+            wait = bucket.acquire if bucket is not None else (lambda: None)
+
+        def fetch(url):
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                self.incomplete = True
+                return None
+            wait()
+            response = self.http.get(source, url, timeout=timeout, **kwargs)
+            response.encoding = encoding
+            if response.status_code != 200:
+                raise ValueError(f"HTTP {response.status_code}")
+            return parse(response.text)
+
+        start = time.perf_counter()
+        batches = [None] * len(urls)
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f'{source}-fetch') as executor:
+            futures = {executor.submit(fetch, url): i for i, url in enumerate(urls)}
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                try:
+                    batches[i] = future.result()
+                except Exception as e:
+                    self.incomplete = True
+                    logger.warning(f"获取批次 {i + 1} 数据失败: {e}")
+                if done % 10 == 0:
+                    logger.info(f"已完成 {done} / {len(urls)} 个批次")
+
+        logger.info(f"{source} 共 {len(urls)} 个批次, 并发 {concurrency}, 耗时 {time.perf_counter() - start:.2f} 秒")
+        self.http.log_stats(source)
+        return concat_quotes(batch for batch in batches if batch is not None)
+
+    def _parse_sina_response(self, text: str) -> Dict[str, list]:
+        """解析新浪财经一个批次的响应（列式解析，规则与 _parse_sina_data 一致）"""
+        return parse_sina_columns(text)
+
+    def _parse_tencent_response(self, text: str) -> Dict[str, list]:
+        """解析腾讯财经一个批次的响应（列式解析，规则与 _parse_tencent_data 一致）"""
+        return parse_tencent_columns(text)
+
+    def _parse_netease_response(self, text: str) -> Dict[str, list]:
+        """解析网易财经一个批次的响应（JSONP格式，列式解析，规则与 _parse_netease_data 一致）"""
+        return parse_netease_columns(text)
+
     def _parse_netease_data(self, code_key: str, stock_info: dict) -> dict:
-        """解析网易财经数据格式"""
+        """解析网易财经单只股票的数据（逐只解析，批次响应使用 parse_netease_columns）"""
         try:
             # 提取股票代码（去掉前缀）
             if code_key.startswith('0') or code_key.startswith('1'):
@@ -436,62 +468,45 @@ class StockDataAPI:
             logger.debug(f"解析网易数据失败: {e}, 数据: {stock_info}")
             return None
 
+    @register_data_source('xueqiu', requires=('requests',), description='雪球')
     def _load_from_xueqiu(self):
-        """从雪球网加载股票数据"""
+        """
+        从雪球网加载股票数据
+
+        优先使用批量行情接口 quotec.json（一次查询多只股票，不返回名称，名称取自本地股票列表）；
+        批量接口不可用时逐只查询 quote.json，并发请求并按令牌桶限流。
+        指定 symbols 时只查询这些股票
+        """
         try:
             logger.info("正在从雪球网加载A股股票列表...")
-            import requests
-            import json
-            import time
 
-            # 从本地数据获取股票代码列表作为基础
+            # 从本地数据获取股票代码和名称作为基础
             local_data = LocalStockData()
             local_stock_list = local_data.get_stock_list()
-            stock_codes = local_stock_list['代码'].tolist()
+            names = dict(zip(local_stock_list['代码'], local_stock_list['名称']))
+            stock_codes = self.symbols if self.symbols is not None else local_stock_list['代码'].tolist()
+            symbols = [f"{exchange_prefix(code).upper()}{code}" for code in stock_codes]
 
             logger.info(f"获取到 {len(stock_codes)} 个股票代码，开始从雪球获取实时数据...")
 
-            all_stocks = []
-
-            # 雪球API需要设置请求头
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Referer': 'https://xueqiu.com/',
-                'Accept': 'application/json, text/plain, */*'
-            }
-
-            # 分批获取股票数据（雪球API一次获取一只股票）
-            for i, code in enumerate(stock_codes[:100]):  # 限制前100只股票，避免请求过多
-                # 构建雪球API请求URL
-                if code.startswith(('600', '601', '603', '605', '688')):
-                    symbol = f"SH{code}"
-                else:
-                    symbol = f"SZ{code}"
-
-                url = f"https://stock.xueqiu.com/v5/stock/quote.json?symbol={symbol}&extend=detail"
-
-                try:
-                    response = requests.get(url, headers=headers, timeout=5)
-
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data.get('error_code') == 0 and 'data' in data:
-                            stock_data = self._parse_xueqiu_data(code, data['data'])
-                            if stock_data:
-                                all_stocks.append(stock_data)
-
-                    # 避免请求过快，雪球有较严格的限制
-                    time.sleep(0.5)
-
-                except Exception as e:
-                    logger.debug(f"获取股票 {code} 数据失败: {e}")
-                    continue
-
-                if (i + 1) % 20 == 0:
-                    logger.info(f"已处理 {i + 1} / {min(100, len(stock_codes))} 只股票")
-
-            if all_stocks:
-                df = pd.DataFrame(all_stocks)
+            # 雪球有较严格的限制，批量和逐只请求都使用令牌桶限流
+            bucket = get_token_bucket('xueqiu')
+            urls = [f"https://stock.xueqiu.com/v5/stock/realtime/quotec.json?symbol={','.join(symbols[i:i+XUEQIU_BATCH_SIZE])}"
+                    for i in range(0, len(symbols), XUEQIU_BATCH_SIZE)]
+            df = self._fetch_batches('xueqiu', urls, lambda text: self._parse_xueqiu_quotec(text, names),
+                                     encoding='utf-8', timeout=5, wait=bucket.acquire, headers=XUEQIU_HEADERS)
+
+            if not len(df):
+                # 逐只查询全市场耗时过长，未指定股票时只查询前面一部分（不完整，不保存为快照）
+                if self.symbols is None and len(symbols) > XUEQIU_SINGLE_LIMIT:
+                    symbols = symbols[:XUEQIU_SINGLE_LIMIT]
+                    self.incomplete = True
+                logger.warning(f"雪球批量接口未返回数据，逐只查询 {len(symbols)} 只股票")
+                urls = [f"https://stock.xueqiu.com/v5/stock/quote.json?symbol={symbol}&extend=detail" for symbol in symbols]
+                df = self._fetch_batches('xueqiu', urls, self._parse_xueqiu_quote, encoding='utf-8',
+                                         timeout=5, wait=bucket.acquire, headers=XUEQIU_HEADERS)
+
+            if len(df):
                 logger.info(f"雪球网成功加载 {len(df)} 只股票信息")
                 return df
             else:
@@ -503,6 +518,42 @@ class StockDataAPI:
             logger.info("回退到本地数据源")
             return self._load_from_local()
 
+    def _parse_xueqiu_quotec(self, text: str, names: Dict[str, str]) -> List[dict]:
+        """解析雪球批量行情接口的响应，名称取自 names（代码 -> 名称）"""
+        data = json.loads(text)
+        if data.get('error_code') != 0:
+            return []
+        stocks = []
+        for quote in data.get('data') or []:
+            code = str((quote or {}).get('symbol', ''))[2:]
+            name = names.get(code)
+            if not name:
+                continue
+            stocks.append({
+                '代码': code,
+                '名称': name,
+                '最新价': float(quote.get('current') or 0),
+                '涨跌幅': float(quote.get('percent') or 0),
+                '涨跌额': float(quote.get('chg') or 0),
+                '成交量': float(quote.get('volume') or 0),
+                '成交额': float(quote.get('amount') or 0),
+                '市盈率-动态': 0.0,  # 批量接口不提供，设为0
+                '市净率': 0.0,      # 批量接口不提供，设为0
+                '总市值': float(quote.get('market_capital') or 0),
+                '流通市值': float(quote.get('float_market_capital') or 0)
+            })
+        return stocks
+
+    def _parse_xueqiu_quote(self, text: str) -> List[dict]:
+        """解析雪球单只股票接口的响应"""
+        data = json.loads(text)
+        if data.get('error_code') != 0 or not data.get('data'):
+            return []
+        quote = data['data'].get('quote') or {}
+        code = str(quote.get('code') or str(quote.get('symbol', ''))[2:])
+        stock_data = self._parse_xueqiu_data(code, data['data'])
+        return [stock_data] if stock_data else []
+
     def _parse_xueqiu_data(self, code: str, stock_info: dict) -> dict:
         """解析雪球网数据格式"""
         try:
@@ -538,7 +589,7 @@ class StockDataAPI:
             return None
 
     def _parse_sina_data(self, line: str) -> dict:
-        """解析新浪财经数据格式"""
+        """解析新浪财经单行数据（逐行解析，批次响应使用 parse_sina_columns）"""
         try:
             # 新浪数据格式: var hq_str_sh600000="浦发银行,10.00,9.99,10.01,10.02,9.98,10.01,10.02,1000000,10010000.00,..."
             if 'hq_str_' not in line or '=""' in line:
@@ -609,7 +660,7 @@ class StockDataAPI:
             return None
 
     def _parse_tencent_data(self, line: str) -> dict:
-        """解析腾讯财经数据格式"""
+        """解析腾讯财经单行数据（逐行解析，批次响应使用 parse_tencent_columns）"""
         try:
             # 腾讯数据格式: v_sh600000="1~浦发银行~600000~10.00~10.01~9.99~1000000~500000~500000~10.02~..."
             if 'v_' not in line or '=""' in line:
@@ -684,39 +735,100 @@ class StockDataAPI:
 class StockNameMatcher:
     """股票名称匹配器类 - 支持根据股票名称匹配代码，或根据股票代码补全名称"""
 
-    def __init__(self, api_source='akshare'):
+    def __init__(self, api_source='akshare', price_band: float = None, workers: int = None,
+                 stock_list: pd.DataFrame = None, demand_quotes: bool = None):
         """
         初始化匹配器
 
         Args:
-            api_source: API数据源 ('akshare', 'sina', 'tencent', 'eastmoney')
+            api_source: API数据源，取值见数据源注册表
+            price_band: 名称匹配时的价格区间比例（例如0.1表示±10%），None表示不限制
+            workers: 名称匹配文件使用的进程数，None或1表示在当前进程内处理
+            stock_list: 直接使用的股票列表（例如多进程的工作进程），None表示从数据源加载
+            demand_quotes: 按需行情：股票名称取自本地股票列表，代码补全时只向数据源查询输入文件中股票的行情；
+                           None表示按数据源默认（见 DEFAULT_DEMAND_SOURCES）
         """
         self.api_source = api_source
-        self.api_manager = StockDataAPI(api_source)
+        if demand_quotes is None:
+            demand_quotes = api_source in DEFAULT_DEMAND_SOURCES
+        self.demand_quotes = bool(demand_quotes) and api_source != 'local'
+        # 按需行情模式只从本地加载股票列表，行情在处理文件时按代码查询
+        self.api_manager = StockDataAPI('local' if self.demand_quotes else api_source)
+        self.price_band = price_band
+        self.workers = workers
+        # 批量模糊评分使用的线程数，-1表示使用全部CPU核心
+        self.fuzzy_workers = -1
+        self.match_cache = get_match_cache()
+        # 交叉验证使用的各数据源股票列表快照
+        self.universe_cache = get_universe_cache()
+        self.universe_version = None
         self.stock_list = None
-        self.load_stock_list()
-        
+        if stock_list is not None:
+            self.stock_list = stock_list
+        else:
+            self.load_stock_list()
+
+    @property
+    def stock_list(self) -> Optional[pd.DataFrame]:
+        """当前使用的股票列表"""
+        return self._stock_list
+
+    @stock_list.setter
+    def stock_list(self, value: Optional[pd.DataFrame]):
+        """替换股票列表，同时重建查找索引"""
+        # 清理名称每个股票列表只计算一次，加载时已计算的直接复用
+        if value is not None and '清理名称' not in value.columns:
+            value = value.assign(清理名称=clean_name_series(value['名称']))
+        self._stock_list = value
+        self._index = StockIndex(value) if value is not None else None
+        # 新的股票列表使用新的缓存版本，旧版本的缓存项不再命中
+        previous_version = self.universe_version
+        self.universe_version = next_universe_version()
+        if previous_version is not None:
+            self.match_cache.invalidate_version(previous_version)
+        # 名称索引只在名称匹配时需要，第一次使用时再构建
+        self._name_index = None
+
+    @property
+    def name_index(self) -> NameIndex:
+        """当前股票列表的名称匹配索引"""
+        return self.build_name_index()
+
+    def build_name_index(self) -> NameIndex:
+        """构建当前股票列表的名称匹配索引（已构建时直接返回）"""
+        if self._name_index is None:
+            self._name_index = NameIndex(self.stock_list)
+        return self._name_index
+
     def load_stock_list(self):
-        """加载股票列表"""
+        """加载股票列表：网络数据源按备用链对冲加载，全部失败时使用本地数据源"""
         try:
             logger.info(f"正在使用 {self.api_source} 加载A股股票列表...")
-            # 使用API管理器加载股票列表
-            self.stock_list = self.api_manager.load_stock_list()
-            logger.info(f"成功加载 {len(self.stock_list)} 只股票信息")
+            if self.api_manager.api_source == 'local':
+                stock_list = self.api_manager.load_stock_list()
+            else:
+                stock_list = self._load_hedged()
+            logger.info(f"成功加载 {len(stock_list)} 只股票信息")
 
-            # 清理股票名称，去除特殊字符
-            self.stock_list['清理名称'] = self.stock_list['名称'].apply(self._clean_stock_name)
+            # 清理股票名称（本地数据源加载时已计算的清理名称直接复用）
+            if '清理名称' not in stock_list.columns:
+                stock_list['清理名称'] = clean_name_series(stock_list['名称'])
+            self.stock_list = stock_list
+            # 交叉验证时直接使用已加载的列表，不再重复下载
+            self.universe_cache.put(self.api_manager.api_source, stock_list)
 
         except Exception as e:
             logger.error(f"加载股票列表失败: {e}")
             # 如果当前API源失败，尝试使用本地数据源作为备用
-            if self.api_source != 'local':
+            if self.api_manager.api_source != 'local':
                 logger.info("尝试使用本地数据源作为备用...")
                 try:
                     self.api_source = 'local'  # 更新当前数据源
                     self.api_manager = StockDataAPI('local')
-                    self.stock_list = self.api_manager.load_stock_list()
-                    self.stock_list['清理名称'] = self.stock_list['名称'].apply(self._clean_stock_name)
+                    stock_list = self.api_manager.load_stock_list()
+                    if '清理名称' not in stock_list.columns:
+                        stock_list['清理名称'] = clean_name_series(stock_list['名称'])
+                    self.stock_list = stock_list
                     logger.info(f"本地备用数据源成功加载 {len(self.stock_list)} 只股票信息")
                 except Exception as backup_e:
                     logger.error(f"本地备用数据源也失败: {backup_e}")
@@ -724,17 +836,81 @@ class StockNameMatcher:
             else:
                 raise
     
+    def _load_hedged(self) -> pd.DataFrame:
+        """
+        对冲加载：主数据源超过对冲延迟未返回时并行启动 data_sources.fallback 中的下一个数据源，
+        使用最先成功返回的结果，胜出的数据源成为当前数据源
+
+        Raises:
+            ValueError: 备用链中的数据源全部失败（包括回退到本地数据）
+        """
+        hedger = get_hedged_loader()
+        chain = hedger.chain(self.api_manager.api_source, lambda source: source in data_source_registry)
+
+        def load(source, cancel_event):
+            api = StockDataAPI(source)
+            api.cancel_event = cancel_event
+            stock_list = api.load_stock_list()
+            if api.fallback_used:
+                raise ValueError("加载失败，已回退到本地数据")
+            if stock_list is None or len(stock_list) == 0:
+                raise ValueError("未返回数据")
+            return api, stock_list
+
+        result = hedger.load(chain, load)
+        if not result.ok:
+            raise ValueError(f"{', '.join(chain)} 全部加载失败")
+        api, stock_list = result.value
+        api.cancel_event = None
+        if result.source != self.api_manager.api_source:
+            logger.info(f"{self.api_manager.api_source} 未最先返回，使用 {result.source} 的数据")
+            self.api_source = result.source
+        self.api_manager = api
+        return stock_list
+
+    def refresh_quotes(self, codes: List[str]) -> int:
+        """
+        按需刷新行情：只向数据源查询给定股票的行情，并更新到当前股票列表
+
+        Args:
+            codes: 标准化股票代码
+
+        Returns:
+            int: 更新的股票数
+        """
+        codes = list(dict.fromkeys(codes))
+        if not codes or self.stock_list is None or self.api_source == 'local':
+            return 0
+        if self.api_source in DEMAND_QUOTE_SOURCES:
+            batches = -(-len(codes) // QUOTE_BATCH_SIZES[self.api_source])
+            logger.info(f"按需刷新 {len(codes)} 只股票的 {self.api_source} 行情（{batches} 次请求）...")
+        else:
+            logger.info(f"{self.api_source} 不支持按股票查询行情，加载全市场后更新 {len(codes)} 只股票...")
+        api = StockDataAPI(self.api_source, symbols=codes)
+        try:
+            quotes = api.load_stock_list()
+        except Exception as e:
+            logger.warning(f"{self.api_source} 行情获取失败，保留原有行情: {e}")
+            return 0
+        if quotes is None or len(quotes) == 0 or api.fallback_used:
+            logger.warning(f"{self.api_source} 行情获取失败，保留原有行情")
+            return 0
+
+        quotes = quotes[quotes['代码'].astype(str).isin(codes)].drop_duplicates('代码')
+        rows = self._index.lookup_codes(codes_to_int(quotes['代码'].astype(str)))
+        hit = rows >= 0
+        stock_list = self.stock_list.copy()
+        for col in QUOTE_COLUMNS:
+            if col in quotes.columns:
+                stock_list[col] = pd.to_numeric(stock_list[col], errors='coerce') if col in stock_list.columns else np.nan
+                stock_list.iloc[rows[hit], stock_list.columns.get_loc(col)] = quotes[col].to_numpy()[hit]
+        self.stock_list = stock_list
+        logger.info(f"已更新 {int(hit.sum())} 只股票的行情")
+        return int(hit.sum())
+
     def _clean_stock_name(self, name: str) -> str:
-        """清理股票名称，去除特殊字符"""
-        if pd.isna(name):
-            return ""
-        # 去除常见的前缀和后缀
-        name = str(name).strip()
-        # 去除ST、*ST等标记
-        name = re.sub(r'^\*?ST\s*', '', name)
-        # 去除A、B等后缀
-        name = re.sub(r'[AB]$', '', name)
-        return name.strip()
+        """清理股票名称，规则见 name_normalizer"""
+        return clean_stock_name(name)
     
     def read_excel_file(self, file_path: str, name_column: str = None, price_column: str = None, code_column: str = None) -> pd.DataFrame:
         """
@@ -822,7 +998,7 @@ class StockNameMatcher:
             # 处理股票名称列（如果存在）
             if name_column and name_column in df.columns:
                 result_df['原始名称'] = df[name_column]
-                result_df['清理名称'] = result_df['原始名称'].apply(self._clean_stock_name)
+                result_df['清理名称'] = clean_name_series(result_df['原始名称'])
             else:
                 result_df['原始名称'] = None
                 result_df['清理名称'] = None
@@ -901,99 +1077,14 @@ class StockNameMatcher:
 
     def _normalize_stock_code(self, code: str) -> str:
         """标准化股票代码格式，自动补全前导零"""
-        if not code or pd.isna(code):
-            return ""
-
-        code = str(code).strip()
-
-        # 处理被单引号包裹的数字（如 '000037' -> 000037）
-        if code.startswith("'"):
-            code = code[1:].strip()
-
-        # 处理被双引号包裹的数字（如 "000037" -> 000037）
-        if code.startswith('"'):
-            code = code[1:].strip()
-
-        # 移除其他可能的非数字字符，但保留数字（保留前导零）
-        import re
-        # 只保留数字，但不移除前导零
-        code = re.sub(r'[^\d]', '', code)
-
-        # 如果处理后为空或不是纯数字，返回原始值
-        if not code or not code.isdigit():
-            return str(code).strip() if code else ""
-
-        # 根据长度和规则补全前导零
-        if len(code) == 6:
-            # 已经是6位，直接返回
-            return code
-        elif len(code) == 3:
-            # 3位数字，根据首位数字判断市场
-            first_digit = code[0]
-            if first_digit in ['6']:
-                # 沪市，补全为600xxx
-                return '600' + code
-            elif first_digit in ['0', '1', '2', '3']:
-                # 深市，补全前导零
-                return code.zfill(6)
-            else:
-                # 其他情况，补全前导零
-                return code.zfill(6)
-        elif len(code) == 4:
-            # 4位数字，根据前两位或首位判断
-            first_digit = code[0]
-            first_two = code[:2]
-
-            if first_two in ['30']:
-                # 创业板，补全为300xxx或301xxx
-                if code.startswith('30'):
-                    return '30' + code[2:].zfill(4)  # 补全为300xxx
-                else:
-                    return code.zfill(6)
-            elif first_two in ['68']:
-                # 科创板，补全为688xxx
-                return '68' + code[2:].zfill(4)
-            elif first_digit in ['0', '1', '2', '3']:
-                # 深市，补全前导零
-                return code.zfill(6)
-            else:
-                # 其他情况，补全前导零
-                return code.zfill(6)
-        elif len(code) == 5:
-            # 5位数字，补全一个前导零
-            return '0' + code
-        else:
-            # 其他长度，尝试补全到6位
-            return code.zfill(6)
+        return normalize_stock_code(code)
 
     def _validate_stock_code(self, code: str) -> bool:
         """验证股票代码格式"""
-        if not code or pd.isna(code):
-            return False
-
-        # 先标准化代码
-        normalized_code = self._normalize_stock_code(code)
-
-        # A股代码格式验证（更完整的规则）
-        # 沪市：600xxx, 601xxx, 603xxx, 605xxx
-        # 科创板：688xxx
-        # 深市：000xxx, 001xxx, 002xxx, 003xxx
-        # 创业板：300xxx, 301xxx
-        if len(normalized_code) == 6 and normalized_code.isdigit():
-            first_three = normalized_code[:3]
-            # 扩展创业板代码范围，包括301xxx
-            valid_prefixes = [
-                '600', '601', '603', '605',  # 沪市
-                '688',                        # 科创板
-                '000', '001', '002', '003',   # 深市
-                '300', '301'                  # 创业板（包括新的301xxx）
-            ]
-            if first_three in valid_prefixes:
-                return True
-
-        return False
-    
-    def match_stock_name(self, input_name: str, use_price: bool = True, reference_price: float = None) -> List[Dict]:
+        return is_valid_stock_code(code)
+
+    def match_stock_name(self, input_name: str, use_price: bool = True, reference_price: float = None,
+                         price_band: float = None) -> List[Dict]:
         """
         匹配股票名称
         
@@ -1001,6 +1092,8 @@ class StockNameMatcher:
             input_name: 输入的股票名称
             use_price: 是否使用价格进行验证
             reference_price: 参考价格
+            price_band: 价格区间比例（例如0.1表示±10%），模糊匹配和包含匹配只保留最新价在
+                        参考价格区间内的股票；默认使用 self.price_band，None表示不限制
             
         Returns:
             List[Dict]: 匹配结果列表
@@ -1012,82 +1105,257 @@ class StockNameMatcher:
         if not cleaned_input:
             return []
         
-        # 使用模糊匹配
-        matches = []
-        
-        # 1. 精确匹配
-        exact_matches = self.stock_list[
-            (self.stock_list['名称'] == input_name) | 
-            (self.stock_list['清理名称'] == cleaned_input)
-        ]
-        
-        for _, row in exact_matches.iterrows():
-            matches.append({
-                '股票代码': row['代码'],
-                '股票名称': row['名称'],
-                '最新价': row['最新价'],
-                '匹配类型': '精确匹配',
-                '匹配度': 100,
-                '价格差异': abs(row['最新价'] - reference_price) if reference_price else None
-            })
-        
-        # 2. 模糊匹配
-        if len(matches) < 5:  # 如果精确匹配结果少于5个，进行模糊匹配
-            fuzzy_matches = process.extract(
-                cleaned_input, 
-                self.stock_list['清理名称'].tolist(), 
-                limit=10,
-                scorer=fuzz.ratio
-            )
-            
-            for match_name, score in fuzzy_matches:
-                if score >= 60:  # 匹配度阈值
-                    matched_rows = self.stock_list[self.stock_list['清理名称'] == match_name]
-                    for _, row in matched_rows.iterrows():
-                        # 避免重复添加精确匹配的结果
-                        if not any(m['股票代码'] == row['代码'] for m in matches):
-                            matches.append({
-                                '股票代码': row['代码'],
-                                '股票名称': row['名称'],
-                                '最新价': row['最新价'],
-                                '匹配类型': '模糊匹配',
-                                '匹配度': score,
-                                '价格差异': abs(row['最新价'] - reference_price) if reference_price else None
-                            })
-        
-        # 3. 包含匹配
-        if len(matches) < 5:
-            contains_matches = self.stock_list[
-                self.stock_list['清理名称'].str.contains(cleaned_input, na=False) |
-                self.stock_list['清理名称'].apply(lambda x: cleaned_input in str(x))
-            ]
-            
-            for _, row in contains_matches.iterrows():
-                if not any(m['股票代码'] == row['代码'] for m in matches):
-                    matches.append({
-                        '股票代码': row['代码'],
-                        '股票名称': row['名称'],
-                        '最新价': row['最新价'],
-                        '匹配类型': '包含匹配',
-                        '匹配度': 50,
-                        '价格差异': abs(row['最新价'] - reference_price) if reference_price else None
-                    })
-        
-        # 按匹配度和价格差异排序
-        if use_price and reference_price:
-            # 如果有参考价格，优先考虑价格接近的股票
-            matches = [m for m in matches if m['价格差异'] is not None]
-            matches.sort(key=lambda x: (x['价格差异'], -x['匹配度']))
+        use_price = bool(use_price and reference_price)
+        if price_band is None:
+            price_band = self.price_band
+
+        # 排序后的候选按 (清理名称, 价格档位, 价格区间, 股票列表版本) 缓存，
+        # 不使用价格排序时结果与参考价格无关
+        cache_key = ('name', cleaned_input, price_bucket(reference_price) if use_price else None,
+                     price_band if use_price else None, self.universe_version)
+        ranked = self.match_cache.get(cache_key)
+        if ranked is None:
+            ranked = self._rank_name_candidates(input_name, cleaned_input, use_price, reference_price, price_band)
+            self.match_cache.put(cache_key, ranked)
+
+        # 价格差异按本次的参考价格计算
+        index = self.name_index
+        return [{
+            '股票代码': index.codes[row],
+            '股票名称': index.names[row],
+            '最新价': index.prices[row],
+            '匹配类型': match_type,
+            '匹配度': score,
+            '价格差异': float(abs(index.price_values[row] - reference_price)) if reference_price else None
+        } for row, match_type, score in ranked]
+
+    def _rank_name_candidates(self, input_name: str, cleaned_input: str, use_price: bool,
+                              reference_price: float, price_band: float) -> List[Tuple[int, str, int]]:
+        """
+        查找并排序名称候选
+
+        Returns:
+            List[Tuple[int, str, int]]: 前5个候选的 (行位置, 匹配类型, 匹配度)
+        """
+        # 候选按 (行位置, 匹配类型, 匹配度) 收集，排序后只保留前5个
+        rows, types, scores = [], [], []
+        index = self.name_index
+        allowed = index.price_band_mask(reference_price, price_band) if use_price else None
+
+        def add_candidates(candidate_rows, match_type, score):
+            """添加候选，已添加的股票代码不重复添加"""
+            matched_codes = set(index.codes[rows])
+            for row in candidate_rows:
+                if index.codes[row] not in matched_codes:
+                    matched_codes.add(index.codes[row])
+                    rows.append(row)
+                    types.append(match_type)
+                    scores.append(score)
+
+        # 1. 精确匹配（名称或清理名称通过哈希表查找）
+        for row in index.exact_rows(input_name, cleaned_input):
+            rows.append(row)
+            types.append('精确匹配')
+            scores.append(100)
+
+        # 2. 模糊匹配（通过单字倒排索引只对可能达到阈值、且在价格区间内的候选评分）
+        if len(rows) < 5:  # 如果精确匹配结果少于5个，进行模糊匹配
+            for match_name, score in index.fuzzy_search(cleaned_input, allowed):
+                candidate_rows = index.rows_with_clean_name(match_name)
+                if allowed is not None:
+                    candidate_rows = candidate_rows[allowed[candidate_rows]]
+                add_candidates(candidate_rows, '模糊匹配', score)
+
+        # 3. 包含匹配（后缀数组查找，按字面子串匹配）
+        if len(rows) < 5:
+            candidate_rows = index.contains_rows(cleaned_input)
+            if allowed is not None:
+                candidate_rows = candidate_rows[allowed[candidate_rows]]
+            add_candidates(candidate_rows, '包含匹配', 50)
+
+        if not rows:
+            return []
+        rows = np.array(rows, dtype=np.int64)
+        scores = np.array(scores, dtype=np.int64)
+
+        # 有参考价格时优先按价格差异排序（价格无效的排在最后），否则按匹配度排序；
+        # 排序稳定，相同时保持候选顺序
+        if use_price:
+            order = np.lexsort((-scores, index.price_differences(rows, reference_price)))[:5]
         else:
-            # 否则按匹配度排序
-            matches.sort(key=lambda x: -x['匹配度'])
-        
-        return matches[:5]  # 返回前5个最佳匹配
+            order = np.argsort(-scores, kind='stable')[:5]
+        return [(int(rows[pos]), types[pos], int(scores[pos])) for pos in order]  # 返回前5个最佳匹配
+
+    def match_stock_names_batch(self, input_df: pd.DataFrame, price_band: float = None) -> pd.DataFrame:
+        """
+        批量匹配股票名称：相同名称只匹配一次，名称或清理名称完全相同的通过哈希表直接关联，
+        其余名称再统一进行模糊评分（多核矩阵评分）和包含匹配
+
+        未精确命中的名称，候选和排序规则与 match_stock_name 一致；精确命中的名称直接采用
+        精确匹配的股票，不再计算模糊候选
+
+        Args:
+            input_df: 包含'原始名称'和'参考价格'列的数据框（read_excel_file 的输出）
+            price_band: 价格区间比例，规则与 match_stock_name 相同；使用价格区间时
+                        名称和参考价格都相同的行才只匹配一次
+
+        Returns:
+            pd.DataFrame: 名称匹配结果（每行最佳匹配及备选1/备选2）
+        """
+        index = self.name_index
+        size = len(input_df)
+        raw_names = input_df['原始名称'].to_numpy(dtype=object)
+        if '参考价格' in input_df.columns:
+            reference_prices = input_df['参考价格'].to_numpy(dtype=object)
+        else:
+            reference_prices = np.full(size, None, dtype=object)
+
+        if price_band is None:
+            price_band = self.price_band
+        bounds = price_band_bounds(reference_prices, price_band)
+
+        # 相同名称只匹配一次（非字符串名称按类型区分，避免852和852.0被视为同一名称）
+        keys = [name if isinstance(name, str) or pd.isna(name) else (type(name), name) for name in raw_names]
+        if bounds is not None:
+            # 价格区间不同的行候选范围不同，按 (名称, 区间下限) 区分
+            keys = [(key, lower) if isinstance(key, (str, tuple)) else key for key, lower in zip(keys, bounds[0])]
+        keys = pd.Series(keys, dtype=object)
+        positions, uniques = pd.factorize(keys)
+        present = np.flatnonzero(positions >= 0)
+        first = np.full(len(uniques), -1, dtype=np.int64)
+        first[positions[present[::-1]]] = present[::-1]
+
+        # 1. 精确匹配：名称或清理名称通过哈希表关联
+        candidates = [None] * len(uniques)
+        pending = []
+        exact_count = 0
+        distinct_names = pd.Series(raw_names[first], dtype=object)
+        usable = np.array([bool(name) and not pd.isna(name) for name in distinct_names], dtype=bool)
+        distinct_cleaned = clean_name_series(distinct_names.where(usable, None)).tolist()
+        for key_id, row in enumerate(first):
+            name = raw_names[row]
+            cleaned = distinct_cleaned[key_id]
+            if not cleaned:
+                candidates[key_id] = ([], [], [])
+                continue
+            rows = index.exact_rows(name, cleaned)
+            if len(rows) > 0:
+                candidates[key_id] = (list(rows), ['精确匹配'] * len(rows), [100] * len(rows))
+                exact_count += 1
+            else:
+                pending.append((key_id, cleaned))
+
+        # 2. 未精确命中的名称统一模糊评分，候选不足5个时再统一进行包含匹配
+        pending_bounds = None
+        if bounds is not None:
+            pending_rows = first[[key_id for key_id, _ in pending]]
+            pending_bounds = (bounds[0][pending_rows], bounds[1][pending_rows])
+
+        def in_band(key_id, candidate_rows):
+            """只保留最新价在该名称价格区间内的行"""
+            if bounds is None or np.isinf(bounds[0][first[key_id]]):
+                return candidate_rows
+            prices = index.price_values[candidate_rows]
+            return candidate_rows[(prices >= bounds[0][first[key_id]]) & (prices <= bounds[1][first[key_id]])]
+
+        fuzzy_results = index.fuzzy_top([cleaned for _, cleaned in pending], workers=self.fuzzy_workers,
+                                        bounds=pending_bounds)
+        contains_needed = []
+        for (key_id, cleaned), fuzzy_matches in zip(pending, fuzzy_results):
+            rows, types, scores = [], [], []
+            seen_codes = set()
+            for match_name, score in fuzzy_matches:
+                for row in in_band(key_id, index.rows_with_clean_name(match_name)):
+                    if index.codes[row] not in seen_codes:
+                        seen_codes.add(index.codes[row])
+                        rows.append(row)
+                        types.append('模糊匹配')
+                        scores.append(score)
+            candidates[key_id] = (rows, types, scores)
+            if len(rows) < 5:
+                contains_needed.append((key_id, cleaned, seen_codes))
+
+        contains_results = index.contains_rows_batch([cleaned for _, cleaned, _ in contains_needed])
+        for (key_id, _, seen_codes), contains_rows in zip(contains_needed, contains_results):
+            rows, types, scores = candidates[key_id]
+            for row in in_band(key_id, contains_rows):
+                if index.codes[row] not in seen_codes:
+                    seen_codes.add(index.codes[row])
+                    rows.append(row)
+                    types.append('包含匹配')
+                    scores.append(50)
+
+        # 3. 候选展开到每个输入行，按参考价格或匹配度排序后取前3个
+        counts = np.array([len(rows) for rows, _, _ in candidates] + [0], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        cand_rows = np.array([row for rows, _, _ in candidates for row in rows], dtype=np.int64)
+        cand_types = np.array([t for _, types, _ in candidates for t in types], dtype=object)
+        cand_scores = np.array([score for _, _, scores in candidates for score in scores], dtype=np.int64)
+
+        row_counts = counts[positions]  # 缺失名称的位置为-1，对应末尾的0
+        owner = np.repeat(np.arange(size), row_counts)
+        within = np.arange(len(owner)) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        cand = offsets[positions[owner]] + within
+
+        # 参考价格有效（非空、非0）时计算价格差异并优先按价格差异排序
+        use_price = np.array([ref is not None and (pd.isna(ref) or bool(ref)) for ref in reference_prices], dtype=bool)
+        reference = pd.to_numeric(pd.Series(reference_prices, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+        diff = np.abs(index.price_values[cand_rows[cand]] - reference[owner])
+        # 参考价格为NaN时所有价格差异都是NaN，排序保持原有顺序
+        sort_diff = np.where(use_price[owner] & ~np.isnan(reference[owner]), diff, 0.0)
+        order = np.lexsort((within, -cand_scores[cand], sort_diff, owner))
+        owner, cand, diff = owner[order], cand[order], diff[order]
+        rank = np.arange(len(owner)) - np.searchsorted(owner, owner)
+
+        def output_column(default):
+            out = np.empty(size, dtype=object)
+            out[:] = default
+            return out
+
+        result = {
+            '原始名称': raw_names,
+            '参考价格': reference_prices,
+            '匹配股票代码': output_column(''),
+            '匹配股票名称': output_column('未找到匹配'),
+            '当前价格': output_column(''),
+            '匹配类型': output_column(''),
+            '匹配度': output_column(0),
+            '价格差异': output_column(''),
+            '备选1_代码': output_column(''),
+            '备选1_名称': output_column(''),
+            '备选2_代码': output_column(''),
+            '备选2_名称': output_column(''),
+        }
+
+        best = rank == 0
+        best_owner, best_cand = owner[best], cand[best]
+        best_rows = cand_rows[best_cand]
+        result['匹配股票代码'][best_owner] = index.codes[best_rows]
+        result['匹配股票名称'][best_owner] = index.names[best_rows]
+        result['当前价格'][best_owner] = index.prices[best_rows]
+        result['匹配类型'][best_owner] = cand_types[best_cand]
+        result['匹配度'][best_owner] = cand_scores[best_cand].tolist()
+        result['价格差异'][best_owner] = np.where(use_price[best_owner], diff[best], None)
+        for alternative in (1, 2):
+            selected = rank == alternative
+            alternative_rows = cand_rows[cand[selected]]
+            result[f'备选{alternative}_代码'][owner[selected]] = index.codes[alternative_rows]
+            result[f'备选{alternative}_名称'][owner[selected]] = index.names[alternative_rows]
+
+        # 与逐行构建结果时一样推断列类型
+        result_df = pd.DataFrame(result).infer_objects()
+        logger.info(f"批量名称匹配完成: {size} 行, {len(uniques)} 个不同名称, "
+                    f"精确命中 {exact_count}, 模糊评分 {len(pending)}")
+        return result_df
 
     def cross_validate_stock_info(self, stock_code: str, stock_name: str) -> Dict:
         """
         使用多个数据源交叉验证股票信息
 
+        各数据源的股票列表在有效期（data_sources.cache_duration）内只加载一次，
+        验证时在内存中的快照上按代码查找。需要加载的数据源并发加载，总等待时间不超过
+        data_sources.cross_validation_deadline，超时的数据源不参与名称一致性等统计
+
         Args:
             stock_code: 股票代码
             stock_name: 股票名称
@@ -1096,58 +1364,48 @@ class StockNameMatcher:
             Dict: 验证结果
         """
         validation_results = {}
-        api_sources = ['akshare', 'sina', 'tencent', 'eastmoney']
+        api_sources = CROSS_VALIDATION_SOURCES
 
-        for api_source in api_sources:
-            try:
-                logger.info(f"使用 {api_source} 验证股票信息: {stock_code}")
-
-                # 创建临时API管理器
-                temp_api = StockDataAPI(api_source)
-                temp_stock_list = temp_api.load_stock_list()
-
-                if temp_stock_list is not None:
-                    # 查找匹配的股票
-                    matched_stocks = temp_stock_list[temp_stock_list['代码'] == stock_code]
-
-                    if len(matched_stocks) > 0:
-                        stock_info = matched_stocks.iloc[0]
-                        validation_results[api_source] = {
-                            'found': True,
-                            'name': stock_info['名称'],
-                            'price': stock_info.get('最新价', None),
-                            'name_match': stock_info['名称'] == stock_name
-                        }
-                    else:
-                        validation_results[api_source] = {
-                            'found': False,
-                            'name': None,
-                            'price': None,
-                            'name_match': False
-                        }
-                else:
-                    validation_results[api_source] = {
-                        'found': False,
-                        'name': None,
-                        'price': None,
-                        'name_match': False,
-                        'error': 'API加载失败'
-                    }
-
-            except Exception as e:
-                logger.warning(f"{api_source} 验证失败: {e}")
+        snapshots = self.universe_cache.get_many(api_sources, self._load_universe)
+        for api_source, snapshot in snapshots.items():
+            if snapshot is None:
+                validation_results[api_source] = {
+                    'found': False,
+                    'name': None,
+                    'price': None,
+                    'name_match': False,
+                    'error': '超时',
+                    'timeout': True
+                }
+                continue
+            if not snapshot.ok:
                 validation_results[api_source] = {
                     'found': False,
                     'name': None,
                     'price': None,
                     'name_match': False,
-                    'error': str(e)
+                    'error': snapshot.error
                 }
+                continue
 
-            # 添加延迟避免API限制
-            time.sleep(0.5)
+            stock_info = snapshot.lookup(stock_code)
+            if stock_info is not None:
+                validation_results[api_source] = {
+                    'found': True,
+                    'name': stock_info['name'],
+                    'price': stock_info['price'],
+                    'name_match': stock_info['name'] == stock_name
+                }
+            else:
+                validation_results[api_source] = {
+                    'found': False,
+                    'name': None,
+                    'price': None,
+                    'name_match': False
+                }
 
-        # 分析验证结果
+        # 分析验证结果（超时的数据源没有名称，不影响名称一致性和推荐名称）
+        timeout_sources = [source for source, result in validation_results.items() if result.get('timeout')]
         found_count = sum(1 for result in validation_results.values() if result.get('found', False))
         name_match_count = sum(1 for result in validation_results.values() if result.get('name_match', False))
 
@@ -1161,9 +1419,86 @@ class StockNameMatcher:
             'name_match_count': name_match_count,
             'most_common_name': most_common_name,
             'confidence_score': (found_count / len(api_sources)) * 100,
-            'name_consistency': (name_match_count / found_count * 100) if found_count > 0 else 0
+            'name_consistency': (name_match_count / found_count * 100) if found_count > 0 else 0,
+            'timeout_sources': timeout_sources
         }
 
+    def cross_validate_codes_bulk(self, codes, stock_names) -> pd.DataFrame:
+        """
+        批量交叉验证：每个数据源的快照与整列代码关联一次，共识列按列计算
+
+        统计口径与 cross_validate_stock_info 一致；推荐名称在票数相同时取数据源顺序靠前的名称，
+        验证详情为"数据源:名称"形式的摘要
+
+        Args:
+            codes: 标准化股票代码
+            stock_names: 当前股票列表中的名称（用于计算名称一致性）
+
+        Returns:
+            pd.DataFrame: 验证置信度、名称一致性、验证数据源数、推荐名称、验证详情列（行顺序与输入一致）
+        """
+        values = codes_to_int(pd.Series(codes, dtype=object))
+        stock_names = np.asarray(stock_names, dtype=object)
+        size = len(values)
+        api_sources = CROSS_VALIDATION_SOURCES
+        source_count = len(api_sources)
+
+        found = np.zeros((size, source_count), dtype=bool)
+        name_match = np.zeros((size, source_count), dtype=bool)
+        names = np.full((size, source_count), None, dtype=object)
+        details = []
+
+        snapshots = self.universe_cache.get_many(api_sources, self._load_universe)
+        for j, (api_source, snapshot) in enumerate(snapshots.items()):
+            if snapshot is None or not snapshot.ok:
+                details.append(np.full(size, f"{api_source}:{'超时' if snapshot is None else '加载失败'}", dtype=object))
+                continue
+
+            # 与该数据源的快照关联一次
+            rows = snapshot.index.lookup_codes(values)
+            hit = rows >= 0
+            found[:, j] = hit
+            names[hit, j] = snapshot.index.names[rows[hit]]
+            name_match[:, j] = hit & (names[:, j] == stock_names)
+
+            label = (f"{api_source}:" + pd.Series(names[:, j], dtype=object).fillna('').astype(str)).to_numpy(dtype=object)
+            details.append(np.where(hit, np.where(name_match[:, j], label, label + '(名称不一致)'),
+                                    f"{api_source}:未找到").astype(object))
+
+        found_count = found.sum(axis=1)
+        name_match_count = name_match.sum(axis=1)
+
+        # 置信度和名称一致性的取值有限，按 (一致数, 找到数) 查表格式化
+        confidence_labels = np.array([f"{k / source_count * 100:.1f}%" for k in range(source_count + 1)], dtype=object)
+        consistency_labels = np.array([f"{(m / f * 100) if f > 0 else 0:.1f}%"
+                                       for m in range(source_count + 1) for f in range(source_count + 1)], dtype=object)
+
+        # 推荐名称：各数据源的名称在找到该代码的数据源中出现的次数，取次数最多的
+        votes = np.zeros((size, source_count), dtype=np.int64)
+        for j in range(source_count):
+            for k in range(source_count):
+                votes[:, j] += found[:, j] & found[:, k] & (names[:, j] == names[:, k])
+        best = votes.argmax(axis=1)
+        recommended = np.where(found_count > 0, names[np.arange(size), best], None)
+
+        detail = details[0] if details else np.full(size, '', dtype=object)
+        for column in details[1:]:
+            detail = detail + '; ' + column
+
+        return pd.DataFrame({
+            '验证置信度': confidence_labels[found_count],
+            '名称一致性': consistency_labels[name_match_count * (source_count + 1) + found_count],
+            '验证数据源数': found_count,
+            '推荐名称': recommended,
+            '验证详情': detail,
+        })
+
+    @staticmethod
+    def _load_universe(api_source: str) -> Optional[pd.DataFrame]:
+        """从指定数据源加载全市场股票列表（用于交叉验证快照）"""
+        logger.info(f"正在从 {api_source} 加载交叉验证用的股票列表...")
+        return StockDataAPI(api_source).load_stock_list()
+
     def match_stock_code(self, input_code: str, reference_price: float = None, enable_cross_validation: bool = False) -> Dict:
         """
         根据股票代码匹配股票信息
@@ -1179,17 +1514,40 @@ class StockNameMatcher:
         if not input_code or pd.isna(input_code):
             return {}
 
+        # 与参考价格无关的部分按 (代码, 是否交叉验证, 股票列表版本) 缓存，
+        # 交叉验证需要访问多个数据源，缓存命中时不再重复验证
+        cache_key = ('code', str(input_code).strip(), bool(enable_cross_validation), self.universe_version)
+        cached = self.match_cache.get(cache_key)
+        if cached is None:
+            cached = self._match_stock_code(input_code, enable_cross_validation)
+            self.match_cache.put(cache_key, cached)
+
+        # 原始代码、参考价格和价格差异按本次输入填写
+        result = dict(cached)
+        result['原始代码'] = input_code
+        result['参考价格'] = reference_price
+        if '股票代码' in result:
+            current_price = result['当前价格']
+            price_diff = None
+            if reference_price and not pd.isna(reference_price) and not pd.isna(current_price):
+                price_diff = abs(float(current_price) - float(reference_price))
+            result['价格差异'] = price_diff
+        return result
+
+    def _match_stock_code(self, input_code: str, enable_cross_validation: bool) -> Dict:
+        """匹配股票代码（不含参考价格相关字段，由 match_stock_code 填写）"""
         original_code = str(input_code).strip()
 
         # 标准化股票代码
         normalized_code = self._normalize_stock_code(original_code)
+        code_value = code_to_int(normalized_code)
 
-        # 验证股票代码格式（使用标准化后的代码进行验证）
-        if not self._validate_stock_code(normalized_code):
+        # 验证股票代码格式（使用标准化后的代码进行验证，前缀表按代码整数值直接寻址）
+        if code_value < 0 or not VALID_PREFIX_TABLE[code_value // 1000]:
             logger.warning(f"股票代码格式无效: {original_code} -> {normalized_code}")
             return {
                 '原始代码': input_code,
-                '参考价格': reference_price,
+                '参考价格': None,
                 '匹配状态': '代码格式无效',
                 '标准化代码': normalized_code,
                 '股票名称': '',
@@ -1198,14 +1556,14 @@ class StockNameMatcher:
                 '匹配类型': '格式验证失败'
             }
 
-        # 在股票列表中查找匹配的代码（使用标准化后的代码）
-        matched_stocks = self.stock_list[self.stock_list['代码'] == normalized_code]
+        # 通过直接寻址代码表查找匹配的代码
+        row = int(self._index.code_table[code_value])
 
-        if len(matched_stocks) == 0:
+        if row < 0:
             logger.warning(f"未找到股票代码: {original_code} -> {normalized_code}")
             return {
                 '原始代码': input_code,
-                '参考价格': reference_price,
+                '参考价格': None,
                 '匹配状态': '未找到匹配',
                 '标准化代码': normalized_code,
                 '股票名称': '',
@@ -1215,13 +1573,9 @@ class StockNameMatcher:
             }
 
         # 获取匹配的股票信息
-        stock_info = matched_stocks.iloc[0]
-        current_price = stock_info['最新价']
-
-        # 计算价格差异
-        price_diff = None
-        if reference_price and not pd.isna(reference_price) and not pd.isna(current_price):
-            price_diff = abs(float(current_price) - float(reference_price))
+        index = self._index
+        stock_name = index.get_value(row, '名称')
+        current_price = index.get_value(row, '最新价', np.nan)
 
         # 判断匹配类型
         match_type = '代码精确匹配' if original_code == normalized_code else '代码标准化匹配'
@@ -1229,26 +1583,26 @@ class StockNameMatcher:
         # 基础结果
         result = {
             '原始代码': input_code,
-            '参考价格': reference_price,
+            '参考价格': None,
             '匹配状态': '匹配成功',
             '标准化代码': normalized_code,
-            '股票代码': stock_info['代码'],
-            '股票名称': stock_info['名称'],
+            '股票代码': index.get_value(row, '代码'),
+            '股票名称': stock_name,
             '当前价格': current_price,
-            '价格差异': price_diff,
+            '价格差异': None,
             '匹配类型': match_type,
-            '涨跌幅': stock_info.get('涨跌幅', ''),
-            '涨跌额': stock_info.get('涨跌额', ''),
-            '成交量': stock_info.get('成交量', ''),
-            '成交额': stock_info.get('成交额', ''),
-            '市盈率': stock_info.get('市盈率-动态', ''),
-            '市净率': stock_info.get('市净率', '')
+            '涨跌幅': index.get_value(row, '涨跌幅'),
+            '涨跌额': index.get_value(row, '涨跌额'),
+            '成交量': index.get_value(row, '成交量'),
+            '成交额': index.get_value(row, '成交额'),
+            '市盈率': index.get_value(row, '市盈率-动态'),
+            '市净率': index.get_value(row, '市净率')
         }
 
         # 如果启用交叉验证，添加验证信息
         if enable_cross_validation:
-            logger.info(f"开始交叉验证股票信息: {normalized_code} - {stock_info['名称']}")
-            validation_result = self.cross_validate_stock_info(normalized_code, stock_info['名称'])
+            logger.info(f"开始交叉验证股票信息: {normalized_code} - {stock_name}")
+            validation_result = self.cross_validate_stock_info(normalized_code, stock_name)
 
             result.update({
                 '验证置信度': f"{validation_result['confidence_score']:.1f}%",
@@ -1264,7 +1618,112 @@ class StockNameMatcher:
                 result['匹配类型'] += ' - 建议人工确认'
 
         return result
-    
+
+    def match_stock_codes_bulk(self, input_df: pd.DataFrame, enable_cross_validation: bool = False) -> pd.DataFrame:
+        """
+        批量补全股票代码：整列标准化后通过代码表一次性关联股票列表，逐列构建结果
+
+        结果的列和'匹配状态'/'匹配类型'取值与逐行调用 match_stock_code 一致，
+        交叉验证时验证列由 cross_validate_codes_bulk 整列计算
+
+        Args:
+            input_df: 包含'股票代码'和'参考价格'列的数据框（read_excel_file 的输出）
+            enable_cross_validation: 是否启用多数据源交叉验证
+
+        Returns:
+            pd.DataFrame: 代码补全结果
+        """
+        index = self._index
+        size = len(input_df)
+        raw_codes = input_df['股票代码']
+        if '参考价格' in input_df.columns:
+            reference_prices = input_df['参考价格']
+        else:
+            reference_prices = pd.Series([None] * size, index=input_df.index, dtype=object)
+
+        # 空代码不产生结果（与 match_stock_code 返回空字典一致）
+        empty = raw_codes.isna().to_numpy() | raw_codes.isin([0, '']).to_numpy()
+
+        # 整列标准化、验证并通过代码表查找行位置
+        normalized, valid = normalize_code_series(raw_codes)
+        values = np.where(valid, codes_to_int(normalized), -1)
+        rows = index.lookup_codes(values)
+        found = rows >= 0
+        invalid = ~valid
+        not_found = valid & ~found
+        take = np.where(found, rows, 0)
+
+        def column(values_by_row, failed_value):
+            """按行位置取值，未匹配成功的行填充指定值"""
+            out = np.empty(size, dtype=object)
+            out[:] = failed_value
+            if found.any():
+                out[found] = values_by_row[take[found]]
+            return out
+
+        def quote_column(name):
+            """行情列：股票列表缺少该列时为空字符串，未匹配成功的行为缺失值"""
+            values_by_row = index.columns.get(name)
+            if values_by_row is None:
+                values_by_row = np.full(max(index.size, 1), '', dtype=object)
+            return column(values_by_row, np.nan)
+
+        # 价格差异：参考价格有效（非空、非0）且当前价格有效时计算
+        reference = pd.to_numeric(reference_prices, errors='coerce').to_numpy(dtype=np.float64)
+        current = np.where(found, index.prices[take], np.nan) if index.size else np.full(size, np.nan)
+        has_diff = found & ~np.isnan(reference) & (reference != 0) & ~np.isnan(current)
+        price_diff = np.empty(size, dtype=object)
+        price_diff[:] = ''
+        price_diff[found] = None
+        price_diff[has_diff] = np.abs(current[has_diff] - reference[has_diff])
+
+        stripped = raw_codes.astype(str).str.strip().to_numpy(dtype=object)
+        normalized_values = normalized.to_numpy(dtype=object)
+        match_type = np.select(
+            [invalid, not_found, stripped == normalized_values],
+            ['格式验证失败', '代码不存在', '代码精确匹配'],
+            default='代码标准化匹配'
+        ).astype(object)
+        status = np.select([invalid, not_found], ['代码格式无效', '未找到匹配'], default='匹配成功').astype(object)
+
+        result = {
+            '原始代码': raw_codes.to_numpy(dtype=object),
+            '参考价格': reference_prices.to_numpy(dtype=object),
+            '匹配状态': status,
+            '标准化代码': normalized_values,
+        }
+        if found.any():
+            result['股票代码'] = column(index.columns['代码'], np.nan)
+        result['股票名称'] = column(index.names, '')
+        result['当前价格'] = column(index.columns.get('最新价', index.prices), '')
+        result['价格差异'] = price_diff
+        result['匹配类型'] = match_type
+        if found.any():
+            for output_col, source_col in [('涨跌幅', '涨跌幅'), ('涨跌额', '涨跌额'), ('成交量', '成交量'),
+                                           ('成交额', '成交额'), ('市盈率', '市盈率-动态'), ('市净率', '市净率')]:
+                result[output_col] = quote_column(source_col)
+
+        if enable_cross_validation and found.any():
+            validation = self.cross_validate_codes_bulk(normalized_values[found], result['股票名称'][found])
+            for col in validation.columns:
+                result[col] = np.full(size, np.nan, dtype=object)
+                result[col][found] = validation[col].to_numpy(dtype=object)
+
+            # 验证置信度低于50%时提示人工确认
+            low_confidence = np.zeros(size, dtype=bool)
+            low_confidence[found] = validation['验证数据源数'].to_numpy() * 2 < len(CROSS_VALIDATION_SOURCES)
+            status[low_confidence] = '匹配成功(低置信度)'
+            match_type[low_confidence] = match_type[low_confidence] + ' - 建议人工确认'
+            logger.info(f"批量交叉验证完成: {int(found.sum())} 行, 低置信度 {int(low_confidence.sum())}")
+
+        result_df = pd.DataFrame(result)
+        if empty.any():
+            result_df.loc[empty, :] = np.nan
+
+        logger.info(f"批量补全完成: {size} 行, 成功 {int(found.sum())}, "
+                    f"格式无效 {int(invalid.sum())}, 代码不存在 {int(not_found.sum())}")
+        return result_df
+
     def process_excel_file(self, file_path: str, output_path: str = None,
                           name_column: str = None, price_column: str = None, code_column: str = None) -> str:
         """
@@ -1307,61 +1766,16 @@ class StockNameMatcher:
         Returns:
             str: 输出文件路径
         """
-        
-        # 准备结果数据
-        results = []
-        
         logger.info("开始进行股票名称匹配...")
-        
-        for idx, row in input_df.iterrows():
-            logger.info(f"处理第 {idx + 1}/{len(input_df)} 行: {row['原始名称']}")
-            
-            # 进行匹配
-            matches = self.match_stock_name(
-                row['原始名称'], 
-                use_price=row['参考价格'] is not None,
-                reference_price=row['参考价格']
-            )
-            
-            if matches:
-                # 取最佳匹配
-                best_match = matches[0]
-                results.append({
-                    '原始名称': row['原始名称'],
-                    '参考价格': row['参考价格'],
-                    '匹配股票代码': best_match['股票代码'],
-                    '匹配股票名称': best_match['股票名称'],
-                    '当前价格': best_match['最新价'],
-                    '匹配类型': best_match['匹配类型'],
-                    '匹配度': best_match['匹配度'],
-                    '价格差异': best_match['价格差异'],
-                    '备选1_代码': matches[1]['股票代码'] if len(matches) > 1 else '',
-                    '备选1_名称': matches[1]['股票名称'] if len(matches) > 1 else '',
-                    '备选2_代码': matches[2]['股票代码'] if len(matches) > 2 else '',
-                    '备选2_名称': matches[2]['股票名称'] if len(matches) > 2 else '',
-                })
-            else:
-                results.append({
-                    '原始名称': row['原始名称'],
-                    '参考价格': row['参考价格'],
-                    '匹配股票代码': '',
-                    '匹配股票名称': '未找到匹配',
-                    '当前价格': '',
-                    '匹配类型': '',
-                    '匹配度': 0,
-                    '价格差异': '',
-                    '备选1_代码': '',
-                    '备选1_名称': '',
-                    '备选2_代码': '',
-                    '备选2_名称': '',
-                })
-            
-            # 添加延迟避免API限制
-            time.sleep(0.1)
-        
+        if self.workers and self.workers > 1:
+            # 多进程处理：股票列表只传给工作进程一次，名称按块分发
+            from performance_optimizer import PerformanceOptimizer
+            optimizer = PerformanceOptimizer(self, max_workers=self.workers)
+            result_df = optimizer.optimize_name_matching(input_df)
+        else:
+            result_df = self.match_stock_names_batch(input_df)
+
         # 保存结果
-        result_df = pd.DataFrame(results)
-        
         if output_path is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_path = f"stock_match_results_{timestamp}.csv"
@@ -1405,16 +1819,25 @@ class StockNameMatcher:
         if '股票代码' not in input_df.columns or input_df['股票代码'].isna().all():
             raise ValueError("未找到有效的股票代码列，请检查文件格式或指定正确的列名")
 
-        # 选择处理方式
-        if use_optimization and len(input_df) > 10:
-            logger.info("🚀 使用性能优化模式处理...")
-            results = self._process_with_optimization(input_df, enable_cross_validation)
+        # 按需行情模式只查询文件中出现的股票
+        if self.demand_quotes:
+            normalized, valid = normalize_code_series(input_df['股票代码'])
+            self.refresh_quotes(normalized[valid].tolist())
+
+        # 选择处理方式：性能优化器分批并发地整列关联股票列表（交叉验证也按列计算），
+        # 关闭性能优化时不验证的整列关联，需要交叉验证的逐行处理
+        if use_optimization:
+            logger.info("⚡ 使用性能优化器分批处理...")
+            result_df = self._process_with_optimization(input_df, enable_cross_validation)
+        elif not enable_cross_validation:
+            logger.info("⚡ 使用批量关联模式处理...")
+            result_df = self.match_stock_codes_bulk(input_df, enable_cross_validation)
         else:
             logger.info("📝 使用标准模式处理...")
             results = self._process_standard(input_df, enable_cross_validation)
+            result_df = pd.DataFrame(results)
 
         # 保存结果
-        result_df = pd.DataFrame(results)
 
         # 确保股票代码相关列保持字符串格式，保留前导零
         code_columns = ['标准化代码', '股票代码']
@@ -1451,15 +1874,17 @@ class StockNameMatcher:
 
         return output_path
 
-    def _process_with_optimization(self, input_df: pd.DataFrame, enable_cross_validation: bool) -> list:
+    def _process_with_optimization(self, input_df: pd.DataFrame, enable_cross_validation: bool) -> pd.DataFrame:
         """使用性能优化处理"""
         try:
             from performance_optimizer import PerformanceOptimizer
-            optimizer = PerformanceOptimizer(self)
-            return optimizer.optimize_stock_matching(input_df, enable_cross_validation)
         except ImportError:
-            logger.warning("性能优化器不可用，回退到标准模式")
-            return self._process_standard(input_df, enable_cross_validation)
+            logger.warning("性能优化器不可用，回退到批量关联模式")
+            return self.match_stock_codes_bulk(input_df, enable_cross_validation)
+        # 优化器及其线程池在多次处理之间复用，调整后的批大小和并发数也随之保留
+        if getattr(self, '_optimizer', None) is None:
+            self._optimizer = PerformanceOptimizer(self)
+        return self._optimizer.optimize_stock_matching(input_df, enable_cross_validation)
 
     def _process_standard(self, input_df: pd.DataFrame, enable_cross_validation: bool) -> list:
         """标准处理模式"""
@@ -1478,14 +1903,6 @@ class StockNameMatcher:
 
             results.append(match_result)
 
-            # 减少延迟，提高处理速度
-            if len(input_df) > 100:
-                time.sleep(0.05)  # 大文件减少延迟
-            elif len(input_df) > 50:
-                time.sleep(0.08)  # 中等文件适中延迟
-            else:
-                time.sleep(0.1)   # 小文件保持原延迟
-
         return results
 
 
@@ -1499,8 +1916,14 @@ def main():
     parser.add_argument('-c', '--code-column', help='股票代码列名')
     parser.add_argument('--mode', choices=['auto', 'name', 'code'], default='auto',
                        help='处理模式: auto(自动检测), name(名称匹配), code(代码补全)')
-    parser.add_argument('--api', choices=['akshare', 'sina', 'tencent', 'eastmoney', 'netease', 'xueqiu', 'local'], default='akshare',
-                       help='数据源API: akshare(默认), sina(新浪), tencent(腾讯), eastmoney(东方财富), netease(网易), xueqiu(雪球), local(本地)')
+    parser.add_argument('--api', choices=data_source_registry.names(), default='akshare',
+                       help=f'数据源API: {data_source_registry.describe()}')
+    parser.add_argument('--workers', type=int,
+                       help='名称匹配使用的进程数，默认在当前进程内处理')
+    parser.add_argument('--demand-quotes', action=argparse.BooleanOptionalAction, default=None,
+                       help='按需行情：名称取自本地股票列表，只查询输入文件中股票的行情（默认仅雪球启用）')
+    parser.add_argument('--price-band', type=float,
+                       help='名称匹配时的价格区间比例，例如0.1表示只匹配最新价在参考价格±10%%内的股票')
     
     args = parser.parse_args()
     
@@ -1509,7 +1932,8 @@ def main():
     
     try:
         # 创建匹配器，使用指定的API源
-        matcher = StockNameMatcher(api_source=args.api)
+        matcher = StockNameMatcher(api_source=args.api, price_band=args.price_band, workers=args.workers,
+                                   demand_quotes=args.demand_quotes)
 
         # 根据模式处理文件
         if args.mode == 'code':
@@ -59,6 +59,23 @@ def main():
         ("tests/test_file_format.py", "文件格式检测测试"),
         ("tests/test_upload_simulation.py", "文件上传模拟测试"),
         ("tests/test_enhanced_features.py", "增强功能测试"),
+        ("tests/test_stock_index.py", "股票查找索引测试"),
+        ("tests/test_stock_codes.py", "股票代码标准化测试"),
+        ("tests/test_code_completion.py", "批量代码补全测试"),
+        ("tests/test_name_matching.py", "批量名称匹配测试"),
+        ("tests/test_name_normalizer.py", "股票名称标准化测试"),
+        ("tests/test_match_cache.py", "匹配结果缓存测试"),
+        ("tests/test_universe_cache.py", "股票列表快照缓存测试"),
+        ("tests/test_snapshot_store.py", "股票列表磁盘快照测试"),
+        ("tests/test_demand_quotes.py", "按需行情测试"),
+        ("tests/test_hedged_loader.py", "数据源对冲加载测试"),
+        ("tests/test_performance_optimizer.py", "性能优化器测试"),
+        ("tests/test_throttle_policy.py", "数据源限流策略测试"),
+        ("tests/test_data_sources.py", "数据源注册表测试"),
+        ("tests/test_http_session.py", "数据源HTTP会话池测试"),
+        ("tests/test_batch_fetch.py", "分批行情并发获取测试"),
+        ("tests/test_quote_parsers.py", "行情列式解析测试"),
+        ("tests/test_xueqiu_bulk.py", "雪球批量加载测试"),
         ("tests/test_upload_request.py", "Web上传请求测试"),
         ("tests/test_web_app.py", "完整Web应用测试"),
     ]
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试分批行情并发获取（使用模拟的行情接口，不访问外网）：
+1. 新浪、腾讯、网易加载结果按批次顺序合并，与股票代码列表顺序一致
+2. 同时进行的请求数达到但不超过数据源的并发上限
+3. 单个批次失败不影响其他批次，不完整的列表不保存为快照
+4. 使用默认限流间隔时各连接同时开始请求，不按间隔依次排队（使用不前进的时钟记录限流等待）
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import shutil
+import tempfile
+import threading
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_stock_data import LocalStockData
+from snapshot_store import SnapshotStore
+from throttle_policy import ThrottlePolicy
+from stock_name_matcher import StockDataAPI
+
+# 模拟接口的单次往返时间（秒）
+LATENCY = 0.05
+
+
+class _Response:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+        self.encoding = None
+
+
+class _FakeQuotes:
+    """
+    按请求地址中的代码生成新浪/腾讯/网易格式的行情，记录同时进行的请求数；
+    together 大于0时，前 together 个请求互相等待，都开始后才返回
+    """
+
+    def __init__(self, names, concurrency, fail_batches=(), together=0):
+        self.names = names
+        self.limit = concurrency
+        self.fail_batches = set(fail_batches)
+        self.together = together
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self._barrier = threading.Barrier(together, timeout=10) if together else None
+        self._lock = threading.Lock()
+
+    def concurrency(self, source):
+        return self.limit
+
+    def log_stats(self, source):
+        pass
+
+    def get(self, source, url, timeout=None, **kwargs):
+        with self._lock:
+            batch = self.requests
+            self.requests += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if batch < self.together:
+                try:
+                    self._barrier.wait()
+                except threading.BrokenBarrierError:
+                    return _Response('', status_code=500)
+            time.sleep(LATENCY)
+            if batch in self.fail_batches:
+                return _Response('', status_code=500)
+            symbols = re.split(r'[=/]', url)[-1].split(',')
+            return _Response(self._render(source, symbols))
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def _render(self, source, symbols):
+        if source == 'sina':
+            return '\n'.join(f'var hq_str_{symbol}="{self.names[symbol[2:]]},10.00,9.90,10.10,10.20,9.80,10.10,10.11,'
+                             f'1000,10100.00";' for symbol in symbols)
+        if source == 'tencent':
+            return '\n'.join(f'v_{symbol}="1~{self.names[symbol[2:]]}~{symbol[2:]}~10.10~9.90~10.00~1000~500~500~10.09~";'
+                             for symbol in symbols)
+        data = {symbol: {'name': self.names[symbol[1:]], 'price': 10.1, 'percent': 0.02, 'updown': 0.2,
+                         'volume': 1000, 'turnover': 10100} for symbol in symbols}
+        return f"_ntes_quote_callback({json.dumps(data, ensure_ascii=False)});"
+
+
+def _make_api(source, fake):
+    api = StockDataAPI(source)
+    api.http = fake
+    api.throttle = ThrottlePolicy({source: 0})
+    # 每次都从模拟接口加载，不读写磁盘快照
+    api.snapshots = None
+    return api
+
+
+def test_results_merged_in_order():
+    """各数据源的结果按批次顺序合并"""
+    print("=== 测试结果按顺序合并 ===")
+
+    stock_list = LocalStockData().get_stock_list()
+    names = dict(zip(stock_list['代码'], stock_list['名称']))
+    for source in ['sina', 'tencent', 'netease']:
+        fake = _FakeQuotes(names, concurrency=8)
+        result = _make_api(source, fake).load_stock_list()
+        assert result['代码'].tolist() == stock_list['代码'].tolist(), source
+        assert result['名称'].tolist() == stock_list['名称'].tolist(), source
+        print(f"{source}: {fake.requests} 个批次, {len(result)} 只股票, 最大并发 {fake.max_active}")
+
+
+def test_concurrency_limit():
+    """同时进行的请求数达到并发上限且不超过上限"""
+    print("\n=== 测试并发上限 ===")
+
+    stock_list = LocalStockData().get_stock_list()
+    names = dict(zip(stock_list['代码'], stock_list['名称']))
+    # 前8个请求同时进行时才返回，依次请求时这些批次失败
+    fake = _FakeQuotes(names, concurrency=8, together=8)
+    api = _make_api('tencent', fake)
+    result = api.load_stock_list()
+
+    assert len(result) == len(stock_list) and not api.incomplete
+    assert fake.max_active == 8
+    print(f"腾讯 {fake.requests} 个批次, 最大并发 {fake.max_active}")
+
+
+def test_failed_batch_skipped():
+    """单个批次失败只缺少该批次的股票"""
+    print("\n=== 测试批次失败 ===")
+
+    stock_list = LocalStockData().get_stock_list()
+    names = dict(zip(stock_list['代码'], stock_list['名称']))
+    fake = _FakeQuotes(names, concurrency=1, fail_batches={1})
+    result = _make_api('sina', fake).load_stock_list()
+    expected = stock_list['代码'].tolist()
+    assert result['代码'].tolist() == expected[:800] + expected[1600:]
+    print(f"第2批失败, 其余 {len(result)} 只股票按顺序保留")
+
+    # 有批次失败的列表不保存为快照，全部批次成功时才保存
+    directory = tempfile.mkdtemp()
+    try:
+        store = SnapshotStore(directory, ttl=60)
+        api = _make_api('sina', _FakeQuotes(names, concurrency=4, fail_batches={1}))
+        api.snapshots = store
+        assert len(api.load_stock_list()) == len(expected) - 800 and api.incomplete
+        assert not os.path.exists(store.path('sina')) and store.stats()['writes'] == 0
+
+        api = _make_api('sina', _FakeQuotes(names, concurrency=4))
+        api.snapshots = store
+        assert len(api.load_stock_list()) == len(expected) and not api.incomplete
+        assert os.path.exists(store.path('sina'))
+    finally:
+        shutil.rmtree(directory)
+    print("不完整的列表未保存快照")
+
+
+def test_default_throttle_not_serialized():
+    """默认限流间隔下并发请求不按间隔依次开始"""
+    print("\n=== 测试默认限流 ===")
+
+    stock_list = LocalStockData().get_stock_list()
+    names = dict(zip(stock_list['代码'], stock_list['名称']))
+    fake = _FakeQuotes(names, concurrency=8, together=8)
+    api = _make_api('tencent', fake)
+    # 时钟不前进：每次等待都预约下一个令牌，等待时间只取决于请求的先后，与线程调度无关
+    sleeps = []
+    api.throttle = ThrottlePolicy(clock=lambda: 0.0, sleep=sleeps.append)
+    result = api.load_stock_list()
+    assert len(result) == len(stock_list) and not api.incomplete
+
+    # 前8个请求不等待，之后第 k 个请求最晚在 k / (并发数 / 间隔) 秒开始
+    interval = api.throttle.interval('tencent')
+    waited = fake.requests - 8
+    assert fake.max_active == 8
+    assert len(sleeps) == waited
+    assert abs(max(sleeps) - waited * interval / 8) < 1e-9
+    # 按间隔依次开始，最后一个请求需要等待 (批次数 - 1) × 间隔
+    serialized = (fake.requests - 1) * interval
+    print(f"腾讯 {fake.requests} 个批次: 最后一个请求在 {max(sleeps):.2f} 秒开始, 按间隔依次开始需要 {serialized:.2f} 秒")
+
+
+if __name__ == "__main__":
+    try:
+        test_results_merged_in_order()
+        test_concurrency_limit()
+        test_failed_batch_skipped()
+        test_default_throttle_not_serialized()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
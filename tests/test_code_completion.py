@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量代码补全模式：
+1. 批量关联结果与逐行 match_stock_code 一致
+2. process_stock_codes 默认使用批量模式
+3. 批量交叉验证的共识列与逐行 cross_validate_stock_info 一致
+"""
+
+import sys
+import os
+import time
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from stock_name_matcher import StockNameMatcher
+from stock_codes import normalize_code_series
+from universe_cache import UniverseCache
+
+
+def _to_csv(df):
+    """按输出文件的格式序列化结果，用于比较"""
+    df = df.copy()
+    for col in ['标准化代码', '股票代码']:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+    return df.to_csv(index=False)
+
+
+def test_bulk_matches_row_by_row():
+    """批量关联与逐行匹配结果一致"""
+    print("=== 测试批量关联与逐行匹配一致 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    input_df = pd.DataFrame({
+        '股票代码': ["'852'", '"2208"', "'3018'", '688001', "'301223'", 'nan', '000000',
+                 '609999', '1', '000001', 'abc', '6801', '000852'],
+        '参考价格': [6.87, None, 0, np.nan, 12.36, 1, 2, 3, 4, 5, 6, 7, 8],
+    })
+    input_df['参考价格'] = pd.to_numeric(input_df['参考价格'], errors='coerce')
+
+    bulk = matcher.match_stock_codes_bulk(input_df)
+    rows = pd.DataFrame([
+        matcher.match_stock_code(code, reference_price=price)
+        for code, price in zip(input_df['股票代码'], input_df['参考价格'])
+    ])
+
+    assert set(bulk.columns) == set(rows.columns)
+    assert _to_csv(bulk) == _to_csv(rows[bulk.columns])
+    print(bulk[['原始代码', '标准化代码', '股票名称', '匹配状态', '匹配类型']].to_string(index=False))
+
+
+def test_process_stock_codes_bulk_default():
+    """不启用交叉验证时 process_stock_codes 使用批量模式"""
+    print("\n=== 测试批量模式处理大文件 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    # 北交所等不在有效前缀表中的代码会被判为格式无效，这里只取有效代码
+    universe = matcher.stock_list['代码']
+    universe = universe[normalize_code_series(universe)[1]]
+    # 使用券商导出常见的单引号包裹格式
+    codes = "'" + universe.sample(100000, replace=True, random_state=1)
+    test_file = "test_bulk_codes.csv"
+    output_file = "test_bulk_result.csv"
+    pd.DataFrame({'股票代码': codes, '价格': 10.0}).to_csv(test_file, index=False, encoding='utf-8-sig')
+
+    try:
+        start = time.perf_counter()
+        matcher.process_stock_codes(test_file, output_file)
+        print(f"100000 行处理耗时（含文件读写）: {time.perf_counter() - start:.2f} 秒")
+
+        result = pd.read_csv(output_file, dtype={'标准化代码': str, '股票代码': str})
+        assert len(result) == 100000
+        assert (result['匹配状态'] == '匹配成功').all()
+        assert (result['标准化代码'] == result['股票代码']).all()
+    finally:
+        for file in [test_file, output_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+
+def test_bulk_cross_validation():
+    """批量交叉验证：每个数据源关联一次，共识列与逐行验证一致"""
+    print("\n=== 测试批量交叉验证 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    stock_list = matcher.stock_list
+    renamed = stock_list.copy()
+    renamed.loc[renamed.index[::3], '名称'] = renamed['名称'][::3] + '(旧)'
+    sources = {'akshare': stock_list, 'sina': stock_list, 'tencent': renamed,
+               'eastmoney': stock_list.iloc[::2]}
+    calls = []
+
+    def loader(source):
+        calls.append(source)
+        return sources[source]
+
+    matcher.universe_cache = UniverseCache(ttl=60)
+    matcher._load_universe = loader
+
+    input_df = pd.DataFrame({
+        '股票代码': stock_list['代码'].sample(300, random_state=2).tolist() + ['000000', 'abc', '000001'],
+        '参考价格': 10.0,
+    })
+    bulk = matcher.match_stock_codes_bulk(input_df, enable_cross_validation=True)
+    assert sorted(calls) == sorted(sources)
+
+    columns = ['验证置信度', '名称一致性', '验证数据源数', '推荐名称', '匹配状态', '匹配类型']
+    for i, code in enumerate(input_df['股票代码']):
+        expected = matcher._match_stock_code(code, enable_cross_validation=True)
+        for col in columns:
+            if col in expected:
+                assert bulk.loc[i, col] == expected[col], (code, col)
+            else:
+                assert pd.isna(bulk.loc[i, col]) or col in ('匹配状态', '匹配类型'), (code, col)
+    assert (bulk['匹配状态'] == '匹配成功(低置信度)').sum() == 0
+    print(bulk[['标准化代码', '股票名称'] + columns[:4]].head(5).to_string(index=False))
+
+    # 5万行只做每个数据源一次关联
+    codes = stock_list['代码'].sample(50000, replace=True, random_state=3).reset_index(drop=True)
+    large = pd.DataFrame({'股票代码': codes, '参考价格': 10.0})
+    start = time.perf_counter()
+    matcher.match_stock_codes_bulk(large)
+    base = time.perf_counter() - start
+    start = time.perf_counter()
+    result = matcher.match_stock_codes_bulk(large, enable_cross_validation=True)
+    elapsed = time.perf_counter() - start
+    assert len(result) == 50000 and len(calls) == len(sources)
+    print(f"50000 行: 不验证 {base:.2f} 秒, 交叉验证 {elapsed:.2f} 秒")
+
+
+if __name__ == "__main__":
+    try:
+        test_bulk_matches_row_by_row()
+        test_process_stock_codes_bulk_default()
+        test_bulk_cross_validation()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据源注册表：
+1. 内置数据源全部注册，命令行 --api 的可选值来自注册表
+2. 使用本地数据源的命令行运行不导入 akshare 和 requests
+3. 数据源的依赖包在第一次使用时才导入，缺少依赖包时提示安装并回退到本地数据源
+4. 可以注册自定义数据源
+"""
+
+import sys
+import os
+import tempfile
+import subprocess
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import stock_name_matcher
+from data_sources import registry
+from hedged_loader import HedgedLoader
+from stock_name_matcher import StockDataAPI, StockNameMatcher
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_builtin_sources():
+    """内置数据源全部注册"""
+    print("=== 测试内置数据源 ===")
+
+    expected = {'akshare', 'sina', 'tencent', 'eastmoney', 'netease', 'xueqiu', 'local'}
+    assert set(registry.names()) == expected
+    assert registry.get('akshare').requires == ('akshare',)
+    assert registry.get('local').requires == ()
+    assert 'local(本地)' in registry.describe()
+    print(f"已注册: {registry.describe()}")
+
+
+def test_local_run_skips_network_packages():
+    """本地数据源的命令行运行不导入 akshare 和 requests"""
+    print("\n=== 测试本地数据源不导入网络依赖 ===")
+
+    work_dir = tempfile.mkdtemp()
+    input_file = os.path.join(work_dir, 'test_data_sources_input.csv')
+    output_file = os.path.join(work_dir, 'test_data_sources_output.csv')
+    pd.DataFrame({'股票代码': ['600000', '000001']}).to_csv(input_file, index=False, encoding='utf-8-sig')
+    script = (
+        "import sys\n"
+        f"sys.argv = ['stock_name_matcher.py', {input_file!r}, '-o', {output_file!r}, '--api', 'local']\n"
+        "import stock_name_matcher\n"
+        "stock_name_matcher.main()\n"
+        "print('MODULES', 'akshare' in sys.modules, 'requests' in sys.modules)\n"
+    )
+    try:
+        result = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_DIR, capture_output=True,
+                                text=True, timeout=300)
+        assert result.returncode == 0, result.stderr[-2000:]
+        assert 'MODULES False False' in result.stdout, result.stdout[-2000:]
+        output = pd.read_csv(output_file, dtype=str)
+        assert output['股票代码'].tolist() == ['600000', '000001']
+    finally:
+        for file in [input_file, output_file]:
+            if os.path.exists(file):
+                os.remove(file)
+        os.rmdir(work_dir)
+    print("本地数据源运行完成，未导入 akshare 和 requests")
+
+
+def test_requirements_imported_on_first_use():
+    """依赖包在第一次使用时才导入，缺少时回退到本地数据源"""
+    print("\n=== 测试依赖包延迟导入 ===")
+
+    calls = []
+
+    @registry.register('test_lazy', requires=('wave',), description='测试', snapshot=False)
+    def load_lazy(api):
+        calls.append(api.api_source)
+        return pd.DataFrame({'代码': ['600000'], '名称': ['测试银行']})
+
+    registry.register('test_missing', requires=('no_such_package_for_test',), snapshot=False)(load_lazy)
+    saved_wave = sys.modules.pop('wave', None)
+    try:
+        assert 'wave' not in sys.modules
+        stock_list = StockDataAPI('test_lazy').load_stock_list()
+        assert 'wave' in sys.modules
+        assert calls == ['test_lazy'] and stock_list['名称'].tolist() == ['测试银行']
+
+        try:
+            StockDataAPI('test_missing').load_stock_list()
+            assert False, "缺少依赖包时应抛出 ImportError"
+        except ImportError as e:
+            assert 'pip install no_such_package_for_test' in str(e)
+            print(f"缺少依赖包: {e}")
+
+        # 匹配器加载失败时回退到本地数据源（不启动备用链中的网络数据源）
+        saved_hedger = stock_name_matcher.get_hedged_loader
+        stock_name_matcher.get_hedged_loader = lambda: HedgedLoader(fallback=[])
+        try:
+            matcher = StockNameMatcher(api_source='test_missing')
+        finally:
+            stock_name_matcher.get_hedged_loader = saved_hedger
+        assert matcher.api_source == 'local' and len(matcher.stock_list) > 1000
+    finally:
+        registry.unregister('test_lazy')
+        registry.unregister('test_missing')
+        if saved_wave is not None:
+            sys.modules['wave'] = saved_wave
+    print("依赖包在第一次使用时导入")
+
+
+if __name__ == "__main__":
+    try:
+        test_builtin_sources()
+        test_local_run_skips_network_packages()
+        test_requirements_imported_on_first_use()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试按需行情（使用模拟的行情接口，不访问外网）：
+1. 指定股票时新浪、腾讯、网易只查询这些股票，请求数为 股票数/每批数量
+2. 按需模式处理文件时股票名称取自本地列表，只查询并更新文件中出现的股票
+3. 行情获取失败（回退到本地数据或数据源抛出异常）时不覆盖原有行情
+4. 默认只有雪球使用按需行情，命令行和Web应用可以指定
+"""
+
+import re
+import sys
+import os
+import threading
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import stock_name_matcher
+from data_sources import registry
+from local_stock_data import LocalStockData
+from throttle_policy import ThrottlePolicy
+from stock_name_matcher import StockDataAPI, StockNameMatcher, QUOTE_BATCH_SIZES
+
+
+class _Response:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+        self.encoding = None
+
+
+class _FakeQuotes:
+    """按请求地址中的代码生成新浪/腾讯格式的行情（最新价 10.10），记录每次请求的代码"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.requested = []
+        self._lock = threading.Lock()
+
+    def concurrency(self, source):
+        return 4
+
+    def log_stats(self, source):
+        pass
+
+    def get(self, source, url, timeout=None, **kwargs):
+        symbols = re.split(r'[=/]', url)[-1].split(',')
+        with self._lock:
+            self.requested.append([symbol[-6:] for symbol in symbols])
+        if self.fail:
+            return _Response('', status_code=500)
+        if source == 'sina':
+            return _Response('\n'.join(f'var hq_str_{symbol}="测试,10.00,9.90,10.10,10.20,9.80,10.10,10.11,'
+                                       f'1000,10100.00";' for symbol in symbols))
+        if source == 'tencent':
+            return _Response('\n'.join(f'v_{symbol}="1~测试~{symbol[2:]}~10.10~9.90~10.00~1000~500~500~10.09~";'
+                                       for symbol in symbols))
+        return _Response('_ntes_quote_callback({' + ','.join(
+            f'"{symbol}": {{"name": "测试", "price": 10.1, "percent": 0.02, "updown": 0.2, '
+            f'"volume": 1000, "turnover": 10100}}' for symbol in symbols) + '});')
+
+
+def _patch(fake):
+    """让新建的 StockDataAPI 使用模拟接口，不限流，不读写磁盘快照"""
+    saved = (stock_name_matcher.get_http_pool, stock_name_matcher.get_throttle_policy,
+             stock_name_matcher.get_snapshot_store)
+    stock_name_matcher.get_http_pool = lambda: fake
+    stock_name_matcher.get_throttle_policy = lambda: ThrottlePolicy({'sina': 0, 'tencent': 0, 'netease': 0})
+    stock_name_matcher.get_snapshot_store = lambda: None
+    return saved
+
+
+def _restore(saved):
+    (stock_name_matcher.get_http_pool, stock_name_matcher.get_throttle_policy,
+     stock_name_matcher.get_snapshot_store) = saved
+
+
+def test_only_requested_codes_fetched():
+    """指定股票时只查询这些股票，按数据源的每批数量分批"""
+    print("=== 测试只查询指定的股票 ===")
+
+    codes = LocalStockData().get_stock_list()['代码'].tolist()[:250]
+    for source in ['sina', 'tencent', 'netease']:
+        fake = _FakeQuotes()
+        saved = _patch(fake)
+        try:
+            result = StockDataAPI(source, symbols=codes).load_stock_list()
+        finally:
+            _restore(saved)
+        assert len(fake.requested) == -(-len(codes) // QUOTE_BATCH_SIZES[source]), source
+        assert sorted(code for batch in fake.requested for code in batch) == sorted(codes), source
+        assert result['代码'].tolist() == codes, source
+        print(f"{source}: {len(codes)} 只股票, {len(fake.requested)} 次请求")
+
+
+def test_process_file_updates_input_codes():
+    """按需模式处理文件：只查询并更新文件中出现的股票"""
+    print("\n=== 测试按需模式处理文件 ===")
+
+    stock_list = LocalStockData().get_stock_list()
+    matcher = StockNameMatcher(api_source='tencent', stock_list=stock_list, demand_quotes=True)
+    assert matcher.demand_quotes and matcher.api_manager.api_source == 'local'
+    before = matcher.stock_list.copy()
+
+    codes = ['600000', '000001', '300750']
+    test_file = "test_demand_quotes_codes.csv"
+    output_file = "test_demand_quotes_result.csv"
+    pd.DataFrame({'股票代码': codes + ['600000', 'abc']}).to_csv(test_file, index=False, encoding='utf-8-sig')
+
+    fake = _FakeQuotes()
+    saved = _patch(fake)
+    try:
+        matcher.process_stock_codes(test_file, output_file)
+        result = pd.read_csv(output_file, dtype={'标准化代码': str, '股票代码': str})
+    finally:
+        _restore(saved)
+        for file in [test_file, output_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+    # 重复的代码只查询一次，全部在一次请求中
+    assert fake.requested == [codes]
+    found = result[result['匹配状态'] == '匹配成功']
+    assert found['当前价格'].tolist() == [10.1] * 4
+    # 名称仍取自本地列表，其他股票的行情不变
+    expected_names = before.set_index('代码').loc[codes, '名称'].tolist()
+    assert found['股票名称'].tolist()[:3] == expected_names
+    others = ~matcher.stock_list['代码'].isin(codes)
+    pd.testing.assert_series_equal(pd.to_numeric(matcher.stock_list.loc[others, '最新价'], errors='coerce'),
+                                   pd.to_numeric(before.loc[others, '最新价'], errors='coerce'))
+    print(found[['股票代码', '股票名称', '当前价格']].to_string(index=False))
+
+
+def test_fallback_not_merged():
+    """行情获取失败回退到本地数据时不覆盖原有行情"""
+    print("\n=== 测试回退结果不合并 ===")
+
+    stock_list = LocalStockData().get_stock_list()
+    matcher = StockNameMatcher(api_source='sina', stock_list=stock_list, demand_quotes=True)
+    before = matcher.stock_list.copy()
+    fake = _FakeQuotes(fail=True)
+    saved = _patch(fake)
+    try:
+        updated = matcher.refresh_quotes(['600000', '000001'])
+    finally:
+        _restore(saved)
+
+    assert updated == 0 and len(fake.requested) == 1
+    pd.testing.assert_frame_equal(matcher.stock_list, before)
+
+    # 数据源无法连接时同样保留原有行情，文件照常处理
+    @registry.register('test_demand_unreachable', snapshot=False)
+    def load_unreachable(api):
+        raise ConnectionError("无法连接")
+
+    test_file = "test_demand_quotes_unreachable.csv"
+    output_file = "test_demand_quotes_unreachable_result.csv"
+    pd.DataFrame({'股票代码': ['600000', '000001']}).to_csv(test_file, index=False, encoding='utf-8-sig')
+    try:
+        matcher = StockNameMatcher(api_source='test_demand_unreachable', stock_list=stock_list, demand_quotes=True)
+        assert matcher.refresh_quotes(['600000']) == 0
+        pd.testing.assert_frame_equal(matcher.stock_list, before)
+        matcher.process_stock_codes(test_file, output_file)
+        result = pd.read_csv(output_file, dtype={'标准化代码': str, '股票代码': str})
+        assert (result['匹配状态'] == '匹配成功').all()
+    finally:
+        registry.unregister('test_demand_unreachable')
+        for file in [test_file, output_file]:
+            if os.path.exists(file):
+                os.remove(file)
+    print("行情获取失败，保留原有行情")
+
+
+def test_default_modes():
+    """默认只有雪球使用按需行情"""
+    print("\n=== 测试默认模式 ===")
+
+    stock_list = LocalStockData().get_stock_list()
+    assert StockNameMatcher(api_source='xueqiu', stock_list=stock_list).demand_quotes
+    assert not StockNameMatcher(api_source='sina', stock_list=stock_list).demand_quotes
+    assert not StockNameMatcher(api_source='local', stock_list=stock_list, demand_quotes=True).demand_quotes
+    assert not StockNameMatcher(api_source='xueqiu', stock_list=stock_list, demand_quotes=False).demand_quotes
+    print("雪球默认按需行情，其他数据源需要指定")
+
+
+if __name__ == "__main__":
+    try:
+        test_only_requested_codes_fetched()
+        test_process_file_updates_input_codes()
+        test_fallback_not_merged()
+        test_default_modes()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据源对冲加载（使用测试用的数据源，不访问外网）：
+1. 主数据源在对冲延迟内返回时不启动备用数据源
+2. 主数据源超过对冲延迟未返回时并行启动备用数据源，使用最先返回的结果并取消其余加载
+3. 数据源失败时立即启动下一个，全部失败时匹配器回退到本地数据源
+4. 胜出的数据源和各数据源的耗时记录在统计信息中
+5. 取消后分批获取不再发送剩余的请求，已获取的部分批次不保存为快照
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import stock_name_matcher
+from data_sources import registry
+from hedged_loader import HedgedLoader
+from snapshot_store import SnapshotStore
+from throttle_policy import ThrottlePolicy
+from stock_name_matcher import StockDataAPI, StockNameMatcher
+
+
+def _loader(delays, failing=()):
+    """测试用的加载函数：按 delays 等待（被取消时提前结束），记录启动顺序和是否被取消"""
+    launched = []
+    cancelled = {}
+
+    def load(source, cancel_event):
+        launched.append(source)
+        cancelled[source] = cancel_event.wait(delays[source])
+        if source in failing:
+            raise ValueError(f"{source} 不可用")
+        return f"{source} 的数据"
+    return load, launched, cancelled
+
+
+def _join_hedge_thread(source, timeout=5.0):
+    """等待数据源的加载线程结束"""
+    for thread in threading.enumerate():
+        if thread.name == f'{source}-hedge':
+            thread.join(timeout)
+            assert not thread.is_alive(), f"{source} 的加载线程未结束"
+
+
+def test_primary_within_delay():
+    """主数据源在对冲延迟内返回"""
+    print("=== 测试主数据源按时返回 ===")
+
+    hedger = HedgedLoader(fallback=['b', 'c'], hedge_delay=5.0)
+    load, launched, _ = _loader({'a': 0, 'b': 0, 'c': 0})
+    result = hedger.load(hedger.chain('a'), load)
+    assert result.source == 'a' and result.value == 'a 的数据'
+    assert launched == ['a'] and hedger.stats()['hedges'] == 0
+    print(f"主数据源 {result.latencies['a']:.2f} 秒返回，未启动备用数据源")
+
+
+def test_slow_primary_hedged():
+    """主数据源过慢时并行启动备用数据源，最先返回的胜出"""
+    print("\n=== 测试对冲慢数据源 ===")
+
+    # 主数据源一直阻塞到被取消，只能由对冲启动的 b 返回
+    hedger = HedgedLoader(fallback=['b', 'c'], hedge_delay=0.1)
+    load, launched, cancelled = _loader({'a': 60.0, 'b': 0, 'c': 60.0})
+    result = hedger.load(hedger.chain('a'), load)
+
+    assert result.source == 'b' and launched == ['a', 'b']
+    _join_hedge_thread('a')
+    assert cancelled['a'], "主数据源应被取消"
+    stats = hedger.stats()
+    assert stats['hedges'] == 1 and stats['sources']['b']['wins'] == 1
+    assert 'a' not in stats['sources']
+    print(f"由 {result.source} 返回，主数据源已取消，统计: {stats['sources']}")
+
+
+def test_failure_starts_next_immediately():
+    """失败时立即启动下一个，全部失败时 ok 为False"""
+    print("\n=== 测试失败后立即启动下一个 ===")
+
+    hedger = HedgedLoader(fallback=['b', 'local', 'c'], hedge_delay=2.0)
+    assert hedger.chain('a') == ['a', 'b', 'c']
+
+    load, launched, _ = _loader({'a': 0, 'b': 0, 'c': 0}, failing={'a'})
+    result = hedger.load(['a', 'b', 'c'], load)
+    assert result.source == 'b' and set(result.errors) == {'a'}
+    # b 因 a 失败而启动，没有等待对冲延迟
+    assert hedger.stats()['hedges'] == 0
+
+    load, launched, _ = _loader({'a': 0, 'b': 0, 'c': 0}, failing={'a', 'b', 'c'})
+    result = hedger.load(['a', 'b', 'c'], load)
+    assert not result.ok and launched == ['a', 'b', 'c']
+    assert hedger.source_stats('a')['failures'] == 2 and hedger.source_stats('b')['wins'] == 1
+    assert hedger.stats()['failures'] == 1
+    print(f"全部失败: {result.errors}")
+
+
+def test_matcher_uses_fastest_source():
+    """匹配器使用最先返回的数据源，全部失败时回退到本地数据源"""
+    print("\n=== 测试匹配器对冲加载 ===")
+
+    stock_list = pd.DataFrame({'代码': ['600000', '000001'], '名称': ['浦发银行', '平安银行'], '最新价': [10.0, 12.0]})
+
+    @registry.register('test_hedge_slow', snapshot=False)
+    def load_slow(api):
+        api.cancel_event.wait(5.0)
+        return stock_list
+
+    @registry.register('test_hedge_fast', snapshot=False)
+    def load_fast(api):
+        return stock_list
+
+    @registry.register('test_hedge_fail', snapshot=False)
+    def load_fail(api):
+        return api._load_from_local()
+
+    saved = stock_name_matcher.get_hedged_loader
+    try:
+        hedger = HedgedLoader(fallback=['test_hedge_fast'], hedge_delay=0.1)
+        stock_name_matcher.get_hedged_loader = lambda: hedger
+        matcher = StockNameMatcher(api_source='test_hedge_slow')
+        assert matcher.api_source == 'test_hedge_fast'
+        assert matcher.api_manager.api_source == 'test_hedge_fast' and matcher.api_manager.cancel_event is None
+        assert matcher.stock_list['代码'].tolist() == ['600000', '000001']
+
+        # 回退到本地数据的结果不算成功
+        hedger = HedgedLoader(fallback=[], hedge_delay=0.1)
+        stock_name_matcher.get_hedged_loader = lambda: hedger
+        matcher = StockNameMatcher(api_source='test_hedge_fail')
+        assert matcher.api_source == 'local' and len(matcher.stock_list) > 1000
+        assert hedger.source_stats('test_hedge_fail')['failures'] == 1
+    finally:
+        stock_name_matcher.get_hedged_loader = saved
+        for name in ['test_hedge_slow', 'test_hedge_fast', 'test_hedge_fail']:
+            registry.unregister(name)
+    print("慢数据源被对冲，使用最先返回的数据源")
+
+
+class _NoRequestHttp:
+    """不允许发送请求的模拟会话池"""
+
+    def concurrency(self, source):
+        return 2
+
+    def log_stats(self, source):
+        pass
+
+    def get(self, source, url, timeout=None, **kwargs):
+        raise AssertionError("已取消的加载不应发送请求")
+
+
+def test_cancelled_batches_skipped():
+    """取消后分批获取不再发送请求"""
+    print("\n=== 测试取消后不再请求 ===")
+
+    api = StockDataAPI('sina', symbols=['600000', '000001'])
+    api.http = _NoRequestHttp()
+    api.throttle = ThrottlePolicy({'sina': 0})
+    api.cancel_event = threading.Event()
+    api.cancel_event.set()
+    df = api._fetch_batches('sina', ['http://hq.sinajs.cn/list=sh600000', 'http://hq.sinajs.cn/list=sz000001'],
+                            api._parse_sina_response, encoding='gbk')
+    assert len(df) == 0 and api.incomplete
+    print("已取消的加载未发送请求")
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+        self.status_code = 200
+        self.encoding = None
+
+
+class _SlowAfterFirstHttp:
+    """第一批立即返回，之后的批次等到加载被取消才返回（模拟被对冲的慢数据源）"""
+
+    def __init__(self, cancel_event):
+        self.cancel_event = cancel_event
+        self.requests = 0
+
+    def concurrency(self, source):
+        return 1
+
+    def log_stats(self, source):
+        pass
+
+    def get(self, source, url, timeout=None, **kwargs):
+        self.requests += 1
+        if self.requests > 1:
+            self.cancel_event.wait(5.0)
+        symbol = url.split('=')[-1]
+        return _Response(f'var hq_str_{symbol}="测试,10.00,9.90,10.10,10.20,9.80,10.10,10.11,1000,10100.00";')
+
+
+def test_cancelled_load_not_saved():
+    """被对冲取消的数据源只获取了部分批次，结果不保存为快照"""
+    print("\n=== 测试取消的加载不保存快照 ===")
+
+    stock_list = pd.DataFrame({'代码': ['600000', '000001'], '名称': ['浦发银行', '平安银行'], '最新价': [10.0, 12.0]})
+    symbols = ['sh600000', 'sz000001', 'sh600004']
+    finished = threading.Event()
+    partial = []
+
+    @registry.register('test_hedge_partial', description='测试')
+    def load_partial(api):
+        api.http = _SlowAfterFirstHttp(api.cancel_event)
+        api.throttle = ThrottlePolicy({'sina': 0})
+        df = api._fetch_batches('sina', [f'http://hq.sinajs.cn/list={symbol}' for symbol in symbols],
+                                api._parse_sina_response, encoding='gbk')
+        partial.append(len(df))
+        finished.set()
+        return df
+
+    @registry.register('test_hedge_fast', snapshot=False)
+    def load_fast(api):
+        return stock_list
+
+    directory = tempfile.mkdtemp()
+    saved = (stock_name_matcher.get_hedged_loader, stock_name_matcher.get_snapshot_store)
+    try:
+        store = SnapshotStore(directory, ttl=60)
+        hedger = HedgedLoader(fallback=['test_hedge_fast'], hedge_delay=0.1)
+        stock_name_matcher.get_hedged_loader = lambda: hedger
+        stock_name_matcher.get_snapshot_store = lambda: store
+        matcher = StockNameMatcher(api_source='test_hedge_partial')
+        assert matcher.api_source == 'test_hedge_fast'
+
+        # 被取消的加载返回了前两批（第二批在取消时返回），第三批未请求
+        assert finished.wait(5.0)
+        _join_hedge_thread('test_hedge_partial')
+        assert partial == [2]
+        assert not os.path.exists(store.path('test_hedge_partial')) and store.stats()['writes'] == 0
+    finally:
+        stock_name_matcher.get_hedged_loader, stock_name_matcher.get_snapshot_store = saved
+        for name in ['test_hedge_partial', 'test_hedge_fast']:
+            registry.unregister(name)
+        shutil.rmtree(directory)
+    print(f"被取消的加载得到 {partial[0]} / {len(symbols)} 只股票，未保存快照")
+
+
+if __name__ == "__main__":
+    try:
+        test_primary_within_delay()
+        test_slow_primary_hedged()
+        test_failure_starts_next_immediately()
+        test_matcher_uses_fastest_source()
+        test_cancelled_batches_skipped()
+        test_cancelled_load_not_saved()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
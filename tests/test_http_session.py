@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据源HTTP会话池（使用本机HTTP服务，不访问外网）：
+1. 同一数据源的连续请求复用连接，统计请求数、新建连接数和复用率
+2. 429/5xx 响应按配置的次数重试，重试用尽后返回最后一次响应
+3. 请求超时不超过配置的 timeout，配置读取 data_sources
+4. 网络数据源的加载函数通过会话池发送请求
+"""
+
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_session import HttpSessionPool, load_http_settings
+from throttle_policy import ThrottlePolicy
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """返回固定内容的HTTP/1.1服务，/flaky 前两次返回503"""
+    protocol_version = 'HTTP/1.1'
+    failures = {}
+
+    def do_GET(self):
+        if self.path.startswith('/flaky'):
+            count = _Handler.failures.get(self.path, 0)
+            _Handler.failures[self.path] = count + 1
+            status = 503 if count < 2 else 200
+        elif self.path.startswith('/down'):
+            status = 503
+        else:
+            status = 200
+        body = f'var hq_str_{self.path.strip("/")}="ok";'.encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_connection_reuse():
+    """连续请求复用同一连接"""
+    print("=== 测试连接复用 ===")
+
+    server, base = _start_server()
+    try:
+        pool = HttpSessionPool({'retry_count': 0})
+        for i in range(20):
+            response = pool.get('sina', f"{base}/sh60000{i % 10}", timeout=5)
+            assert response.status_code == 200
+        stats = pool.stats('sina')
+        assert stats['requests'] == 20
+        assert stats['connections'] == 1 and stats['reused'] == 19
+        assert pool.stats()['sina'] == stats
+        pool.log_stats('sina')
+        pool.close()
+        print(f"统计: {stats}")
+    finally:
+        server.shutdown()
+
+
+def test_retry_with_backoff():
+    """503 响应按配置重试"""
+    print("\n=== 测试失败重试 ===")
+
+    server, base = _start_server()
+    try:
+        pool = HttpSessionPool({'retry_count': 3, 'backoff_factor': 0})
+        response = pool.get('tencent', f"{base}/flaky1", timeout=5)
+        assert response.status_code == 200
+        assert _Handler.failures['/flaky1'] == 3
+        assert pool.stats('tencent')['retries'] == 2
+
+        # 重试用尽后返回最后一次响应，由调用方按状态码处理
+        pool = HttpSessionPool({'retry_count': 1, 'backoff_factor': 0})
+        response = pool.get('tencent', f"{base}/down", timeout=5)
+        assert response.status_code == 503
+        print(f"统计: {pool.stats('tencent')}")
+    finally:
+        server.shutdown()
+
+
+def test_timeout_and_config():
+    """超时不超过配置值，配置读取 data_sources"""
+    print("\n=== 测试超时和配置 ===")
+
+    settings = load_http_settings({'timeout': 2, 'retry_count': 5, 'http': {'pool_maxsize': 3}})
+    assert settings == {'timeout': 2, 'retry_count': 5, 'pool_maxsize': 3}
+
+    pool = HttpSessionPool(config_loader=lambda: settings)
+    session = pool.session('netease')
+    adapter = session.get_adapter('http://127.0.0.1')
+    assert adapter.max_retries.total == 5
+    assert adapter._pool_maxsize == 3
+
+    seen = []
+    session.get = lambda url, timeout=None, **kwargs: seen.append(timeout) or _Response()
+    pool.get('netease', 'http://127.0.0.1/', timeout=10)
+    pool.get('netease', 'http://127.0.0.1/', timeout=1)
+    pool.get('netease', 'http://127.0.0.1/')
+    assert seen == [2.0, 1.0, 2.0]
+    print(f"配置: {pool.settings}")
+
+
+class _Response:
+    """只有 raw 属性的假响应"""
+    raw = None
+
+
+def test_loaders_use_pool():
+    """网络数据源的加载函数通过会话池发送请求"""
+    print("\n=== 测试加载函数使用会话池 ===")
+
+    from stock_name_matcher import StockDataAPI
+
+    api = StockDataAPI('sina')
+    calls = []
+
+    class Pool:
+        def get(self, source, url, timeout=None, **kwargs):
+            calls.append(source)
+            raise ConnectionError("不访问网络")
+
+        def concurrency(self, source):
+            return 1
+
+        def log_stats(self, source):
+            pass
+
+    api.http = Pool()
+    api.throttle = ThrottlePolicy({'sina': 0})
+    api.snapshots = None
+    stock_list = api.load_stock_list()
+    # 全部批次失败后回退到本地数据源
+    assert len(stock_list) > 0
+    assert calls and set(calls) == {'sina'}
+    print(f"新浪数据源发送 {len(calls)} 次请求，均通过会话池")
+
+
+if __name__ == "__main__":
+    try:
+        test_connection_reuse()
+        test_retry_with_backoff()
+        test_timeout_and_config()
+        test_loaders_use_pool()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试匹配结果缓存：
+1. 按条目数、内存上限淘汰，过期条目不再命中，统计命中/未命中/淘汰次数
+2. 缓存命中的代码和名称匹配结果与重新计算一致，价格差异按本次参考价格计算
+3. 替换股票列表后旧缓存失效
+4. 多线程并发读写
+"""
+
+import sys
+import os
+import time
+import threading
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from match_cache import MatchCache, price_bucket
+from stock_name_matcher import StockNameMatcher
+
+
+def test_lru_limits_and_ttl():
+    """条目数和内存上限、过期时间、统计计数"""
+    print("=== 测试缓存上限和过期 ===")
+
+    cache = MatchCache(max_entries=3, max_memory_mb=1, ttl=0)
+    for key in 'abcd':
+        cache.put(key, key * 10)
+    assert cache.get('a') is None
+    assert cache.get('b') == 'b' * 10
+    cache.put('e', 'e')  # b 刚被使用，淘汰 c
+    assert cache.get('c') is None and cache.get('b') is not None
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions'], stats['hits'], stats['misses']) == (3, 2, 2, 2)
+
+    cache = MatchCache(max_entries=1000, max_memory_mb=0.01, ttl=0)
+    for i in range(100):
+        cache.put(i, 'x' * 1000)
+    assert cache.stats()['memory_bytes'] <= 0.01 * 1024 * 1024
+    assert cache.stats()['entries'] < 100
+
+    cache = MatchCache(ttl=0.05)
+    cache.put('k', 1)
+    assert cache.get('k') == 1
+    time.sleep(0.06)
+    assert cache.get('k') is None
+    assert cache.stats()['expirations'] == 1
+
+    assert price_bucket(None) is None and price_bucket(0) is None
+    assert price_bucket(12.344) == price_bucket(12.34) == 12.34
+    assert price_bucket(np.nan) == 'nan'
+    print(f"统计: {cache.stats()}")
+
+
+def test_cached_results_match():
+    """缓存命中的结果与重新计算一致"""
+    print("\n=== 测试缓存结果一致 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    stock_list = matcher.stock_list.copy()
+    stock_list['最新价'] = np.round(np.random.default_rng(1).uniform(1, 50, len(stock_list)), 2)
+    matcher.stock_list = stock_list
+    codes = stock_list['代码'].head(50).tolist() + ['abc', '999999']
+    names = stock_list['名称'].head(20).tolist() + ['平安银', '科技']
+
+    before = matcher.match_cache.stats()
+    first = [matcher.match_stock_code(code, reference_price=10.0) for code in codes]
+    second = [matcher.match_stock_code(code, reference_price=20.5) for code in codes]
+    after = matcher.match_cache.stats()
+    assert after['hits'] - before['hits'] >= len(codes)
+    for code, a, b in zip(codes, first, second):
+        assert {k: v for k, v in a.items() if k not in ('参考价格', '价格差异')} == \
+               {k: v for k, v in b.items() if k not in ('参考价格', '价格差异')}
+        assert b['参考价格'] == 20.5
+        if '股票代码' in b:
+            assert b['价格差异'] == abs(b['当前价格'] - 20.5)
+
+    for name in names:
+        for price in [None, 12.5, 12.5]:
+            cached = matcher.match_stock_name(name, reference_price=price)
+            matcher.match_cache.clear()
+            assert cached == matcher.match_stock_name(name, reference_price=price), name
+    print(f"缓存统计: {matcher.match_cache.stats()}")
+
+
+def test_invalidated_on_new_stock_list():
+    """替换股票列表后旧缓存失效"""
+    print("\n=== 测试替换股票列表后缓存失效 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    code = matcher.stock_list['代码'].iloc[0]
+    name = matcher.match_stock_code(code)['股票名称']
+
+    stock_list = matcher.stock_list.copy()
+    stock_list.loc[stock_list.index[0], '名称'] = name + '新'
+    old_version = matcher.universe_version
+    matcher.stock_list = stock_list
+    assert matcher.universe_version != old_version
+    assert matcher.match_stock_code(code)['股票名称'] == name + '新'
+    print(f"{code}: {name} -> {name}新")
+
+
+def test_concurrent_access():
+    """多线程并发读写"""
+    print("\n=== 测试多线程并发读写 ===")
+
+    cache = MatchCache(max_entries=500, ttl=0)
+    errors = []
+
+    def worker(seed):
+        rng = np.random.default_rng(seed)
+        for key in rng.integers(0, 1000, 5000):
+            value = cache.get(int(key))
+            if value is None:
+                cache.put(int(key), [int(key)])
+            elif value != [int(key)]:
+                errors.append(key)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert not errors
+    assert stats['entries'] <= 500
+    assert stats['hits'] + stats['misses'] == 8 * 5000
+    print(f"统计: {stats}")
+
+
+if __name__ == "__main__":
+    try:
+        test_lru_limits_and_ttl()
+        test_cached_results_match()
+        test_invalidated_on_new_stock_list()
+        test_concurrent_access()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
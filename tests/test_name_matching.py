@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量名称匹配：
+1. 未精确命中的名称，批量结果与逐行 match_stock_name 一致
+2. 名称或清理名称完全相同时通过哈希关联直接命中
+3. 10万行名称文件的处理耗时
+4. 单个名称模糊匹配（倒排索引）与 process.extract 一致及查询延迟
+5. 包含匹配（后缀数组）与逐个子串判断一致，特殊字符按字面匹配
+6. 价格区间筛选：候选只保留区间内的股票，批量结果与逐行一致
+"""
+
+import sys
+import os
+import time
+import random
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz, process
+from stock_name_matcher import StockNameMatcher
+
+
+def _make_matcher():
+    """使用本地数据源，并设置随机价格以验证按价格排序"""
+    matcher = StockNameMatcher(api_source='local')
+    stock_list = matcher.stock_list.copy()
+    stock_list['最新价'] = np.round(np.random.default_rng(3).uniform(1, 50, len(stock_list)), 2)
+    matcher.stock_list = stock_list
+    return matcher
+
+
+def _row_by_row(matcher, input_df):
+    """按原有逐行方式生成结果"""
+    results = []
+    for name, price in zip(input_df['原始名称'], input_df['参考价格']):
+        matches = matcher.match_stock_name(name, use_price=price is not None, reference_price=price)
+        if matches:
+            best = matches[0]
+            results.append({
+                '原始名称': name, '参考价格': price,
+                '匹配股票代码': best['股票代码'], '匹配股票名称': best['股票名称'],
+                '当前价格': best['最新价'], '匹配类型': best['匹配类型'],
+                '匹配度': best['匹配度'], '价格差异': best['价格差异'],
+                '备选1_代码': matches[1]['股票代码'] if len(matches) > 1 else '',
+                '备选1_名称': matches[1]['股票名称'] if len(matches) > 1 else '',
+                '备选2_代码': matches[2]['股票代码'] if len(matches) > 2 else '',
+                '备选2_名称': matches[2]['股票名称'] if len(matches) > 2 else '',
+            })
+        else:
+            results.append({
+                '原始名称': name, '参考价格': price,
+                '匹配股票代码': '', '匹配股票名称': '未找到匹配', '当前价格': '', '匹配类型': '',
+                '匹配度': 0, '价格差异': '', '备选1_代码': '', '备选1_名称': '',
+                '备选2_代码': '', '备选2_名称': '',
+            })
+    return pd.DataFrame(results)
+
+
+def test_batch_matches_row_by_row():
+    """未精确命中的名称：批量结果与逐行匹配一致"""
+    print("=== 测试批量名称匹配与逐行匹配一致 ===")
+
+    matcher = _make_matcher()
+    names = matcher.stock_list['名称'].tolist()
+    rng = random.Random(5)
+    inputs = []
+    while len(inputs) < 40:
+        name = rng.choice(names)
+        pos = rng.randrange(len(name))
+        typo = name[:pos] + rng.choice('的股份科技银行') + name[pos + 1:]
+        if len(matcher.name_index.exact_rows(typo, matcher._clean_stock_name(typo))) == 0:
+            inputs.append(typo)
+    inputs += ['中国', '银行', 'abc', '中新']
+    for price_type in ['none', 'float']:
+        if price_type == 'none':
+            prices = [None] * len(inputs)
+        else:
+            prices = [rng.choice([0.0, np.nan, round(rng.uniform(1, 50), 2)]) for _ in inputs]
+        input_df = pd.DataFrame({'原始名称': inputs, '参考价格': pd.Series(prices, dtype=object if price_type == 'none' else float)})
+
+        batch = matcher.match_stock_names_batch(input_df)
+        rows = _row_by_row(matcher, input_df)
+        resolved = (batch['匹配类型'] == '精确匹配').to_numpy()
+        assert list(batch.columns) == list(rows.columns)
+        assert batch[~resolved].to_csv(index=False) == rows[~resolved].to_csv(index=False)
+        print(f"参考价格 {price_type}: {len(inputs)} 个名称结果一致")
+
+
+def test_exact_names_joined():
+    """名称或清理名称完全相同的输入直接命中"""
+    print("\n=== 测试精确名称哈希关联 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    stock_list = matcher.stock_list
+    sample = stock_list.sample(20, random_state=1)
+    inputs = sample['名称'].tolist() + ['ST' + name for name in sample['清理名称'].head(5)] + [None, '', '*ST', '东华(技']
+    input_df = pd.DataFrame({'原始名称': inputs, '参考价格': [None] * len(inputs)})
+
+    result = matcher.match_stock_names_batch(input_df)
+    assert len(result) == len(inputs)
+    for i, name in enumerate(sample['名称']):
+        assert result.loc[i, '匹配类型'] == '精确匹配'
+        assert result.loc[i, '匹配度'] == 100
+        assert result.loc[i, '匹配股票名称'] == name
+    for i in range(20, 25):
+        assert result.loc[i, '匹配类型'] == '精确匹配'
+    assert (result['匹配股票名称'].iloc[25:28] == '未找到匹配').all()
+    # 不是有效正则表达式的名称也能正常匹配
+    assert result.loc[28, '匹配股票名称'] == '东华科技'
+    print(result[['原始名称', '匹配股票代码', '匹配股票名称', '匹配类型', '匹配度']].to_string(index=False))
+
+
+def test_large_name_file():
+    """10万行名称文件的处理耗时"""
+    print("\n=== 测试批量处理大名称文件 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    names = matcher.stock_list['名称'].tolist()
+    rng = random.Random(7)
+    pool = [name if rng.random() < 0.7 else name[:-1] + rng.choice('的股份科技') for name in rng.sample(names, 3000)]
+    test_file = "test_batch_names.csv"
+    output_file = "test_batch_names_result.csv"
+    pd.DataFrame({
+        '股票名称': [rng.choice(pool) for _ in range(100000)],
+        '价格': np.round(np.random.default_rng(0).uniform(1, 50, 100000), 2),
+    }).to_csv(test_file, index=False, encoding='utf-8-sig')
+
+    try:
+        start = time.perf_counter()
+        matcher.process_excel_file(test_file, output_file)
+        print(f"100000 行处理耗时（含文件读写）: {time.perf_counter() - start:.2f} 秒")
+
+        result = pd.read_csv(output_file, dtype=str)
+        assert len(result) == 100000
+        assert {'备选1_代码', '备选1_名称', '备选2_代码', '备选2_名称'} <= set(result.columns)
+    finally:
+        for file in [test_file, output_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+
+def test_fuzzy_search_index():
+    """单个名称模糊匹配：倒排索引结果与全量 process.extract 一致"""
+    print("\n=== 测试单个名称模糊匹配索引 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    index = matcher.name_index
+    choices = matcher.stock_list['清理名称'].tolist()
+    names = matcher.stock_list['名称'].tolist()
+    rng = random.Random(1)
+    queries = ['', '***', 'a', '中国', '平安银行', '东华(技']
+    for _ in range(200):
+        name = rng.choice(names)
+        queries.append(rng.choice([name, name[:-1] + rng.choice('的股份科技银行*'), name[:2], name[1:]]))
+    queries = [matcher._clean_stock_name(query) for query in queries]
+
+    for query in queries:
+        expected = [(name, score) for name, score in process.extract(query, choices, limit=10, scorer=fuzz.ratio)
+                    if score >= 60]
+        assert index.fuzzy_search(query) == expected, query
+
+    latencies = []
+    for query in queries * 5:
+        start = time.perf_counter()
+        index.fuzzy_search(query)
+        latencies.append(time.perf_counter() - start)
+    p99 = np.percentile(latencies, 99) * 1000
+    print(f"{len(queries)} 个查询结果一致，p50 {np.percentile(latencies, 50) * 1000:.3f} 毫秒，p99 {p99:.3f} 毫秒")
+    assert p99 < 5
+
+
+def test_contains_index():
+    """包含匹配：后缀数组结果与逐个子串判断一致"""
+    print("\n=== 测试包含匹配后缀数组 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    index = matcher.name_index
+    texts = index.clean_texts
+    rng = random.Random(3)
+    queries = ['-U', '*', '.', '(', '科技', '银行', 'N', '中国平安', '不存在的名称']
+    for _ in range(300):
+        text = rng.choice(texts)
+        start = rng.randrange(len(text))
+        queries.append(text[start:start + rng.randint(1, 3)])
+
+    batch = index.contains_rows_batch(queries)
+    for query, rows in zip(queries, batch):
+        expected = [row for row, text in enumerate(texts) if query in text]
+        assert rows.tolist() == expected, query
+        assert index.contains_rows(query).tolist() == expected
+
+    # 正则元字符按字面匹配，不再抛出异常或匹配到无关名称
+    assert len(index.contains_rows('.')) == sum('.' in text for text in texts)
+    assert matcher.match_stock_name('(') == []
+
+    start = time.perf_counter()
+    index.contains_rows_batch(queries * 100)
+    elapsed = time.perf_counter() - start
+    print(f"{len(queries)} 个查询结果一致，批量查询 {len(queries) * 100} 个耗时 {elapsed * 1000:.1f} 毫秒")
+
+
+def test_price_band():
+    """价格区间筛选：模糊和包含候选只保留最新价在区间内的股票"""
+    print("\n=== 测试价格区间筛选 ===")
+
+    matcher = _make_matcher()
+    index = matcher.name_index
+    choices = index.clean_names.tolist()
+    names = matcher.stock_list['名称'].tolist()
+    rng = random.Random(11)
+    inputs, prices = [], []
+    for _ in range(40):
+        name = rng.choice(names)
+        inputs.append(name[:-1] + rng.choice('的股份科技银行'))
+        prices.append(rng.choice([None, 0.0, round(rng.uniform(1, 50), 2)]))
+
+    # 单个查询：区间外的候选在评分前剔除，结果与在区间内候选上调用 process.extract 一致
+    for query, price in zip(inputs, prices):
+        mask = index.price_band_mask(price, 0.2)
+        if mask is None:
+            assert not price
+            continue
+        in_band = [choice for choice, allowed in zip(choices, mask) if allowed]
+        expected = [(name, score) for name, score in process.extract(matcher._clean_stock_name(query), in_band,
+                                                                     limit=10, scorer=fuzz.ratio) if score >= 60]
+        assert index.fuzzy_search(matcher._clean_stock_name(query), mask) == expected, query
+
+        matches = matcher.match_stock_name(query, reference_price=price, price_band=0.2)
+        for match in matches:
+            if match['匹配类型'] != '精确匹配':
+                assert abs(match['最新价'] - price) <= price * 0.2 + 1e-9
+        diffs = [match['价格差异'] for match in matches]
+        assert diffs == sorted(diffs)
+
+    # 批量结果与逐行一致
+    matcher.price_band = 0.2
+    input_df = pd.DataFrame({'原始名称': inputs, '参考价格': pd.Series(prices, dtype=object)})
+    batch = matcher.match_stock_names_batch(input_df)
+    rows = _row_by_row(matcher, input_df)
+    resolved = (batch['匹配类型'] == '精确匹配').to_numpy()
+    assert batch[~resolved].to_csv(index=False) == rows[~resolved].to_csv(index=False)
+
+    # 不使用价格区间时候选更多
+    unbanded = matcher.match_stock_names_batch(input_df, price_band=0)
+    found = (batch['匹配股票名称'] != '未找到匹配').sum()
+    assert (unbanded['匹配股票名称'] != '未找到匹配').sum() >= found
+    print(f"{len(inputs)} 个名称结果一致，±20% 区间内找到 {found} 个")
+
+
+if __name__ == "__main__":
+    try:
+        test_batch_matches_row_by_row()
+        test_exact_names_joined()
+        test_large_name_file()
+        test_fuzzy_search_index()
+        test_contains_index()
+        test_price_band()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试股票名称标准化：
+1. 全角字母、补齐空格、ST标记和A/B后缀的清理
+2. 整列清理与逐个清理结果一致
+3. 股票列表加载时只计算一次清理名称
+"""
+
+import sys
+import os
+import time
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from name_normalizer import clean_stock_name, clean_name_series
+from stock_name_matcher import StockNameMatcher
+
+
+def test_clean_rules():
+    """全角字母、补齐空格、ST标记和A/B后缀"""
+    print("=== 测试名称清理规则 ===")
+
+    cases = {
+        '万  科Ａ': '万科',
+        '柳    工': '柳工',
+        '*ST 聚龙': '聚龙',
+        'ST华塑': '华塑',
+        '*ST石化A': '石化',
+        '深振业Ａ': '深振业',
+        '平安银行': '平安银行',
+        '　中国平安\t': '中国平安',
+        '（北交所）': '(北交所)',
+        '': '',
+        None: '',
+        np.nan: '',
+    }
+    for name, expected in cases.items():
+        assert clean_stock_name(name) == expected, name
+        print(f"{name!r} -> {clean_stock_name(name)!r}")
+
+
+def test_series_matches_scalar():
+    """整列清理与逐个清理一致"""
+    print("\n=== 测试整列清理与逐个清理一致 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    names = pd.concat([
+        matcher.stock_list['名称'],
+        pd.Series(['Ｈ股ＡＢ', ' ST ', 852, 852.0, None, np.nan], dtype=object),
+    ], ignore_index=True)
+
+    start = time.perf_counter()
+    cleaned = clean_name_series(names)
+    elapsed = time.perf_counter() - start
+    assert cleaned.tolist() == [clean_stock_name(name) for name in names]
+    print(f"{len(names)} 个名称结果一致，整列清理耗时 {elapsed * 1000:.1f} 毫秒")
+
+
+def test_clean_names_computed_once():
+    """清理名称随股票列表保存，名称索引直接复用"""
+    print("\n=== 测试清理名称只计算一次 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    stock_list = matcher.stock_list
+    assert stock_list['清理名称'].tolist() == clean_name_series(stock_list['名称']).tolist()
+    assert matcher.name_index.clean_names.tolist() == stock_list['清理名称'].tolist()
+
+    # 设置没有清理名称的股票列表时补充计算一次
+    matcher.stock_list = stock_list.drop(columns=['清理名称'])
+    assert '清理名称' in matcher.stock_list.columns
+    assert matcher.name_index.clean_names.tolist() == stock_list['清理名称'].tolist()
+
+    # 补齐空格和全角后缀不影响匹配
+    result = matcher.match_stock_name('万科A')
+    assert result and result[0]['股票名称'] == '万  科Ａ'
+    print(f"'万科A' -> {result[0]['股票代码']} {result[0]['股票名称']} ({result[0]['匹配类型']})")
+
+
+if __name__ == "__main__":
+    try:
+        test_clean_rules()
+        test_series_matches_scalar()
+        test_clean_names_computed_once()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
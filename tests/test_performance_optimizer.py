@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试性能优化器：
+1. 进程池模式：相同的 (名称, 参考价格) 只匹配一次，名称匹配结果与单进程一致
+2. 输入较少或单进程时直接批量匹配
+3. 不同匹配器同时使用进程池时各自的工作进程使用各自的股票列表
+4. 代码补全分批并发处理，结果与整列关联一致，失败的批次记为处理失败
+5. process_stock_codes 默认使用性能优化器
+6. 批大小和并发数按吞吐量和错误率在上下限内调整
+7. 线程池在多次处理之间复用，自动调整不改变结果
+8. 代码补全时相同的 (代码, 参考价格) 只匹配一次，结果按原始行顺序展开
+"""
+
+import sys
+import os
+import time
+import random
+import threading
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import performance_optimizer
+from performance_optimizer import PerformanceOptimizer, BatchTuner
+from stock_name_matcher import StockNameMatcher
+
+
+def test_process_backend():
+    """进程池模式按块分发，结果与单进程一致"""
+    print("\n=== 测试进程池模式 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    names = matcher.stock_list['名称'].tolist()
+    rng = random.Random(4)
+    pool = [name if rng.random() < 0.5 else name[:-1] + rng.choice('的股份科技') for name in rng.sample(names, 500)]
+    name_df = pd.DataFrame({
+        '原始名称': [rng.choice(pool) for _ in range(3000)] + [None, '', 852],
+        '参考价格': [rng.choice([None, np.nan, 10.0]) for _ in range(3003)],
+    })
+    expected = matcher.match_stock_names_batch(name_df)
+    start = time.perf_counter()
+    optimizer = PerformanceOptimizer(matcher, max_workers=2, chunk_size=200)
+    result = optimizer.optimize_name_matching(name_df)
+    elapsed = time.perf_counter() - start
+    assert result.to_csv(index=False) == expected.to_csv(index=False)
+    print(f"{len(name_df)} 个名称, {optimizer.max_workers} 个进程, 耗时 {elapsed:.2f} 秒, 结果与单进程一致")
+
+
+def test_small_input_single_process():
+    """输入不超过一个工作单元或只有一个进程时不创建进程池"""
+    print("\n=== 测试直接批量匹配 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    name_df = pd.DataFrame({'原始名称': matcher.stock_list['名称'].head(100).tolist(), '参考价格': [None] * 100})
+    expected = matcher.match_stock_names_batch(name_df)
+
+    for optimizer in (PerformanceOptimizer(matcher, max_workers=2, chunk_size=200),
+                      PerformanceOptimizer(matcher, max_workers=1, chunk_size=10),
+                      PerformanceOptimizer(matcher, chunk_size=10)):
+        optimizer._create_process_pool = None
+        result = optimizer.optimize_name_matching(name_df)
+        assert result.to_csv(index=False) == expected.to_csv(index=False)
+    print(f"{len(name_df)} 个名称直接批量匹配，结果一致")
+
+
+def test_concurrent_matchers():
+    """两个匹配器同时多进程匹配，互不覆盖"""
+    print("\n=== 测试并发使用进程池 ===")
+
+    stock_list = StockNameMatcher(api_source='local').stock_list
+    # 第二个匹配器的股票列表中名称被改过，同一名称在两个列表中匹配到不同的股票
+    renamed = stock_list.drop(columns=['清理名称']).copy()
+    renamed['名称'] = renamed['名称'].shift(1).fillna(renamed['名称'].iloc[-1])
+    matchers = [StockNameMatcher(api_source='local', stock_list=stock_list.drop(columns=['清理名称'])),
+                StockNameMatcher(api_source='local', stock_list=renamed)]
+    name_df = pd.DataFrame({'原始名称': stock_list['名称'].head(1200).tolist(), '参考价格': [None] * 1200})
+    expected = [matcher.match_stock_names_batch(name_df) for matcher in matchers]
+    assert expected[0]['匹配股票代码'].tolist() != expected[1]['匹配股票代码'].tolist()
+
+    results = [None, None]
+
+    def run(i):
+        optimizer = PerformanceOptimizer(matchers[i], max_workers=2, chunk_size=100)
+        results[i] = optimizer.optimize_name_matching(name_df)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for result, expected_result in zip(results, expected):
+        assert result.to_csv(index=False) == expected_result.to_csv(index=False)
+    # 父进程不设置工作进程使用的匹配器
+    assert performance_optimizer._worker_matcher is None
+    print("两个匹配器同时匹配，结果各自与单进程一致")
+
+
+def _make_code_input(matcher, size, seed):
+    """生成代码补全的输入：有效、无效和不存在的代码混合，参考价格有空值（与过滤空行后的 read_excel_file 输出一致）"""
+    rng = random.Random(seed)
+    pool = rng.sample(matcher.stock_list['代码'].tolist(), 300) + ['sh600000', ' 000001', 'abc', '999999']
+    return pd.DataFrame({
+        '股票代码': [rng.choice(pool) for _ in range(size)],
+        '参考价格': [rng.choice([None, np.nan, 10.0, round(rng.uniform(1, 50), 2)]) for _ in range(size)],
+    }, index=np.arange(size) * 2 + 1)
+
+
+def _fixed(batch_size, workers=2):
+    """固定批大小和并发数（不自动调整）"""
+    return {'batch_size': batch_size, 'min_batch_size': batch_size, 'max_batch_size': batch_size,
+            'workers': workers, 'min_workers': workers, 'max_workers': workers}
+
+
+def test_code_batches_match_bulk():
+    """分批并发的代码补全结果与整列关联一致"""
+    print("\n=== 测试代码补全分批处理 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    input_df = _make_code_input(matcher, 3000, seed=6)
+    # 只有无效代码的批次缺少行情列，合并后列顺序不变
+    input_df.iloc[:50, 0] = 'abc'
+    expected = matcher.match_stock_codes_bulk(input_df)
+
+    optimizer = PerformanceOptimizer(matcher, settings=_fixed(50))
+    result = optimizer.optimize_stock_matching(input_df)
+    assert result.to_csv(index=False) == expected.to_csv(index=False)
+
+    # 某一批失败时只有这一批记为处理失败
+    match_bulk = matcher.match_stock_codes_bulk
+    calls = []
+
+    def failing_bulk(batch, enable_cross_validation=False):
+        calls.append(len(batch))
+        if len(calls) == 2:
+            raise RuntimeError("模拟失败")
+        return match_bulk(batch, enable_cross_validation)
+
+    matcher.match_stock_codes_bulk = failing_bulk
+    result = PerformanceOptimizer(matcher, settings=_fixed(500)).optimize_stock_matching(input_df)
+    del matcher.match_stock_codes_bulk
+    failed = (result['匹配状态'] == '处理失败').to_numpy()
+    assert len(result) == len(input_df) and len(calls) > 2
+    assert failed.any() and not failed.all()
+    assert result[~failed].to_csv(index=False) == expected[~failed].to_csv(index=False)
+    print(f"{len(input_df)} 行分批处理结果与整列关联一致")
+
+
+def test_process_stock_codes_uses_optimizer():
+    """process_stock_codes 默认经过性能优化器，关闭时整列关联"""
+    print("\n=== 测试代码补全使用性能优化器 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    test_file = "test_optimizer_codes.csv"
+    output_file = "test_optimizer_result.csv"
+    pd.DataFrame({'股票代码': ['600000', '000001', 'abc'], '价格': [10.0, None, 5.0]}).to_csv(
+        test_file, index=False, encoding='utf-8-sig')
+
+    calls = []
+    optimize = PerformanceOptimizer.optimize_stock_matching
+
+    def counting(self, input_df, enable_cross_validation=False):
+        calls.append(len(input_df))
+        return optimize(self, input_df, enable_cross_validation)
+
+    PerformanceOptimizer.optimize_stock_matching = counting
+    try:
+        matcher.process_stock_codes(test_file, output_file)
+        optimized = pd.read_csv(output_file, dtype=str)
+        matcher.process_stock_codes(test_file, output_file, use_optimization=False)
+        bulk = pd.read_csv(output_file, dtype=str)
+    finally:
+        PerformanceOptimizer.optimize_stock_matching = optimize
+        for file in [test_file, output_file]:
+            if os.path.exists(file):
+                os.remove(file)
+    assert calls == [3]
+    pd.testing.assert_frame_equal(optimized, bulk)
+    print("默认经过性能优化器，结果与整列关联一致")
+
+
+def test_batch_tuner():
+    """吞吐量上升时增加并发、出错时减半，批大小按每轮耗时调整"""
+    print("\n=== 测试批大小和并发数调整 ===")
+
+    tuner = BatchTuner({'batch_size': 100, 'min_batch_size': 20, 'max_batch_size': 400,
+                        'workers': 2, 'min_workers': 1, 'max_workers': 4,
+                        'target_batch_seconds': 1.0, 'max_error_rate': 0.1})
+    # 每轮很快且没有错误：并发加1，批大小翻倍，直到上限
+    for _ in range(5):
+        tuner.record(tuner.batch_size, 0.1)
+    assert tuner.workers == 4 and tuner.batch_size == 400
+
+    # 错误率超过阈值：并发减半
+    tuner.record(400, 0.8, errors=100)
+    assert tuner.workers == 2
+
+    # 增加并发后吞吐量下降：撤销并暂停增加
+    tuner.record(400, 0.8)
+    assert tuner.workers == 3
+    tuner.record(400, 1.6)
+    assert tuner.workers == 2
+    for _ in range(BatchTuner.HOLD_ROUNDS):
+        tuner.record(400, 0.8)
+        assert tuner.workers == 2
+    tuner.record(400, 0.8)
+    assert tuner.workers == 3
+
+    # 每轮过慢：批大小减半，不低于下限
+    for _ in range(10):
+        tuner.record(tuner.batch_size, 5.0)
+    assert tuner.batch_size == 20
+    assert all(decision['reason'] for decision in tuner.history[:2])
+    print(f"共 {len(tuner.history)} 次记录，最终并发 {tuner.workers}，批大小 {tuner.batch_size}")
+
+
+def test_executor_reused():
+    """线程池在多次处理之间复用，自动调整后结果不变"""
+    print("\n=== 测试线程池复用 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    input_df = _make_code_input(matcher, 2000, seed=5)
+    expected = matcher.match_stock_codes_bulk(input_df).to_csv(index=False)
+
+    settings = {'batch_size': 100, 'min_batch_size': 50, 'max_batch_size': 400, 'workers': 1,
+                'min_workers': 1, 'max_workers': 3, 'target_batch_seconds': 1.0, 'max_error_rate': 0.1}
+    with PerformanceOptimizer(matcher, settings=settings) as optimizer:
+        first = optimizer.optimize_stock_matching(input_df)
+        executor = optimizer.executor
+        second = optimizer.optimize_stock_matching(input_df)
+        assert optimizer.executor is executor
+        # 第一轮没有错误，并发从1增加到2
+        assert optimizer.tuner.history[0]['workers'] == (1, 2)
+    assert optimizer._executor is None
+
+    assert first.to_csv(index=False) == expected and second.to_csv(index=False) == expected
+    print(f"{len(optimizer.tuner.history)} 轮, 最终并发 {optimizer.tuner.workers}, 批大小 {optimizer.tuner.batch_size}")
+
+
+def test_duplicate_codes_matched_once():
+    """相同的 (代码, 参考价格) 只关联一次，重复行的结果互不影响"""
+    print("\n=== 测试代码去重 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    input_df = _make_code_input(matcher, 5000, seed=8)
+    distinct = len({(code, None if price is None or pd.isna(price) else price)
+                    for code, price in zip(input_df['股票代码'], input_df['参考价格'])})
+    expected = matcher.match_stock_codes_bulk(input_df)
+
+    rows = []
+    match_bulk = matcher.match_stock_codes_bulk
+
+    def counting_bulk(batch, enable_cross_validation=False):
+        rows.append(len(batch))
+        return match_bulk(batch, enable_cross_validation)
+
+    matcher.match_stock_codes_bulk = counting_bulk
+    result = PerformanceOptimizer(matcher, settings=_fixed(500)).optimize_stock_matching(input_df)
+    del matcher.match_stock_codes_bulk
+
+    assert sum(rows) == distinct < len(input_df)
+    assert result.to_csv(index=False) == expected.to_csv(index=False)
+    result.loc[0, '股票名称'] = '已修改'
+    assert (result['股票名称'] == '已修改').sum() == 1
+    print(f"{len(input_df)} 行, {distinct} 个唯一键, 关联 {sum(rows)} 行")
+
+
+if __name__ == "__main__":
+    try:
+        test_process_backend()
+        test_small_input_single_process()
+        test_concurrent_matchers()
+        test_code_batches_match_bulk()
+        test_process_stock_codes_uses_optimizer()
+        test_batch_tuner()
+        test_executor_reused()
+        test_duplicate_codes_matched_once()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
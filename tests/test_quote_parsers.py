@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试行情响应的列式解析（使用按真实格式生成的响应，不访问外网）：
+1. 新浪、腾讯、网易的解析结果与逐行解析完全一致（包括空行、字段不足、空字段和无法解析的数值）
+2. 不是有效格式的响应返回只有列名的空表
+（解析耗时见 scripts/benchmark_matching.py 的 quote_parsing 基准测试）
+"""
+
+import sys
+import os
+import json
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from local_stock_data import LocalStockData
+from quote_parsers import QUOTE_FIELDS, parse_sina_quotes, parse_tencent_quotes, parse_netease_quotes
+from stock_name_matcher import StockDataAPI, exchange_prefix
+
+# 各数据源响应中的异常行，解析结果应与逐行解析一致
+SINA_EDGE_CASES = [
+    'var hq_str_sh600001="";',                                      # 停牌/不存在，返回空数据
+    'var hq_str_sz000003="退市股,1.00,2.00";',                       # 字段不足
+    'var hq_str_sz000004="空字段,,,,,,,,,";',                        # 空字段记为0
+    'var hq_str_sh600002="坏数据,1.00,abc,3.00,4.00,5.00,6,7,8,9";',   # 数值无法解析
+    'var hq_str_bj830001="北交所,1.00,0.00,3.00,4.00,5.00";',          # 其他前缀保留，昨收为0
+]
+TENCENT_EDGE_CASES = [
+    'v_sh600001="";',
+    'v_sz000003="1~退市股~000003~1.00~2.00";',
+    'v_sz000004="1~空字段~000004~~~~~~~~";',
+    'v_sh600002="1~坏数据~600002~x~1.00~1.00~1~1~1~1~";',
+    'v_sz000005="1~零成交~000005~10.00~9.00~9.50~0~0~0~9.99~";',
+]
+
+
+def _render_sina(stock_list):
+    rng = np.random.default_rng(1)
+    lines = []
+    for code, name in zip(stock_list['代码'], stock_list['名称']):
+        prev, price = rng.uniform(2, 200, 2).round(2)
+        lines.append(f'var hq_str_{exchange_prefix(code)}{code}="{name},{prev:.2f},{prev:.2f},{price:.2f},'
+                     f'{price:.2f},{prev:.2f},{price:.2f},{price:.2f},{rng.integers(1, 10**8)},{price * 1e6:.2f},'
+                     f'100,{price:.2f},200,{price:.2f},2025-06-20,15:00:00,00";')
+    return '\n'.join(lines)
+
+
+def _render_tencent(stock_list):
+    rng = np.random.default_rng(2)
+    lines = []
+    for code, name in zip(stock_list['代码'], stock_list['名称']):
+        prev, price = rng.uniform(2, 200, 2).round(2)
+        lines.append(f'v_{exchange_prefix(code)}{code}="1~{name}~{code}~{price:.2f}~{prev:.2f}~{prev:.2f}~'
+                     f'{rng.integers(1, 10**7)}~500~500~{price:.2f}~10~{price:.2f}~20~~20250620150000~";')
+    return '\n'.join(lines)
+
+
+def _render_netease(stock_list):
+    rng = np.random.default_rng(3)
+    data = {}
+    for code, name in zip(stock_list['代码'], stock_list['名称']):
+        key = f"{'0' if exchange_prefix(code) == 'sh' else '1'}{code}"
+        price = round(float(rng.uniform(2, 200)), 2)
+        data[key] = {'code': key, 'name': name, 'price': price, 'percent': round(float(rng.normal(0, 0.02)), 4),
+                     'updown': round(float(rng.normal(0, 1)), 2), 'volume': int(rng.integers(1, 10**8)),
+                     'turnover': price * 1e6}
+    data['0600001'] = None
+    data['1000002'] = {'name': '坏数据', 'price': None}
+    return f"_ntes_quote_callback({json.dumps(data, ensure_ascii=False)});"
+
+
+def _row_parse(api, source, text):
+    """逐行解析（原有的解析方式），作为对照"""
+    if source == 'netease':
+        rows = [api._parse_netease_data(key, info) for key, info in
+                json.loads(text[21:-2]).items() if info and isinstance(info, dict)]
+    else:
+        parse_line = api._parse_sina_data if source == 'sina' else api._parse_tencent_data
+        marker = 'hq_str_' if source == 'sina' else 'v_'
+        rows = [parse_line(line) for line in text.strip().split('\n') if marker in line and '=""' not in line]
+    return pd.DataFrame([row for row in rows if row])
+
+
+def _payloads():
+    stock_list = LocalStockData().get_stock_list()
+    return {
+        'sina': _render_sina(stock_list) + '\n' + '\n'.join(SINA_EDGE_CASES),
+        'tencent': _render_tencent(stock_list) + '\n' + '\n'.join(TENCENT_EDGE_CASES),
+        'netease': _render_netease(stock_list),
+    }
+
+
+PARSERS = {'sina': parse_sina_quotes, 'tencent': parse_tencent_quotes, 'netease': parse_netease_quotes}
+
+
+def test_parity_with_row_parsers():
+    """列式解析与逐行解析结果一致"""
+    print("=== 测试与逐行解析一致 ===")
+
+    api = StockDataAPI('local')
+    for source, text in _payloads().items():
+        expected = _row_parse(api, source, text)
+        result = PARSERS[source](text)
+        assert result.columns.tolist() == QUOTE_FIELDS
+        pd.testing.assert_frame_equal(result, expected)
+        print(f"{source}: {len(result)} 只股票, 与逐行解析一致")
+
+    sina = parse_sina_quotes('\n'.join(SINA_EDGE_CASES))
+    assert sina['代码'].tolist() == ['000004', 'bj830001']
+    assert sina.iloc[0, 2:].tolist() == [0.0] * 9
+
+
+def test_invalid_payloads():
+    """无效响应返回空表"""
+    print("\n=== 测试无效响应 ===")
+
+    for source, text in [('sina', ''), ('tencent', 'pv_none_match=1;'), ('netease', '<html>403</html>')]:
+        result = PARSERS[source](text)
+        assert len(result) == 0 and result.columns.tolist() == QUOTE_FIELDS
+    print("无效响应均返回空表")
+
+
+if __name__ == "__main__":
+    try:
+        test_parity_with_row_parsers()
+        test_invalid_payloads()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
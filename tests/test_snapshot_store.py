@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试股票列表磁盘快照（使用测试用的数据源和临时目录，不访问外网）：
+1. 第一次加载保存快照，有效期内再次加载直接读取磁盘，不调用数据源
+2. 过期的快照立即返回（数据源阻塞时也不等待），同时在后台重新加载并更新快照
+3. 回退到本地数据得到的列表不保存为快照
+4. 有效期读取 cache_duration，snapshot_cache.ttl 可按数据源设置
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from data_sources import registry
+from snapshot_store import SnapshotStore
+from stock_name_matcher import StockDataAPI
+
+
+def _make_source(name, versions, gate=None):
+    """注册测试用的数据源：每次加载返回下一个版本的价格，记录加载次数；gate 未放行时阻塞"""
+    calls = []
+
+    @registry.register(name, description='测试')
+    def load(api):
+        if gate is not None:
+            gate.wait(10)
+        version = versions[min(len(calls), len(versions) - 1)]
+        calls.append(version)
+        return pd.DataFrame({'代码': ['600000', '000001'], '名称': ['浦发银行', '平安银行'],
+                             '最新价': [10.0 + version, 12.0 + version]})
+    return calls
+
+
+def _api(name, store):
+    api = StockDataAPI(name)
+    api.snapshots = store
+    return api
+
+
+def test_fresh_snapshot_read_from_disk():
+    """有效期内读取磁盘快照"""
+    print("=== 测试有效期内读取快照 ===")
+
+    directory = tempfile.mkdtemp()
+    calls = _make_source('test_snapshot', [0, 1])
+    try:
+        store = SnapshotStore(directory, ttl=60)
+        first = _api('test_snapshot', store).load_stock_list()
+        assert calls == [0] and os.path.exists(store.path('test_snapshot'))
+
+        start = time.perf_counter()
+        second = _api('test_snapshot', store).load_stock_list()
+        elapsed = time.perf_counter() - start
+        assert calls == [0]
+        pd.testing.assert_frame_equal(second, first)
+        assert store.stats()['hits'] == 1 and store.stats()['misses'] == 1
+        print(f"从磁盘读取 {len(second)} 只股票耗时 {elapsed * 1000:.1f} 毫秒, 格式 {store.file_format}")
+    finally:
+        registry.unregister('test_snapshot')
+        shutil.rmtree(directory)
+
+
+def test_stale_snapshot_refreshed_in_background():
+    """过期快照先返回，后台刷新"""
+    print("\n=== 测试过期快照后台刷新 ===")
+
+    directory = tempfile.mkdtemp()
+    gate = threading.Event()
+    gate.set()
+    calls = _make_source('test_stale', [0, 1], gate=gate)
+    try:
+        store = SnapshotStore(directory, ttl=60)
+        _api('test_stale', store).load_stock_list()
+        # 把快照时间改到有效期之前
+        old = time.time() - 120
+        os.utime(store.path('test_stale'), (old, old))
+
+        # 数据源阻塞，过期快照仍然立即返回，后台刷新尚未完成
+        gate.clear()
+        stale = _api('test_stale', store).load_stock_list()
+        assert stale['最新价'].tolist() == [10.0, 12.0]
+        assert calls == [0]
+        assert store.stats()['stale'] == 1
+
+        gate.set()
+        store.wait(timeout=10)
+        assert calls == [0, 1]
+        refreshed, age = store.read('test_stale')
+        assert refreshed['最新价'].tolist() == [11.0, 13.0] and age < 60
+        print("数据源阻塞时过期快照立即返回，后台刷新后快照已更新")
+    finally:
+        gate.set()
+        registry.unregister('test_stale')
+        shutil.rmtree(directory)
+
+
+def test_fallback_not_saved():
+    """回退到本地数据的结果不保存"""
+    print("\n=== 测试回退结果不保存 ===")
+
+    directory = tempfile.mkdtemp()
+
+    @registry.register('test_fallback', description='测试')
+    def load(api):
+        return api._load_from_local()
+
+    try:
+        store = SnapshotStore(directory, ttl=60)
+        stock_list = _api('test_fallback', store).load_stock_list()
+        assert len(stock_list) > 1000
+        assert not os.path.exists(store.path('test_fallback'))
+        assert store.stats()['writes'] == 0
+        print(f"回退得到 {len(stock_list)} 只股票，未保存快照")
+    finally:
+        registry.unregister('test_fallback')
+        shutil.rmtree(directory)
+
+
+def test_ttl_config():
+    """有效期配置"""
+    print("\n=== 测试有效期配置 ===")
+
+    settings = {'cache_duration': 1800, 'snapshot_cache': {'ttl': {'xueqiu': 600, 'sina': 0}}}
+    store = SnapshotStore(tempfile.gettempdir(), config_loader=lambda: settings)
+    store._load_config()
+    assert store.ttl_for('akshare') == 1800
+    assert store.ttl_for('xueqiu') == 600
+    assert store.ttl_for('sina') == 0
+
+    disabled = SnapshotStore(config_loader=lambda: {'snapshot_cache': {'enabled': False}})
+    assert disabled.get('akshare', lambda: (pd.DataFrame({'代码': ['600000']}), True)) is not None
+    assert not disabled.enabled and disabled.stats()['writes'] == 0
+    print(f"有效期: 默认 {store.ttl} 秒, 按数据源 {store.ttls}")
+
+
+if __name__ == "__main__":
+    try:
+        test_fresh_snapshot_read_from_disk()
+        test_stale_snapshot_refreshed_in_background()
+        test_fallback_not_saved()
+        test_ttl_config()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
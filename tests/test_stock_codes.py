@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试股票代码标准化和验证：
+1. 单个代码的标准化规则（3/4/5位补全、30/68前缀）
+2. 整列批量标准化与逐个标准化结果一致
+"""
+
+import sys
+import os
+import random
+import time
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from stock_codes import is_valid_stock_code, normalize_stock_code, normalize_code_series
+
+
+def _random_codes(count, seed=7):
+    """生成包含引号、分隔符、全角数字等杂质的随机代码"""
+    rng = random.Random(seed)
+    alphabet = "0123456789'\" ab-.６"
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 9))) for _ in range(count)]
+
+
+def test_code_validation():
+    """代码格式验证：前缀表与标准化规则"""
+    print("=== 测试代码格式验证 ===")
+
+    cases = {
+        "'852'": ('000852', True),
+        '"2208"': ('002208', True),
+        '3018': ('300018', True),
+        '6801': ('680001', False),
+        '688001': ('688001', True),
+        '301223': ('301223', True),
+        '123': ('000123', True),
+        '653': ('600653', True),
+        '456': ('000456', True),
+        '900001': ('900001', False),
+        '６０００３６': ('600036', True),
+        'abc': ('', False),
+    }
+    for code, (normalized, valid) in cases.items():
+        assert normalize_stock_code(code) == normalized, code
+        assert is_valid_stock_code(code) == valid, code
+        print(f"{code:10} -> {normalized:6} -> 有效: {valid}")
+
+
+def test_series_parity():
+    """批量标准化与逐个标准化结果一致"""
+    print("\n=== 测试批量标准化与逐个标准化一致 ===")
+
+    special = [None, np.nan, 0, 0.0, '', ' ', 852, 852.0, 3018, 'nan', "'852'", '"2208"',
+               "'3018'", '688001', "'301223'", '68123', '1', '12', '1234567', False, '0', 600]
+    samples = [
+        pd.Series(special + _random_codes(20000), dtype=object),
+        pd.Series(_random_codes(20000, seed=11)),
+        pd.Series([1.0, 0.0, np.nan, 852.5, 3018.0]),
+        pd.Series([0, 1, 852, 3018, 600000], index=[5, 6, 7, 8, 9]),
+    ]
+
+    for codes in samples:
+        normalized, valid = normalize_code_series(codes)
+        assert list(normalized.index) == list(codes.index)
+        assert normalized.tolist() == [normalize_stock_code(code) for code in codes]
+        assert valid.tolist() == [is_valid_stock_code(code) for code in codes]
+        print(f"{len(codes)} 个代码结果一致，有效 {int(valid.sum())} 个")
+
+
+def test_series_speed():
+    """10万行输入的批量标准化耗时"""
+    print("\n=== 测试批量标准化耗时 ===")
+
+    rng = np.random.default_rng(0)
+    codes = pd.Series([str(value) for value in rng.integers(0, 700000, size=5000)])
+    codes = codes.sample(100000, replace=True, random_state=0).reset_index(drop=True)
+
+    start = time.perf_counter()
+    normalized, valid = normalize_code_series(codes)
+    elapsed = time.perf_counter() - start
+
+    print(f"100000 行耗时: {elapsed * 1000:.1f} 毫秒")
+    assert len(normalized) == 100000 and len(valid) == 100000
+
+
+if __name__ == "__main__":
+    try:
+        test_code_validation()
+        test_series_parity()
+        test_series_speed()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
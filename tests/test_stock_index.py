@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试股票列表查找索引：
+1. 索引查找结果与全表扫描一致
+2. 替换股票列表时自动重建索引
+3. 直接寻址代码表的批量查找
+"""
+
+import sys
+import os
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from stock_name_matcher import StockNameMatcher
+
+
+def _make_universe(rows):
+    """根据 (代码, 名称, 最新价) 列表创建标准格式股票列表"""
+    df = pd.DataFrame(rows, columns=['代码', '名称', '最新价'])
+    for col in ['涨跌幅', '涨跌额', '成交量', '成交额', '市盈率-动态', '市净率']:
+        df[col] = 0.0
+    return df
+
+
+def test_index_matches_full_scan():
+    """索引查找与全表扫描结果一致"""
+    print("=== 测试索引查找与全表扫描一致 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    stock_list = matcher.stock_list
+
+    for code in stock_list['代码'].head(50).tolist() + ['609999', '000000']:
+        matched = stock_list[stock_list['代码'] == code]
+        row = matcher._index.lookup_code(code)
+        if len(matched) == 0:
+            assert row == -1
+        else:
+            assert stock_list.index.get_loc(matched.index[0]) == row
+            result = matcher.match_stock_code(code)
+            assert result['股票名称'] == matched.iloc[0]['名称']
+        print(f"{code}: 行位置 {row}")
+
+
+def test_index_rebuilt_on_reload():
+    """替换股票列表后索引随之更新"""
+    print("\n=== 测试替换股票列表后重建索引 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    matcher.stock_list = _make_universe([('600000', '浦发银行', 10.0), ('000001', '平安银行', 11.0)])
+    assert matcher.match_stock_code('600000')['股票名称'] == '浦发银行'
+
+    matcher.stock_list = _make_universe([('000001', '平安银行', 11.0)])
+    assert matcher.match_stock_code('600000')['匹配状态'] == '未找到匹配'
+    result = matcher.match_stock_code('1', reference_price=10.5)
+    assert result['股票名称'] == '平安银行'
+    assert abs(result['价格差异'] - 0.5) < 1e-9
+    print("索引重建成功")
+
+
+def test_code_table_vectorized_lookup():
+    """直接寻址代码表：批量查找与逐个查找一致"""
+    print("\n=== 测试直接寻址代码表 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    codes = matcher.stock_list['代码'].head(20).tolist() + ['609999', '123456']
+    values = np.array([int(code) for code in codes] + [-1, 1_000_000])
+
+    rows = matcher._index.lookup_codes(values)
+    assert rows.tolist() == [matcher._index.lookup_code(code) for code in codes] + [-1, -1]
+    assert matcher._index.lookup_code('60000') == -1
+    print(f"批量查找 {len(values)} 个代码成功")
+
+
+if __name__ == "__main__":
+    try:
+        test_index_matches_full_scan()
+        test_index_rebuilt_on_reload()
+        test_code_table_vectorized_lookup()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据源限流策略：
+1. 本地数据源不限流，网络数据源按间隔限流；分批并发请求的令牌桶允许 并发数 个请求同时开始
+2. 从 data_sources.throttle 配置读取间隔，读取配置不创建配置文件
+3. 本地查找的逐行处理不再等待
+"""
+
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from throttle_policy import ThrottlePolicy
+from stock_name_matcher import StockNameMatcher
+
+
+class FakeClock:
+    """测试用的时钟：sleep 只推进时间，不真正等待"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+
+def test_network_sources_throttled():
+    """网络数据源按间隔限流，本地数据源不等待"""
+    print("=== 测试按数据源限流 ===")
+
+    clock = FakeClock()
+    policy = ThrottlePolicy({'sina': 0.05}, clock=clock, sleep=clock.sleep)
+
+    for _ in range(100):
+        assert policy.wait('local') == 0.0
+    assert clock.sleeps == []
+
+    delays = [policy.wait('sina') for _ in range(4)]
+    # 第一次请求无需等待，之后每次间隔0.05秒
+    assert delays[0] == 0.0
+    assert all(abs(delay - 0.05) < 1e-9 for delay in delays[1:])
+    assert abs(clock.now - 0.15) < 1e-9
+    print(f"sina 4次请求等待: {[round(delay, 2) for delay in delays]} 秒")
+
+    # 空闲超过间隔后不再等待，不同数据源互不影响
+    clock.now += 1.0
+    assert policy.wait('sina') == 0.0
+    assert policy.wait('tencent') == 0.0
+
+
+def test_bucket_allows_concurrent_burst():
+    """分批并发请求的令牌桶：前 并发数 个请求同时开始，之后按 并发数 / 间隔 的速率"""
+    print("\n=== 测试并发令牌桶 ===")
+
+    clock = FakeClock()
+    policy = ThrottlePolicy({'tencent': 0.1}, clock=clock, sleep=clock.sleep)
+    assert policy.bucket('local', 8) is None
+    bucket = policy.bucket('tencent', 8)
+    assert bucket is policy.bucket('tencent', 8)
+    assert bucket.rate == 80 and bucket.capacity == 8
+
+    delays = [bucket.acquire() for _ in range(16)]
+    assert delays[:8] == [0.0] * 8
+    # 之后每个请求等待一个令牌（1/80 秒）
+    assert all(abs(delay - 1 / 80) < 1e-9 for delay in delays[8:])
+    assert abs(clock.now - 0.1) < 1e-9
+    print(f"16 个请求共等待 {clock.now:.2f} 秒，依次开始需要 {15 * 0.1:.1f} 秒")
+
+
+def test_intervals_from_config():
+    """从 data_sources.throttle 读取限流间隔"""
+    print("\n=== 测试从配置读取限流间隔 ===")
+
+    policy = ThrottlePolicy.from_config({'primary': 'local', 'throttle': {'xueqiu': 1.5, 'local': 3}})
+    assert policy.interval('xueqiu') == 1.5
+    assert policy.interval('sina') == 0.1
+    assert policy.interval('local') == 0.0
+    print(f"xueqiu: {policy.interval('xueqiu')} 秒, sina: {policy.interval('sina')} 秒")
+
+
+def test_config_file_not_created():
+    """读取配置：有配置文件时使用其中的间隔，没有时使用默认值且不创建配置文件"""
+    print("\n=== 测试读取配置不创建配置文件 ===")
+
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {project_dir!r})\n"
+        "from throttle_policy import get_throttle_policy\n"
+        "print('INTERVAL', get_throttle_policy().interval('xueqiu'))\n"
+    )
+    work_dir = tempfile.mkdtemp()
+    try:
+        result = subprocess.run([sys.executable, '-c', script], cwd=work_dir, capture_output=True, text=True,
+                                timeout=120)
+        assert 'INTERVAL 0.5' in result.stdout, result.stderr[-2000:]
+        assert os.listdir(work_dir) == []
+
+        with open(os.path.join(work_dir, 'config.json'), 'w', encoding='utf-8') as f:
+            json.dump({'data_sources': {'throttle': {'xueqiu': 1.5}}}, f)
+        result = subprocess.run([sys.executable, '-c', script], cwd=work_dir, capture_output=True, text=True,
+                                timeout=120)
+        assert 'INTERVAL 1.5' in result.stdout, result.stderr[-2000:]
+        assert os.listdir(work_dir) == ['config.json']
+    finally:
+        shutil.rmtree(work_dir)
+    print("读取配置未创建配置文件和加密密钥")
+
+
+def test_local_processing_not_delayed():
+    """逐行处理本地查找时没有固定延迟"""
+    print("\n=== 测试本地逐行处理无延迟 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    codes = matcher.stock_list['代码'].head(200)
+    input_df = pd.DataFrame({'股票代码': codes.tolist(), '参考价格': [None] * len(codes)})
+
+    # 记录逐行处理期间的等待：原先每行固定等待0.05秒
+    sleeps = []
+    original_sleep = time.sleep
+    time.sleep = sleeps.append
+    try:
+        results = matcher._process_standard(input_df, enable_cross_validation=False)
+    finally:
+        time.sleep = original_sleep
+    print(f"{len(results)} 行, 等待 {len(sleeps)} 次")
+    assert len(results) == 200
+    assert sleeps == []
+
+
+if __name__ == "__main__":
+    try:
+        test_network_sources_throttled()
+        test_bucket_allows_concurrent_burst()
+        test_intervals_from_config()
+        test_config_file_not_created()
+        test_local_processing_not_delayed()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
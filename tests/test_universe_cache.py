@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据源股票列表快照缓存：
+1. 每个数据源在有效期内只加载一次，过期后重新加载，加载失败在短时间内不重试
+2. 交叉验证在内存快照上查找，验证整个文件时每个数据源只加载一次
+3. 有效期和总时限读取 data_sources 配置
+4. 多个数据源并发加载，超过总时限的记为超时，统计只使用按时返回的数据源
+5. 之前已开始的加载按各自的开始时间计算时限，已过时限的不再等待
+"""
+
+import sys
+import os
+import time
+import threading
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import universe_cache
+from universe_cache import UniverseCache
+from stock_name_matcher import StockNameMatcher, CROSS_VALIDATION_SOURCES
+
+
+class FakeClock:
+    """测试用的时钟，只在测试中手动前进"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _record_waits():
+    """记录 get_many 每次等待的时限，返回记录列表和恢复函数"""
+    timeouts = []
+    original = universe_cache.wait
+
+    def recording_wait(futures, timeout=None):
+        timeouts.append(round(timeout, 9))
+        return original(futures, timeout=timeout)
+
+    universe_cache.wait = recording_wait
+
+    def restore():
+        universe_cache.wait = original
+    return timeouts, restore
+
+
+def _counting_loader(stock_list, calls, fail=()):
+    """按数据源记录加载次数的加载函数，fail 中的数据源抛出异常"""
+    def loader(source):
+        calls.append(source)
+        if source in fail:
+            raise ConnectionError(f"{source} 无法连接")
+        return stock_list
+    return loader
+
+
+def test_snapshot_ttl():
+    """有效期内只加载一次，过期后重新加载"""
+    print("=== 测试快照有效期 ===")
+
+    stock_list = pd.DataFrame({'代码': ['000001', '600000'], '名称': ['平安银行', '浦发银行'], '最新价': [10.5, 7.2]})
+    calls = []
+    clock = FakeClock()
+    cache = UniverseCache(ttl=0.1, failure_ttl=0.05, clock=clock)
+    loader = _counting_loader(stock_list, calls, fail={'sina'})
+
+    # 多个线程同时请求同一数据源时只加载一次
+    threads = [threading.Thread(target=cache.get, args=('tencent', loader)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ['tencent']
+
+    snapshot = cache.get('tencent', loader)
+    assert snapshot.lookup('600000') == {'name': '浦发银行', 'price': 7.2}
+    assert snapshot.lookup('000002') is None
+
+    failed = cache.get('sina', loader)
+    assert not failed.ok and 'sina' in failed.error
+    assert cache.get('sina', loader) is failed
+
+    clock.now = 0.06
+    cache.get('sina', loader)
+    cache.get('tencent', loader)
+    assert calls.count('sina') == 2 and calls.count('tencent') == 1
+    clock.now = 0.12
+    cache.get('tencent', loader)
+    assert calls.count('tencent') == 2
+    print(f"加载记录: {calls}, 统计: {cache.stats()['hits']} 次命中, {cache.stats()['loads']} 次加载")
+
+
+def test_cross_validation_uses_snapshots():
+    """交叉验证整个文件时每个数据源只加载一次"""
+    print("\n=== 测试交叉验证使用快照 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    stock_list = matcher.stock_list
+    renamed = stock_list.copy()
+    renamed.loc[renamed['代码'] == '000001', '名称'] = '平安银行(旧)'
+    sources = {'akshare': stock_list, 'sina': renamed, 'tencent': stock_list[stock_list['代码'] != '000001']}
+
+    calls = []
+
+    def loader(source):
+        calls.append(source)
+        if source not in sources:
+            raise ConnectionError(f"{source} 无法连接")
+        return sources[source]
+
+    matcher.universe_cache = UniverseCache(ttl=60)
+    matcher._load_universe = loader
+
+    codes = stock_list['代码'].head(200).tolist()
+    start = time.perf_counter()
+    results = [matcher.cross_validate_stock_info(code, name)
+               for code, name in zip(codes, stock_list['名称'].head(200))]
+    elapsed = time.perf_counter() - start
+    assert sorted(calls) == sorted(CROSS_VALIDATION_SOURCES)
+
+    first = results[codes.index('000001')]
+    assert first['found_count'] == 2
+    assert first['validation_results']['sina']['name'] == '平安银行(旧)'
+    assert first['validation_results']['tencent']['found'] is False
+    assert 'eastmoney' in first['validation_results']['eastmoney']['error']
+    assert first['name_consistency'] == 50.0
+    other = results[1] if codes[0] == '000001' else results[0]
+    assert other['found_count'] == 3 and other['name_consistency'] == 100.0
+    print(f"{len(codes)} 只股票交叉验证耗时 {elapsed * 1000:.1f} 毫秒, 加载 {len(calls)} 次")
+
+
+def test_cache_duration_config():
+    """有效期和总时限读取 data_sources 配置"""
+    print("\n=== 测试有效期配置 ===")
+
+    cache = UniverseCache(config_loader=lambda: {'cache_duration': 120, 'cross_validation_deadline': 5})
+    cache.get('akshare', lambda source: None)
+    assert cache.ttl == 120 and cache.deadline == 5
+    print(f"有效期: {cache.ttl} 秒, 总时限: {cache.deadline} 秒")
+
+
+def test_concurrent_deadline():
+    """并发加载：各数据源同时加载，超过时限的记为超时"""
+    print("\n=== 测试并发加载和总时限 ===")
+
+    matcher = StockNameMatcher(api_source='local')
+    stock_list = matcher.stock_list
+    # akshare、sina、tencent 互相等待，都开始后才返回；eastmoney 在放行前一直阻塞
+    together = threading.Barrier(3, timeout=10)
+    release = threading.Event()
+    calls = []
+
+    def slow_loader(source):
+        calls.append(source)
+        if source == 'eastmoney':
+            release.wait(10)
+        else:
+            together.wait()
+        return stock_list
+
+    clock = FakeClock()
+    matcher.universe_cache = UniverseCache(ttl=60, deadline=0.8, clock=clock)
+    matcher._load_universe = slow_loader
+    timeouts, restore = _record_waits()
+    try:
+        # 依次加载时 Barrier 超时，三个数据源都会失败
+        result = matcher.cross_validate_stock_info('000001', '平安银行')
+        assert timeouts == [0.8] * 4
+        assert result['timeout_sources'] == ['eastmoney']
+        assert result['validation_results']['eastmoney']['error'] == '超时'
+        assert result['found_count'] == 3 and result['name_consistency'] == 100.0
+        assert result['most_common_name'] == '平安银行'
+
+        # 超时的加载仍在进行，已过时限不再等待，也不重复加载
+        clock.now = 1.0
+        del timeouts[:]
+        second = matcher.cross_validate_stock_info('600000', '浦发银行')
+        assert timeouts == [0.0]
+        assert second['timeout_sources'] == ['eastmoney']
+        assert calls.count('eastmoney') == 1
+    finally:
+        release.set()
+        restore()
+
+    # 后台加载完成后可以直接使用
+    assert matcher.universe_cache.get_many(['eastmoney'], slow_loader, deadline=10)['eastmoney'] is not None
+    third = matcher.cross_validate_stock_info('600000', '浦发银行')
+    assert third['timeout_sources'] == [] and third['found_count'] == 4
+    assert sorted(calls) == sorted(['akshare', 'sina', 'tencent', 'eastmoney'])
+    print(f"超时数据源: {result['timeout_sources']}，统计: {matcher.universe_cache.stats()['timeouts']} 次超时")
+
+
+def test_per_load_deadline():
+    """每个加载按各自的开始时间计算时限"""
+    print("\n=== 测试各自的时限 ===")
+
+    stock_list = pd.DataFrame({'代码': ['000001'], '名称': ['平安银行']})
+    release = threading.Event()
+
+    def loader(source):
+        if source == 'slow':
+            release.wait(10)
+        return stock_list
+
+    clock = FakeClock()
+    cache = UniverseCache(ttl=60, deadline=0.8, clock=clock)
+    timeouts, restore = _record_waits()
+    try:
+        assert cache.get_many(['slow'], loader, deadline=0)['slow'] is None
+        clock.now = 0.6
+
+        # slow 在 0 秒开始，只再等待 0.2 秒；fast 在 0.6 秒开始，等待完整的 0.8 秒
+        result = cache.get_many(['slow', 'fast'], loader)
+        assert result['slow'] is None and result['fast'] is not None
+        assert timeouts == [0.0, 0.2, 0.8]
+    finally:
+        release.set()
+        restore()
+    print(f"等待时限: {timeouts}，已超时的加载未延长等待")
+
+
+if __name__ == "__main__":
+    try:
+        test_snapshot_ttl()
+        test_cross_validation_uses_snapshots()
+        test_cache_duration_config()
+        test_concurrent_deadline()
+        test_per_load_deadline()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
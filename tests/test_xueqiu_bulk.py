@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试雪球数据源批量加载（使用模拟的行情接口，不访问外网）：
+1. 批量接口一次查询多只股票，全市场加载的请求数为 股票数/每批数量
+2. 批量接口不可用时逐只查询，并发请求受令牌桶限流；只查询了部分股票的列表不保存为快照
+3. 按需模式只查询输入文件中的股票，并更新到股票列表
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+from urllib.parse import urlparse, parse_qs
+# 添加父目录到路径，以便导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import stock_name_matcher
+from local_stock_data import LocalStockData
+from snapshot_store import SnapshotStore
+from throttle_policy import TokenBucket
+from stock_name_matcher import StockDataAPI, StockNameMatcher, XUEQIU_BATCH_SIZE, XUEQIU_SINGLE_LIMIT
+
+
+class _Response:
+    def __init__(self, data, status_code=200):
+        self.text = json.dumps(data)
+        self.status_code = status_code
+        self.encoding = None
+
+
+class _FakeXueqiu:
+    """模拟雪球行情接口：价格为代码末两位 + 1，bulk=False 时批量接口返回错误"""
+
+    def __init__(self, bulk=True):
+        self.bulk = bulk
+        self.urls = []
+        self._lock = threading.Lock()
+
+    def concurrency(self, source):
+        return 4
+
+    def log_stats(self, source):
+        pass
+
+    def get(self, source, url, timeout=None, headers=None, **kwargs):
+        assert source == 'xueqiu' and headers['Referer'] == 'https://xueqiu.com/'
+        with self._lock:
+            self.urls.append(url)
+        parsed = urlparse(url)
+        symbols = parse_qs(parsed.query)['symbol'][0].split(',')
+        if parsed.path.endswith('quotec.json'):
+            if not self.bulk:
+                return _Response({'error_code': 400016, 'error_description': '不支持'})
+            return _Response({'error_code': 0, 'data': [self._quote(symbol) for symbol in symbols]})
+        quote = dict(self._quote(symbols[0]), name=f"雪球{symbols[0][2:]}", code=symbols[0][2:])
+        return _Response({'error_code': 0, 'data': {'quote': quote}})
+
+    def _quote(self, symbol):
+        return {'symbol': symbol, 'current': int(symbol[-2:]) + 1.0, 'percent': 1.5, 'chg': 0.1,
+                'volume': 1000, 'amount': 10000.0, 'market_capital': 1e9, 'float_market_capital': 8e8}
+
+
+def _patch(fake, bucket):
+    """让新建的 StockDataAPI 使用模拟接口和测试用的令牌桶，不读写磁盘快照"""
+    saved = (stock_name_matcher.get_http_pool, stock_name_matcher.get_token_bucket,
+             stock_name_matcher.get_snapshot_store)
+    stock_name_matcher.get_http_pool = lambda: fake
+    stock_name_matcher.get_token_bucket = lambda source: bucket
+    stock_name_matcher.get_snapshot_store = lambda: None
+    return saved
+
+
+def _restore(saved):
+    (stock_name_matcher.get_http_pool, stock_name_matcher.get_token_bucket,
+     stock_name_matcher.get_snapshot_store) = saved
+
+
+def test_bulk_quotes():
+    """批量接口：全市场只需 股票数/每批数量 次请求"""
+    print("=== 测试雪球批量接口 ===")
+
+    stock_list = LocalStockData().get_stock_list()
+    fake = _FakeXueqiu()
+    saved = _patch(fake, TokenBucket(rate=1000, capacity=1000))
+    try:
+        result = StockDataAPI('xueqiu').load_stock_list()
+    finally:
+        _restore(saved)
+
+    expected_requests = -(-len(stock_list) // XUEQIU_BATCH_SIZE)
+    assert len(fake.urls) == expected_requests
+    assert result['代码'].tolist() == stock_list['代码'].tolist()
+    assert result['名称'].tolist() == stock_list['名称'].tolist()
+    assert result['最新价'].tolist() == [int(code[-2:]) + 1.0 for code in stock_list['代码']]
+    print(f"{len(result)} 只股票, {len(fake.urls)} 次请求")
+
+
+def test_single_symbol_fallback():
+    """批量接口不可用时逐只查询，受令牌桶限流"""
+    print("\n=== 测试逐只查询和令牌桶 ===")
+
+    codes = ['600000', '000001', '300750', '688981', '000002', '601318']
+    fake = _FakeXueqiu(bulk=False)
+    # 时钟不前进，记录令牌桶的等待时间
+    sleeps = []
+    bucket = TokenBucket(rate=20, capacity=2, clock=lambda: 0.0, sleep=sleeps.append)
+    saved = _patch(fake, bucket)
+    try:
+        result = StockDataAPI('xueqiu', symbols=codes).load_stock_list()
+    finally:
+        _restore(saved)
+
+    assert result['代码'].tolist() == codes
+    assert result['名称'].tolist() == [f"雪球{code}" for code in codes]
+    # 1 次批量请求 + 6 次逐只请求，桶内2个令牌之外的5次请求按每秒20个的速率放行
+    assert len(fake.urls) == 7
+    assert sorted(round(wait, 9) for wait in sleeps) == [0.05, 0.1, 0.15, 0.2, 0.25]
+    print(f"{len(codes)} 只股票逐只查询, 最后一个请求等待 {max(sleeps):.2f} 秒")
+
+
+def test_partial_list_not_saved():
+    """批量接口不可用时全市场只逐只查询一部分股票，结果不保存为快照"""
+    print("\n=== 测试部分股票不保存快照 ===")
+
+    fake = _FakeXueqiu(bulk=False)
+    saved = _patch(fake, TokenBucket(rate=1000, capacity=1000))
+    directory = tempfile.mkdtemp()
+    try:
+        store = SnapshotStore(directory, ttl=60)
+        api = StockDataAPI('xueqiu')
+        api.snapshots = store
+        result = api.load_stock_list()
+        assert len(result) == XUEQIU_SINGLE_LIMIT and api.incomplete
+        assert not os.path.exists(store.path('xueqiu')) and store.stats()['writes'] == 0
+    finally:
+        _restore(saved)
+        shutil.rmtree(directory)
+    print(f"逐只查询 {len(result)} 只股票，未保存为全市场快照")
+
+
+def test_token_bucket_rate():
+    """令牌桶：突发 capacity 个请求后按 rate 放行"""
+    print("\n=== 测试令牌桶速率 ===")
+
+    # 时钟不前进：等待时间只取决于取令牌的先后，与线程调度无关
+    sleeps = []
+    bucket = TokenBucket(rate=50, capacity=5, clock=lambda: 0.0, sleep=sleeps.append)
+    waits = []
+    threads = [threading.Thread(target=lambda: waits.append(bucket.acquire())) for _ in range(15)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(1 for wait in waits if wait == 0) == 5
+    assert sorted(round(wait, 9) for wait in sleeps) == [round(k / 50, 9) for k in range(1, 11)]
+    print(f"15 个请求, 最后一个请求等待 {max(sleeps):.2f} 秒")
+
+
+def test_demand_driven_refresh():
+    """按需模式：只查询输入文件中的股票并更新行情"""
+    print("\n=== 测试按需查询输入文件中的股票 ===")
+
+    stock_list = LocalStockData().get_stock_list()
+    matcher = StockNameMatcher(api_source='xueqiu', stock_list=stock_list)
+    codes = ['600000', '000001', '300750']
+    test_file = "test_xueqiu_codes.csv"
+    output_file = "test_xueqiu_result.csv"
+    pd.DataFrame({'股票代码': codes + ['abc']}).to_csv(test_file, index=False, encoding='utf-8-sig')
+
+    fake = _FakeXueqiu()
+    saved = _patch(fake, TokenBucket(rate=1000, capacity=1000))
+    try:
+        matcher.process_stock_codes(test_file, output_file)
+        result = pd.read_csv(output_file, dtype={'标准化代码': str, '股票代码': str})
+    finally:
+        _restore(saved)
+        for file in [test_file, output_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+    assert len(fake.urls) == 1 and fake.urls[0].endswith('symbol=SH600000,SZ000001,SZ300750')
+    found = result[result['匹配状态'] == '匹配成功']
+    assert found['股票代码'].tolist() == codes
+    assert found['当前价格'].tolist() == [1.0, 2.0, 51.0]
+    print(found[['股票代码', '股票名称', '当前价格']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    try:
+        test_bulk_quotes()
+        test_single_symbol_fallback()
+        test_partial_list_not_saved()
+        test_token_bucket_rate()
+        test_demand_driven_refresh()
+        print("\n✅ 所有测试完成！")
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
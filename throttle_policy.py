@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据源限流策略
+按数据源控制网络请求的最小间隔，只对真正发出网络请求的调用限流，
+本地数据源和内存中的查找不受影响。
+
+限流间隔可通过 ConfigManager 的 data_sources.throttle 配置（单位：秒），例如：
+    "throttle": {"sina": 0.1, "tencent": 0.1, "netease": 0.2, "xueqiu": 0.5}
+
+分批并发获取行情时，限流间隔按每个并发连接计算：使用容量为并发数的令牌桶，
+各连接的第一个请求同时开始，之后平均每秒 并发数 / 间隔 个请求。
+
+需要并发逐个请求的数据源（如雪球逐只股票查询）使用令牌桶限流，允许少量突发，
+平均速率和桶容量通过 data_sources.token_bucket 配置，例如：
+    "token_bucket": {"xueqiu": {"rate": 2.0, "capacity": 4}}
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from config_manager import get_section, shared_instance
+
+logger = logging.getLogger(__name__)
+
+# 不经过网络的数据源
+LOCAL_SOURCES = {'local'}
+
+# 默认的请求间隔（秒），与各数据源原有的请求延迟一致
+DEFAULT_INTERVALS = {
+    'akshare': 0.0,
+    'sina': 0.1,
+    'tencent': 0.1,
+    'eastmoney': 0.0,
+    'netease': 0.2,
+    'xueqiu': 0.5,
+}
+
+# 默认的令牌桶：每秒 rate 个请求，最多累积 capacity 个
+DEFAULT_BUCKETS = {
+    'xueqiu': {'rate': 2.0, 'capacity': 4},
+}
+
+
+class ThrottlePolicy:
+    """按数据源限流：同一数据源两次网络请求之间至少间隔指定时间"""
+
+    def __init__(self, intervals: Optional[Dict[str, float]] = None,
+                 config_loader: Optional[Callable[[], Dict[str, float]]] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            intervals: 各数据源的请求间隔（秒），未指定的数据源使用默认值
+            config_loader: 返回间隔配置的函数，在第一次网络请求时才调用
+            clock: 返回当前时间（秒）的函数
+            sleep: 等待指定秒数的函数
+        """
+        self.intervals = dict(DEFAULT_INTERVALS)
+        if intervals:
+            self._update_intervals(intervals)
+        self._config_loader = config_loader
+        self._clock = clock
+        self._sleep = sleep
+        self._next_allowed = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict = None) -> 'ThrottlePolicy':
+        """
+        从 data_sources.throttle 读取限流间隔
+
+        Args:
+            config: data_sources 配置，None表示从配置文件读取
+        """
+        if config is None:
+            return cls(get_section('data_sources', 'throttle'))
+        return cls(config.get('throttle', {}))
+
+    def _update_intervals(self, intervals: Dict[str, float]):
+        """合并间隔配置"""
+        self.intervals.update({source: float(value) for source, value in intervals.items()})
+
+    def is_network_source(self, source: str) -> bool:
+        """判断数据源是否需要访问网络"""
+        return source not in LOCAL_SOURCES
+
+    def interval(self, source: str) -> float:
+        """获取数据源的请求间隔（秒），本地数据源为0"""
+        if not self.is_network_source(source):
+            return 0.0
+        if self._config_loader is not None:
+            with self._lock:
+                if self._config_loader is not None:
+                    self._update_intervals(self._config_loader())
+                    self._config_loader = None
+        return max(0.0, self.intervals.get(source, 0.0))
+
+    def wait(self, source: str) -> float:
+        """
+        在发出网络请求前调用，必要时等待到允许的时间
+
+        Args:
+            source: 数据源名称
+
+        Returns:
+            float: 实际等待的秒数
+        """
+        interval = self.interval(source)
+        if interval <= 0:
+            return 0.0
+
+        # 在锁内预约下一个时间槽，在锁外等待，多线程请求同一数据源时依次排队
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next_allowed.get(source, 0.0))
+            self._next_allowed[source] = start + interval
+
+        delay = start - now
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+    def bucket(self, source: str, concurrency: int = 1) -> Optional['TokenBucket']:
+        """
+        分批并发请求使用的令牌桶：每个并发连接的请求间隔为限流间隔，桶容量为并发数
+
+        Args:
+            source: 数据源名称
+            concurrency: 同时进行的请求数
+
+        Returns:
+            TokenBucket: 同一数据源和并发数共享的令牌桶，不限流时为None
+        """
+        interval = self.interval(source)
+        if interval <= 0:
+            return None
+        concurrency = max(1, int(concurrency))
+        with self._lock:
+            bucket = self._buckets.get((source, concurrency))
+            if bucket is None:
+                bucket = TokenBucket(concurrency / interval, concurrency, clock=self._clock, sleep=self._sleep)
+                self._buckets[(source, concurrency)] = bucket
+        return bucket
+
+
+class TokenBucket:
+    """令牌桶限流：平均每秒 rate 个请求，空闲时最多累积 capacity 个令牌用于突发"""
+
+    def __init__(self, rate: float, capacity: float = 1,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量
+            clock: 返回当前时间（秒）的函数
+            sleep: 等待指定秒数的函数
+        """
+        self.rate = max(1e-6, float(rate))
+        self.capacity = max(1.0, float(capacity))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        取得一个令牌，没有令牌时等待
+
+        Returns:
+            float: 实际等待的秒数
+        """
+        # 在锁内扣除令牌（可以为负数，表示预约了之后的令牌），在锁外等待
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+
+@shared_instance
+def get_throttle_policy() -> ThrottlePolicy:
+    """获取进程内共享的限流策略（第一次网络请求时读取 data_sources.throttle 配置）"""
+    return ThrottlePolicy(config_loader=lambda: get_section('data_sources', 'throttle'))
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_token_bucket(source: str) -> TokenBucket:
+    """获取数据源共享的令牌桶（第一次使用时读取 data_sources.token_bucket 配置）"""
+    with _buckets_lock:
+        bucket = _buckets.get(source)
+        if bucket is None:
+            settings = dict(DEFAULT_BUCKETS.get(source, {'rate': 1.0, 'capacity': 1}),
+                            **get_section('data_sources', 'token_bucket').get(source, {}))
+            bucket = _buckets[source] = TokenBucket(settings['rate'], settings['capacity'])
+        return bucket
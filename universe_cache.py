@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据源股票列表快照缓存
+每个数据源的全市场股票列表在有效期内只加载一次，交叉验证等按代码查找的操作
+直接在内存中的快照上完成，不再为每只股票重新下载整个市场的行情。
+
+多个数据源并发加载，等待时间不超过总时限，未在时限内返回的数据源记为超时，
+其加载在后台继续，完成后供之后的查询使用。
+
+有效期和总时限读取 ConfigManager 的 data_sources 配置（秒），例如：
+    "cache_duration": 3600,
+    "cross_validation_deadline": 15
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import pandas as pd
+
+from stock_index import StockIndex
+from config_manager import get_section, shared_instance
+
+logger = logging.getLogger(__name__)
+
+# 默认有效期（秒），与 data_sources.cache_duration 的默认值一致
+DEFAULT_TTL = 3600
+
+# 加载失败的数据源在这段时间内不再重试（秒），不超过有效期
+DEFAULT_FAILURE_TTL = 60
+
+# 并发加载多个数据源时的总时限（秒）
+DEFAULT_DEADLINE = 15
+
+# 后台加载线程数
+LOADER_THREADS = 8
+
+
+
+class UniverseSnapshot:
+    """某个数据源在某一时刻的股票列表及其代码索引"""
+
+    def __init__(self, source: str, stock_list: Optional[pd.DataFrame] = None, error: str = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            source: 数据源名称
+            stock_list: 加载到的股票列表，加载失败时为None
+            error: 加载失败的原因
+            clock: 返回当前时间（秒）的函数
+        """
+        self.source = source
+        self._clock = clock
+        self.loaded_at = clock()
+        self.error = error
+        self.index = StockIndex(stock_list) if stock_list is not None else None
+
+    @property
+    def ok(self) -> bool:
+        """是否加载成功"""
+        return self.index is not None
+
+    @property
+    def age(self) -> float:
+        """快照已存在的秒数"""
+        return self._clock() - self.loaded_at
+
+    def lookup(self, code: str) -> Optional[Dict[str, Any]]:
+        """
+        按标准化代码查找股票
+
+        Returns:
+            Dict: 股票名称和最新价，未找到或快照加载失败时返回None
+        """
+        if self.index is None:
+            return None
+        row = self.index.lookup_code(code)
+        if row < 0:
+            return None
+        return {
+            'name': self.index.get_value(row, '名称', None),
+            'price': self.index.get_value(row, '最新价', None),
+        }
+
+
+class UniverseCache:
+    """按数据源缓存股票列表快照，同一数据源同时只有一个线程在加载"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, failure_ttl: float = DEFAULT_FAILURE_TTL,
+                 deadline: float = DEFAULT_DEADLINE,
+                 config_loader: Optional[Callable[[], Dict[str, Any]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl: 快照有效期（秒），0表示不过期
+            failure_ttl: 加载失败后不再重试的时间（秒）
+            deadline: get_many 等待各数据源的总时限（秒）
+            config_loader: 返回数据源配置的函数，在第一次使用缓存时才调用
+            clock: 返回当前时间（秒）的函数，用于快照有效期和加载时限
+        """
+        self.ttl = max(0.0, float(ttl))
+        self.failure_ttl = max(0.0, float(failure_ttl))
+        self.deadline = max(0.0, float(deadline))
+        self._executor = None
+        self._pending = {}  # source -> (开始时间, future)，后台仍在进行的加载
+        self._config_loader = config_loader
+        self._clock = clock
+        self._snapshots: Dict[str, UniverseSnapshot] = {}
+        self._lock = threading.Lock()
+        self._source_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    def _load_config(self):
+        """第一次使用缓存时读取有效期配置"""
+        if self._config_loader is None:
+            return
+        with self._lock:
+            loader, self._config_loader = self._config_loader, None
+        if loader is not None:
+            settings = loader()
+            if 'cache_duration' in settings:
+                self.ttl = max(0.0, float(settings['cache_duration']))
+            if 'cross_validation_deadline' in settings:
+                self.deadline = max(0.0, float(settings['cross_validation_deadline']))
+
+    def _is_fresh(self, snapshot: Optional[UniverseSnapshot]) -> bool:
+        """快照是否仍在有效期内"""
+        if snapshot is None:
+            return False
+        ttl = self.ttl if snapshot.ok else min(self.failure_ttl, self.ttl or self.failure_ttl)
+        return ttl == 0 or snapshot.age < ttl
+
+    def _source_lock(self, source: str) -> threading.Lock:
+        with self._lock:
+            return self._source_locks.setdefault(source, threading.Lock())
+
+    def get(self, source: str, loader: Callable[[str], Optional[pd.DataFrame]]) -> UniverseSnapshot:
+        """
+        获取数据源的快照，不存在或已过期时调用 loader 重新加载
+
+        Args:
+            source: 数据源名称
+            loader: 加载股票列表的函数，参数为数据源名称
+
+        Returns:
+            UniverseSnapshot: 快照（加载失败时 ok 为False，error 为失败原因）
+        """
+        self._load_config()
+        snapshot = self._snapshots.get(source)
+        if self._is_fresh(snapshot):
+            with self._lock:
+                self.hits += 1
+            return snapshot
+
+        # 同一数据源只加载一次，其他线程等待加载结果
+        with self._source_lock(source):
+            snapshot = self._snapshots.get(source)
+            if self._is_fresh(snapshot):
+                with self._lock:
+                    self.hits += 1
+                return snapshot
+
+            start = time.perf_counter()
+            try:
+                stock_list = loader(source)
+                if stock_list is None:
+                    snapshot = UniverseSnapshot(source, error='API加载失败', clock=self._clock)
+                else:
+                    snapshot = UniverseSnapshot(source, stock_list, clock=self._clock)
+            except Exception as e:
+                logger.warning(f"{source} 股票列表加载失败: {e}")
+                snapshot = UniverseSnapshot(source, error=str(e), clock=self._clock)
+
+            with self._lock:
+                self._snapshots[source] = snapshot
+                self.loads += 1
+                if not snapshot.ok:
+                    self.failures += 1
+            if snapshot.ok:
+                logger.info(f"📸 {source} 股票列表快照已更新: {len(snapshot.index)} 只股票, "
+                            f"耗时 {time.perf_counter() - start:.2f} 秒")
+            return snapshot
+
+    def get_many(self, sources: Iterable[str], loader: Callable[[str], Optional[pd.DataFrame]],
+                 deadline: float = None) -> Dict[str, Optional[UniverseSnapshot]]:
+        """
+        并发获取多个数据源的快照，总等待时间不超过时限
+
+        有效期内的快照直接返回；其余数据源在后台线程中加载，超过时限仍未返回的记为超时（值为None），
+        加载不会被取消，完成后写入缓存。之前已开始的加载从开始时间起计算时限，已经超时的不再等待。
+
+        Args:
+            sources: 数据源名称
+            loader: 加载股票列表的函数，参数为数据源名称
+            deadline: 总时限（秒），None表示使用配置的时限
+
+        Returns:
+            Dict: 数据源 -> 快照，超时的数据源为None（顺序与 sources 一致）
+        """
+        self._load_config()
+        deadline = self.deadline if deadline is None else max(0.0, float(deadline))
+        sources = list(sources)
+        results = {}
+        futures = {}
+        for source in sources:
+            snapshot = self._snapshots.get(source)
+            if self._is_fresh(snapshot):
+                with self._lock:
+                    self.hits += 1
+                results[source] = snapshot
+            else:
+                futures[source] = self._submit(source, loader)
+
+        # 每个加载从各自的开始时间起最多等待 deadline 秒，按截止时间先后等待，
+        # 已过截止时间的加载不再等待
+        for source, (started, future) in sorted(futures.items(), key=lambda item: item[1][0]):
+            wait([future], timeout=max(0.0, started + deadline - self._clock()))
+            if future.done():
+                results[source] = future.result()
+            else:
+                with self._lock:
+                    self.timeouts += 1
+                logger.warning(f"⏱️ {source} 股票列表在 {deadline:.1f} 秒内未返回，记为超时")
+                results[source] = None
+
+        return {source: results[source] for source in sources}
+
+    def _submit(self, source: str, loader: Callable[[str], Optional[pd.DataFrame]]):
+        """在后台线程中加载数据源，同一数据源已有进行中的加载时直接复用"""
+        with self._lock:
+            pending = self._pending.get(source)
+            if pending is not None and not pending[1].done():
+                return pending
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=LOADER_THREADS, thread_name_prefix='universe-loader')
+            pending = (self._clock(), self._executor.submit(self.get, source, loader))
+            self._pending[source] = pending
+            return pending
+
+    def put(self, source: str, stock_list: pd.DataFrame) -> UniverseSnapshot:
+        """保存已经加载好的股票列表（例如匹配器自身加载的列表），避免重复下载"""
+        snapshot = UniverseSnapshot(source, stock_list, clock=self._clock)
+        with self._lock:
+            self._snapshots[source] = snapshot
+        return snapshot
+
+    def invalidate(self, source: str = None):
+        """删除某个数据源的快照，source 为None时全部删除"""
+        with self._lock:
+            if source is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(source, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'loads': self.loads,
+                'failures': self.failures,
+                'timeouts': self.timeouts,
+                'ttl': self.ttl,
+                'deadline': self.deadline,
+                'snapshots': {
+                    source: {'ok': snapshot.ok, 'age': snapshot.age,
+                             'size': len(snapshot.index) if snapshot.ok else 0}
+                    for source, snapshot in self._snapshots.items()
+                },
+            }
+
+
+@shared_instance
+def get_universe_cache() -> UniverseCache:
+    """获取进程内共享的股票列表快照缓存（第一次使用时读取 data_sources 配置）"""
+    return UniverseCache(config_loader=lambda: get_section('data_sources'))